@@ -1,7 +1,9 @@
 import streamlit as st
-import json
-import pandas as pd
-import re
+
+from dashboard.dev_panel import begin_rerun, dev_panel
+from dashboard.formatting import format_number
+from dashboard.service import get_data_service
+from dashboard.session import current_profile, select_profile
 
 # Configure the page
 st.set_page_config(
@@ -11,78 +13,49 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Function to load and extract JSON data from the text file.
-def load_data(file_path):
-    with open(file_path, "r") as f:
-        content = f.read()
-    # Extract the JSON data portion that follows "Raw JSON Data:"
-    match = re.search(r"Raw JSON Data:\n(.*?)(\n\n|$)", content, re.DOTALL)
-    if match:
-        json_str = match.group(1).strip()
-        try:
-            data = json.loads(json_str)
-            return data
-        except Exception as e:
-            st.error(f"Error parsing JSON: {e}")
-            return None
-    else:
-        st.error("JSON data not found in file.")
-        return None
-
-# Function to format numbers with K, M, B suffixes
-def format_number(num):
-    if not isinstance(num, (int, float)):
-        return num
-    
-    abs_num = abs(num)
-    sign = -1 if num < 0 else 1
-    
-    if abs_num >= 1_000_000_000:
-        return f"{sign * abs_num / 1_000_000_000:.1f}B"
-    elif abs_num >= 1_000_000:
-        return f"{sign * abs_num / 1_000_000:.1f}M"
-    elif abs_num >= 1_000:
-        return f"{sign * abs_num / 1_000:.1f}K"
-    else:
-        return str(num)
+# Time this rerun for the developer panel
+begin_rerun()
 
-# Load the data and store in session state so it can be accessed by other pages
-@st.cache_data
-def load_cached_data():
-    return load_data("data/instagram_data.txt")
+# Profiles come from the process-wide data service; the session only keeps
+# which profile it is looking at
+service = get_data_service()
+profiles = service.list_profiles() if service.has_catalogue() else []
 
-data = load_cached_data()
-if data is None:
-    st.stop()
+if profiles:
+    # Pick one profile out of the cached catalogue
+    profile_ids = [row["profile_id"] for row in profiles]
+    labels = {row["profile_id"]: f"{row['name'] or row['profile_id']} (@{row['screenName'] or 'N/A'})" for row in profiles}
+    current = st.session_state.get("profile_id")
+    profile_id = st.sidebar.selectbox(
+        "Profile",
+        profile_ids,
+        index=profile_ids.index(current) if current in profile_ids else 0,
+        format_func=labels.get,
+    )
+    # Switching profiles invalidates everything the other pages derived from the old one
+    select_profile(profile_id)
 
-# Store data in session state for other pages to access
-if "instagram_data" not in st.session_state:
-    st.session_state.instagram_data = data
-
-# Extract the main profile info from the data
-profile = data.get("data", {})
+# Extract the main profile info from the shared profile model
+profile = current_profile().model.info
 
 # Dashboard title and profile header
 st.title("Instagram Analytics Dashboard")
-st.header(f"{profile.get('name', 'N/A')} (@{profile.get('screenName', 'N/A')})")
+st.header(f"{profile.name} (@{profile.screen_name})")
 
 # Display profile in a more structured layout
 col1, col2 = st.columns([1, 3])
 
 with col1:
-    if profile.get("image"):
-        st.image(profile.get("image"), width=200)
+    if profile.image:
+        st.image(profile.image, width=200)
 
 with col2:
-    st.markdown(profile.get("description", ""))
+    st.markdown(profile.description)
     
     # --- Key Statistics ---
     st.subheader("Key Statistics")
-    # Some community metrics might be available in a nested 'community' key.
-    community = data.get("community", {})
-    
     stats_cols = st.columns(4)
-    stats_cols[0].metric("Followers", format_number(profile.get("usersCount", "N/A")))
+    stats_cols[0].metric("Followers", format_number(profile.users_count))
     
     # Add a guide for navigation
     st.markdown("---")
@@ -94,5 +67,9 @@ with col2:
     - **Home** - Profile overview and key statistics
     - **Audience Demographics** - Analyze follower demographics by country and city
     - **Tags Analysis** - Explore profile tags, suggested tags and rating tags
+    - **Engagement** - Track engagement rate, posting cadence and outlier posts
     - **About** - Information about this dashboard
-    """)
\ No newline at end of file
+    """)
+
+# Developer panel with this rerun's timings, when enabled
+dev_panel("Home")
@@ -0,0 +1,43 @@
+"""Fixtures for the benchmark suite.
+
+Profiles are synthetic (dashboard.synthetic) at 1x, 10x and 100x the size of
+the sample export. Run from the repository root with pytest-benchmark::
+
+    python -m pytest benchmarks
+    python -m pytest benchmarks --benchmark-autosave                # store a baseline
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%   # in CI
+"""
+import pytest
+
+from dashboard.context import profile_hash
+from dashboard.model import ProfileModel
+from dashboard.synthetic import make_export, make_export_text
+
+SCALES = (1, 10, 100)
+
+
+@pytest.fixture(scope="session", params=SCALES, ids=lambda scale: f"{scale}x")
+def scale(request):
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def export(scale):
+    return make_export(scale)
+
+
+@pytest.fixture(scope="session")
+def export_path(scale, tmp_path_factory):
+    path = tmp_path_factory.mktemp(f"export_{scale}x") / "instagram_data.txt"
+    path.write_text(make_export_text(scale))
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def model(export):
+    return ProfileModel.from_export(export)
+
+
+@pytest.fixture(scope="session")
+def content_hash(export):
+    return profile_hash(export)
@@ -0,0 +1,11 @@
+from dashboard.context import build_context, get_context
+
+
+def test_build_context(benchmark, model, content_hash):
+    context, report = benchmark(build_context, model, content_hash)
+    assert report["total"] <= report["budget"]
+
+
+def test_get_context_cached(benchmark, model, content_hash):
+    get_context(model, content_hash)
+    benchmark(get_context, model, content_hash)
@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+
+from dashboard.demographics import aggregate_geography, rank_locations, top_n
+
+CATALOGUE_PROFILES = 50
+
+
+@pytest.fixture(scope="module")
+def catalogue_rows(model):
+    # The same profile repeated under different ids, in the store's row layout
+    countries = model.countries
+    return pd.DataFrame({
+        "profile_id": [f"p{i}" for i in range(CATALOGUE_PROFILES) for _ in countries.names],
+        "name": list(countries.names) * CATALOGUE_PROFILES,
+        "value": list(countries.values) * CATALOGUE_PROFILES,
+        "usersCount": model.info.users_count,
+    })
+
+
+def test_rank_locations(benchmark, model):
+    def rank_both():
+        return rank_locations(model.countries), rank_locations(model.cities)
+
+    benchmark(rank_both)
+
+
+def test_top_n(benchmark, model):
+    ranked = rank_locations(model.countries)
+    benchmark(top_n, ranked)
+
+
+def test_aggregate_geography(benchmark, catalogue_rows):
+    benchmark(aggregate_geography, catalogue_rows)
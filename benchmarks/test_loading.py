@@ -0,0 +1,27 @@
+import os
+
+from dashboard.context import profile_hash
+from dashboard.loader import load_export
+from dashboard.model import ProfileModel
+
+
+def test_load_export_cold(benchmark, export_path):
+    # Without the sidecar offset index, as on the first load of a new file
+    def remove_index():
+        if os.path.exists(f"{export_path}.idx"):
+            os.remove(f"{export_path}.idx")
+
+    benchmark.pedantic(load_export, args=(export_path,), setup=remove_index, rounds=20)
+
+
+def test_load_export_warm(benchmark, export_path):
+    load_export(export_path)
+    benchmark(load_export, export_path)
+
+
+def test_profile_model(benchmark, export):
+    benchmark(ProfileModel.from_export, export)
+
+
+def test_profile_hash(benchmark, export):
+    benchmark(profile_hash, export)
@@ -0,0 +1,20 @@
+import pytest
+
+from dashboard.service import ProfileSnapshot
+from dashboard.snapshots import build_artifacts, load_snapshot, save_snapshot
+
+SOURCE = (1, 1)  # stands in for the export's (size, mtime_ns)
+
+
+@pytest.fixture(scope="session")
+def profile_snapshot(export):
+    return ProfileSnapshot("", export)
+
+
+# What a page pays on first paint when a snapshot was prebuilt, against
+# test_load_export_* + test_profile_hash + test_profile_model without one
+def test_load_snapshot(benchmark, profile_snapshot, tmp_path):
+    artifacts, _ = build_artifacts(profile_snapshot)
+    save_snapshot(str(tmp_path), profile_snapshot, artifacts, SOURCE)
+    payload = benchmark(load_snapshot, str(tmp_path), "", SOURCE)
+    assert payload["content_hash"] == profile_snapshot.content_hash
@@ -0,0 +1,27 @@
+from dashboard.tag_views import PROFILE_TAG_COLOR, _rating_table, rating_table, tag_chips
+from dashboard.trends import normalise_scores
+
+
+def _scores(model):
+    names = list(model.rating_tags.names)
+    return normalise_scores({name: float(value) for name, value in zip(names, model.rating_tags.values)})
+
+
+def test_tag_chips_render(benchmark, model):
+    benchmark(tag_chips.__wrapped__, model.info.tags, PROFILE_TAG_COLOR)
+
+
+def test_tag_chips_cached(benchmark, model):
+    benchmark(tag_chips, model.info.tags, PROFILE_TAG_COLOR)
+
+
+def test_rating_table_build(benchmark, model, content_hash):
+    names = tuple(model.rating_tags.names)
+    score_items = frozenset(_scores(model).items())
+    benchmark(_rating_table.__wrapped__, content_hash, names, score_items)
+
+
+def test_rating_table_cached(benchmark, model, content_hash):
+    names = list(model.rating_tags.names)
+    scores = _scores(model)
+    benchmark(rating_table, content_hash, names, scores)
@@ -0,0 +1 @@
+# Shared, Streamlit-independent helpers for the Instagram Analytics Dashboard pages.
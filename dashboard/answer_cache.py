@@ -0,0 +1,131 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_ENTRIES = 5_000
+# Near-duplicate matching is off unless a threshold is configured; 0.9 is a
+# reasonable value. It is the Jaccard similarity of the questions' word sets.
+DEFAULT_SIMILARITY = None
+
+# Words whose presence flips a question's meaning; questions differing by one
+# of these (or by any number) never share an answer
+NEGATIONS = frozenset({
+    "no", "not", "never", "without", "none", "nor", "cannot", "t",  # "don't" normalises to "don t"
+    "dont", "doesnt", "didnt", "isnt", "arent", "wasnt", "werent", "wont", "cant", "shouldnt", "wouldnt",
+})
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+_DIGIT = re.compile(r"\d")
+
+
+# Function to normalise a question for exact matching: case, punctuation and
+# whitespace differences don't matter
+def normalise_question(question):
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", question.lower())).strip()
+
+
+def _words(text):
+    return frozenset(text.split())
+
+
+# Function to check whether two questions' differing words could change the
+# answer: numbers (amounts, years) and negations
+def _meaningful(difference):
+    return any(word in NEGATIONS or _DIGIT.search(word) for word in difference)
+
+
+# Process-wide cache of chat answers keyed by (profile hash, model,
+# normalised question).
+#
+# Exact matches are a dict lookup. When `similarity` is set, a miss falls back
+# to the most similar cached question for the same profile and model, found
+# through an inverted index of words, and counts as a hit if the Jaccard
+# similarity of the two word sets reaches the threshold and the words they
+# don't share include no number or negation. Entries expire after `ttl`
+# seconds and the least recently used are evicted past `max_entries`.
+class AnswerCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, similarity=DEFAULT_SIMILARITY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._entries = OrderedDict()  # key -> (answer, created_at, words)
+        self._index = {}  # (profile_hash, model) -> {word: set of keys}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "similar_hits": 0, "misses": 0}
+
+    def _remove(self, key):
+        _, _, words = self._entries.pop(key)
+        postings = self._index.get(key[:2], {})
+        for word in words:
+            keys = postings.get(word)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[word]
+        if not postings:
+            self._index.pop(key[:2], None)
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[1] > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _most_similar(self, scope, words, now):
+        overlap = {}
+        for word in words:
+            for key in self._index.get(scope, {}).get(word, ()):
+                overlap[key] = overlap.get(key, 0) + 1
+        best_key, best_score = None, 0.0
+        for key, shared in overlap.items():
+            cached = self._entries[key][2]
+            score = shared / (len(words) + len(cached) - shared)
+            if score > best_score and not _meaningful(words ^ cached):
+                best_key, best_score = key, score
+        if best_key is None or best_score < self.similarity:
+            return None
+        return self._live(best_key, now)
+
+    # Returns (answer, "exact" | "similar") or None
+    def get(self, profile_hash, model, question):
+        normalised = normalise_question(question)
+        now = time.time()
+        with self._lock:
+            entry = self._live((profile_hash, model, normalised), now)
+            if entry is not None:
+                self._counters["hits"] += 1
+                return entry[0], "exact"
+            if self.similarity:
+                entry = self._most_similar((profile_hash, model), _words(normalised), now)
+                if entry is not None:
+                    self._counters["similar_hits"] += 1
+                    return entry[0], "similar"
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, profile_hash, model, question, answer):
+        normalised = normalise_question(question)
+        if not normalised:
+            return
+        key = (profile_hash, model, normalised)
+        words = _words(normalised)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, time.time(), words)
+            postings = self._index.setdefault(key[:2], {})
+            for word in words:
+                postings.setdefault(word, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "size": len(self._entries)}
@@ -0,0 +1,299 @@
+"""Headless batch scoring of a directory of Instagram exports.
+
+Runs the dashboard's analytics without Streamlit: demographics top-N and the
+chat context are computed in a process pool, while Google Trends scores and
+the LLM brand-fit answer are fetched with bounded async concurrency. Results
+are appended to a JSONL file as they complete, so an interrupted run resumes
+where it stopped. Use ``--format parquet`` to convert the results to Parquet
+at the end.
+
+Usage::
+
+    python -m dashboard.batch data/profiles --out results.jsonl --workers 8
+    OPENAI_API_KEY=... python -m dashboard.batch data/profiles --out results.parquet --format parquet --trends
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dashboard.chat import DEFAULT_MODEL, DEFAULT_TIMEOUT, build_messages, complete_async
+from dashboard.context import DEFAULT_CONTEXT_TOKENS, build_context, profile_hash
+from dashboard.loader import DataLoadError, load_export
+from dashboard.model import ProfileModel
+
+DEFAULT_QUESTION = "Is this influencer a good fit to sell my product? Explain briefly who their audience is and which brands fit."
+TOP_N = 5
+EXPORT_SUFFIX = ".txt"
+PROGRESS_EVERY = 100
+# A row with any of these failed, at least in part, and is retried on resume
+FAILURE_KEYS = ("error", "trend_error", "answer_error")
+
+
+def _profile_id(path):
+    return os.path.basename(path)[: -len(EXPORT_SUFFIX)]
+
+
+def list_exports(directory):
+    with os.scandir(directory) as entries:
+        return sorted(e.path for e in entries if e.is_file() and e.name.endswith(EXPORT_SUFFIX))
+
+
+def _top(ranked, n=TOP_N):
+    top = ranked.nlargest(n, "value")
+    return [{"name": name, "share_pct": round(float(share), 2)} for name, share in zip(top["name"], top["share_pct"])]
+
+
+# Function to analyse one export without any network access. Runs in a
+# worker process; returns a JSON-serialisable row, plus the chat context
+# under "_context" and the posts retrieved for each of `questions` under
+# "_posts_context", which aren't written out.
+def analyse_export(path, context_tokens=DEFAULT_CONTEXT_TOKENS, questions=()):
+    from dashboard.demographics import profile_demographics
+    from dashboard.retrieval import retrieve_posts_context
+
+    export = load_export(path)
+    content_hash = profile_hash(export)
+    model = ProfileModel.from_export(export)
+    demographics = profile_demographics(model, content_hash)
+    context, report = build_context(model, content_hash, context_tokens)
+    info = model.info
+    return {
+        "profile_id": _profile_id(path),
+        "content_hash": content_hash,
+        "name": info.name,
+        "screen_name": info.screen_name,
+        "followers": info.users_count,
+        "avg_er": info.avg_er,
+        "posts": len(model.posts),
+        "top_countries": _top(demographics["countries"]),
+        "top_cities": _top(demographics["cities"]),
+        "rating_tags": list(model.rating_tags.names),
+        "context_tokens": report["total"],
+        "_context": context,
+        # Indexes built here are only kept in the worker's memory
+        "_posts_context": [
+            retrieve_posts_context(content_hash, model.posts, question, index_dir=None) for question in questions
+        ],
+    }
+
+
+def row_failed(row):
+    return any(key in row for key in FAILURE_KEYS)
+
+
+# Function to read the ids (the `key` field) of rows a previous run wrote
+# successfully, skipping a partially written last line. Failed rows aren't
+# counted, so a resumed run retries them.
+def completed_ids(path, key):
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                if not row_failed(row):
+                    done.add(row[key])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def completed_profiles(path):
+    return completed_ids(path, "profile_id")
+
+
+# Process pool running analyse_export(), shared by this module and qa_batch.
+# At most twice as many exports as there are workers are in flight, so
+# memory stays flat however large the directory is.
+class ExportPool:
+    def __init__(self, workers, context_tokens=DEFAULT_CONTEXT_TOKENS, questions=()):
+        self.context_tokens = context_tokens
+        self.questions = tuple(questions)
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._slots = asyncio.Semaphore(workers * 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pool.shutdown()
+
+    async def analyse(self, path):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, analyse_export, path, self.context_tokens, self.questions)
+
+
+# Function to return the Arrow schema of the Parquet output. It is fixed up
+# front, so error rows (which only have profile_id and error) and rows
+# without Trends scores or an answer all convert to the same columns.
+def result_schema():
+    import pyarrow as pa
+
+    ranked = pa.list_(pa.struct([("name", pa.string()), ("share_pct", pa.float64())]))
+    return pa.schema([
+        ("profile_id", pa.string()),
+        ("content_hash", pa.string()),
+        ("name", pa.string()),
+        ("screen_name", pa.string()),
+        ("followers", pa.int64()),
+        ("avg_er", pa.float64()),
+        ("posts", pa.int64()),
+        ("top_countries", ranked),
+        ("top_cities", ranked),
+        ("rating_tags", pa.list_(pa.string())),
+        ("context_tokens", pa.int64()),
+        ("trend_scores", pa.list_(pa.struct([("tag", pa.string()), ("score", pa.float64())]))),
+        ("answer", pa.string()),
+        ("usage", pa.struct([
+            ("prompt_tokens", pa.int64()),
+            ("completion_tokens", pa.int64()),
+            ("total_tokens", pa.int64()),
+        ])),
+        ("answer_latency_s", pa.float64()),
+        ("error", pa.string()),
+        ("trend_error", pa.string()),
+        ("answer_error", pa.string()),
+    ])
+
+
+# Function to shape a JSONL row for result_schema(): Trends scores become
+# (tag, score) pairs, with null for tags Trends had no data for ("N/A")
+def _parquet_row(row):
+    scores = row.get("trend_scores")
+    if scores is not None:
+        row = dict(row, trend_scores=[
+            {"tag": tag, "score": score if isinstance(score, (int, float)) else None}
+            for tag, score in scores.items()
+        ])
+    return row
+
+
+def _make_llm_client(timeout):
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(timeout=timeout)
+
+
+class BatchRunner:
+    def __init__(self, args):
+        self.args = args
+        self.staging_path = args.out if args.format == "jsonl" else f"{args.out}.partial.jsonl"
+        self.written = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def _write(self, out, row):
+        row.pop("_context", None)
+        row.pop("_posts_context", None)
+        out.write(json.dumps(row, default=float) + "\n")
+        out.flush()
+        self.written += 1
+        if row_failed(row):
+            self.failed += 1
+        if self.written % PROGRESS_EVERY == 0:
+            elapsed = time.perf_counter() - self.started
+            print(f"{self.written} profiles, {self.written / elapsed:.1f} profiles/s", file=sys.stderr)
+
+    async def _score_online(self, row, engine, client):
+        from dashboard.trends import get_interest_data
+
+        if engine is not None and row["rating_tags"]:
+            errors = []
+            row["trend_scores"] = await asyncio.to_thread(
+                get_interest_data, engine, row["rating_tags"], None, errors.append
+            )
+            if errors:
+                row["trend_error"] = str(errors[0])
+        if client is not None:
+            messages = build_messages(row["_context"], self.args.question, extra_context=row["_posts_context"][0])
+            started = time.perf_counter()
+            try:
+                row["answer"], row["usage"] = await complete_async(
+                    client, messages, model=self.args.model, timeout=self.args.timeout
+                )
+            except Exception as e:
+                row["answer_error"] = str(e)
+            row["answer_latency_s"] = round(time.perf_counter() - started, 3)
+
+    async def run(self):
+        args = self.args
+        paths = list_exports(args.directory)
+        done = completed_profiles(self.staging_path)
+        todo = [path for path in paths if _profile_id(path) not in done]
+        print(f"{len(paths)} exports, {len(done)} already done, {len(todo)} to score", file=sys.stderr)
+
+        from dashboard.trends import make_trends_engine
+
+        engine = make_trends_engine() if args.trends else None
+        client = _make_llm_client(args.timeout) if args.llm else None
+        network_slots = asyncio.Semaphore(args.concurrency)
+
+        with ExportPool(args.workers, args.context_tokens, [args.question]) as pool, open(self.staging_path, "a") as out:
+            async def handle(path):
+                # Any failure is recorded against this profile alone, so one
+                # bad export or crashed worker doesn't abort the whole run
+                try:
+                    row = await pool.analyse(path)
+                    if engine is not None or client is not None:
+                        async with network_slots:
+                            await self._score_online(row, engine, client)
+                except (OSError, DataLoadError) as e:
+                    row = {"profile_id": _profile_id(path), "error": str(e)}
+                except Exception as e:
+                    row = {"profile_id": _profile_id(path), "error": f"{type(e).__name__}: {e}"}
+                self._write(out, row)
+
+            await asyncio.gather(*(handle(path) for path in todo))
+
+        if args.format == "parquet":
+            self._to_parquet()
+
+        elapsed = time.perf_counter() - self.started
+        print(f"Scored {self.written} profiles ({self.failed} failed) in {elapsed:.1f}s: "
+              f"{self.written / elapsed if elapsed else 0:.1f} profiles/s", file=sys.stderr)
+
+    def _to_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = {}
+        with open(self.staging_path, "r") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                # Only failed rows are retried on resume, so a later line
+                # for a profile always supersedes a failed attempt
+                rows[row["profile_id"]] = row
+        table = pa.Table.from_pylist([_parquet_row(row) for row in rows.values()], schema=result_schema())
+        pq.write_table(table, self.args.out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="directory of exported .txt files")
+    parser.add_argument("--out", required=True, help="output file")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="parsing processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="profiles with network calls in flight")
+    parser.add_argument("--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKENS)
+    parser.add_argument("--trends", action="store_true", help="score rating tags on Google Trends")
+    parser.add_argument("--no-llm", dest="llm", action="store_false", help="skip the brand-fit answer")
+    parser.add_argument("--question", default=DEFAULT_QUESTION)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    args = parser.parse_args(argv)
+    if args.llm and not os.environ.get("OPENAI_API_KEY"):
+        parser.error("set OPENAI_API_KEY (and optionally OPENAI_BASE_URL) or pass --no-llm")
+    asyncio.run(BatchRunner(args).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from dashboard.engagement import WEEKDAYS
+
+# Axis title and colour scheme of each location chart
+LOCATION_CHARTS = {"countries": ("Country", "viridis"), "cities": ("City", "turbo")}
+
+# Bar colour of each distribution chart on the Engagement page
+DISTRIBUTION_COLORS = {"likes": "#0984e3", "comments": "#00b894"}
+
+
+# Altair is imported on first use: pages drawing prebuilt chart specs never
+# need it
+
+# Function to build a ranked bar chart of audience per country or city
+def location_chart(df, title, scheme):
+    import altair as alt
+
+    return alt.Chart(df).mark_bar().encode(
+        x=alt.X('value:Q', title='Followers'),
+        y=alt.Y('name:N', sort='-x', title=title),
+        color=alt.Color('value:Q', scale=alt.Scale(scheme=scheme), legend=None),
+        tooltip=['name', 'formatted_value', alt.Tooltip('share_pct:Q', title='Share (%)', format='.1f')]
+    ).properties(height=400)
+
+
+# Function to build the per-post ER scatter with its rolling mean
+def rolling_er_chart(rolling):
+    import altair as alt
+
+    base = alt.Chart(rolling).encode(x=alt.X("date:T", title="Date"))
+    points = base.mark_circle(opacity=0.4).encode(
+        y=alt.Y("er:Q", title="Engagement rate", axis=alt.Axis(format="%")),
+        tooltip=[alt.Tooltip("date:T"), alt.Tooltip("er:Q", format=".2%")]
+    )
+    line = base.mark_line(color="#6c5ce7").encode(y="rolling_er:Q")
+    return (points + line).properties(height=350)
+
+
+# Function to build a histogram of one post metric ("likes" or "comments")
+def distribution_chart(posts, field):
+    import altair as alt
+
+    return alt.Chart(posts[[field]].dropna()).mark_bar(color=DISTRIBUTION_COLORS[field]).encode(
+        x=alt.X(f"{field}:Q", bin=alt.Bin(maxbins=30), title=field.capitalize()),
+        y=alt.Y("count():Q", title="Posts")
+    ).properties(height=250)
+
+
+# Function to build the weekday x hour heatmap of mean ER
+def heatmap_chart(heatmap):
+    import altair as alt
+
+    return alt.Chart(heatmap).mark_rect().encode(
+        x=alt.X("hour:O", title="Hour (UTC)"),
+        y=alt.Y("weekday_name:N", sort=WEEKDAYS, title="Weekday"),
+        color=alt.Color("avg_er:Q", title="Avg. ER", scale=alt.Scale(scheme="viridis")),
+        tooltip=["weekday_name", "hour", "posts", alt.Tooltip("avg_er:Q", format=".2%")]
+    ).properties(height=250)
+
+
+# Function to build the Engagement page's charts from profile_engagement()
+# metrics, keyed by the name the page draws them under. Charts without data
+# are left out.
+def engagement_charts(metrics):
+    charts = {}
+    rolling = metrics["rolling"]
+    if not rolling.empty and rolling["er"].notna().any():
+        charts["rolling_er"] = rolling_er_chart(rolling)
+    for field in DISTRIBUTION_COLORS:
+        charts[field] = distribution_chart(metrics["posts"], field)
+    if not metrics["heatmap"].empty:
+        charts["heatmap"] = heatmap_chart(metrics["heatmap"])
+    return charts
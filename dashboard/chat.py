@@ -0,0 +1,117 @@
+import time
+
+from dashboard.instrumentation import observe, span
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_TIMEOUT = 60.0
+
+# System prompt to guide the model's behavior. Kept as a constant so the
+# prompt prefix is byte-identical across requests.
+SYSTEM_PROMPT = """
+You are an expert marketing and influencer consultant with deep knowledge of social media analytics.
+Provide thoughtful advice and actionable insights based on the Instagram profile data provided.
+Include specific recommendations tied to the profile's audience demographics, content style, and engagement metrics.
+Support your analysis with data from the profile when relevant.
+Be concise but comprehensive in your answers.
+"""
+
+
+# Function to stream a chat completion as text deltas.
+#
+# `metrics` is filled in as the stream progresses with the time to first
+# token ("ttft"), the total latency ("latency"), both in seconds, and whether
+# the generator was closed before the answer finished ("cancelled"). The HTTP
+# response is closed as soon as the generator is exhausted or closed early,
+# e.g. when Streamlit interrupts the script for a rerun.
+def stream_completion(client, messages, metrics, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                      timeout=DEFAULT_TIMEOUT):
+    started = time.perf_counter()
+    metrics.update(model=model, ttft=None, latency=None, cancelled=False)
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        timeout=timeout,
+    )
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta.content
+            if delta:
+                if metrics["ttft"] is None:
+                    metrics["ttft"] = time.perf_counter() - started
+                yield delta
+            if choice.finish_reason is not None:
+                _drain(stream)
+                break
+    except GeneratorExit:
+        metrics["cancelled"] = True
+        raise
+    finally:
+        stream.close()
+        metrics["latency"] = time.perf_counter() - started
+        observe("openai.chat.stream", metrics["latency"], external=True)
+        if metrics["ttft"] is not None:
+            observe("openai.chat.first_token", metrics["ttft"], external=True)
+
+
+# Function to read the rest of a finished stream (the "[DONE]" event and the
+# end of the body). openai closes the response as soon as it sees "[DONE]",
+# before the end of the body is read, which makes httpx drop the connection
+# instead of returning it to the pool for the next question.
+def _drain(stream):
+    try:
+        for _ in stream.response.stream:
+            pass
+    except Exception:
+        pass  # the connection is dropped instead, as before
+
+
+# Function to build the messages for a single question about a profile
+def build_messages(profile_context, question, history=(), extra_context=None):
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "system", "content": profile_context},
+        *history,
+    ]
+    if extra_context:
+        messages.append({"role": "system", "content": extra_context})
+    messages.append({"role": "user", "content": question})
+    return messages
+
+
+# Function to get a whole (non-streamed) answer from an AsyncOpenAI client.
+# Returns (answer, usage) where usage is the response's token usage dict.
+async def complete_async(client, messages, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                         timeout=DEFAULT_TIMEOUT):
+    with span("openai.chat", external=True):
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            timeout=timeout,
+        )
+    usage = response.usage.model_dump() if response.usage is not None else {}
+    return response.choices[0].message.content.strip(), usage
+
+
+# Function to format a turn's latency metrics for display under the answer
+def format_metrics(metrics):
+    parts = []
+    if metrics.get("cached") == "exact":
+        parts.append("⚡ served from cache")
+    elif metrics.get("cached") == "similar":
+        parts.append("⚡ served from cache (similar question)")
+    if metrics.get("retrieval_ms") is not None:
+        parts.append(f"retrieval {metrics['retrieval_ms']:.0f}ms")
+    if metrics.get("ttft") is not None:
+        parts.append(f"first token {metrics['ttft']:.2f}s")
+    if metrics.get("latency") is not None:
+        parts.append(f"total {metrics['latency']:.2f}s")
+    if metrics.get("cancelled"):
+        parts.append("cancelled")
+    return " · ".join(parts)
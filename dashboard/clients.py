@@ -0,0 +1,129 @@
+import hashlib
+import importlib.util
+import os
+import threading
+from collections import OrderedDict
+
+from dashboard.chat import DEFAULT_TIMEOUT
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_MAX_CONNECTIONS = 20
+# Idle connections are kept open this long, in seconds
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+MAX_CLIENTS = 64
+
+
+def key_hash(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+# Function to resolve the endpoint a client talks to; OPENAI_BASE_URL points
+# the app at a local OpenAI-compatible server for testing
+def resolve_base_url(base_url=None):
+    return (base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+
+
+# Process-wide cache of OpenAI clients, one per (API key hash, base URL).
+#
+# Streamlit reruns the page script on every interaction; creating a client
+# per rerun throws away its HTTP connection pool, so every question paid for
+# a fresh TCP+TLS handshake. Clients handed out here keep their pool, with
+# keep-alive, HTTP/2 when the h2 package is installed, and explicit
+# connect/read timeouts. Keys are only held inside the clients themselves;
+# the cache is indexed by a hash. The least recently used client is dropped
+# once more than `max_clients` are cached; it isn't closed, since other
+# sessions may still be streaming through it, and its connections are closed
+# when it is garbage collected.
+class ClientManager:
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_TIMEOUT, max_clients=MAX_CLIENTS):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_clients = max_clients
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._clients = OrderedDict()  # (key hash, base URL) -> (OpenAI, counters)
+        self._lock = threading.Lock()
+
+    def _create(self, api_key, base_url):
+        import httpx
+        import openai
+
+        counters = {"requests": 0}
+
+        def count_request(request):
+            counters["requests"] += 1
+
+        # openai's wrapper keeps its default settings (e.g. redirects) on top
+        # of our pool limits and timeouts
+        http_client = openai.DefaultHttpxClient(
+            http2=self.http2,
+            limits=connection_limits(self.max_connections, self.keepalive_expiry),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            event_hooks={"request": [count_request]},
+        )
+        return openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client), counters
+
+    # Function to get the shared client for an API key and endpoint
+    def get(self, api_key, base_url=None):
+        base_url = resolve_base_url(base_url)
+        key = (key_hash(api_key), base_url)
+        with self._lock:
+            if key in self._clients:
+                self._clients.move_to_end(key)
+                return self._clients[key][0]
+        client, counters = self._create(api_key, base_url)
+        unused = None
+        with self._lock:
+            if key in self._clients:  # another session created it first
+                unused, client = client, self._clients[key][0]
+            else:
+                self._clients[key] = (client, counters)
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        if unused is not None:
+            unused.close()  # never handed out, so nothing else uses it
+        return client
+
+    # Function to report connection pool usage per cached client. Open/idle
+    # connection counts come from httpx internals and are None if unavailable.
+    def stats(self):
+        with self._lock:
+            entries = list(self._clients.items())
+        clients = []
+        for (hashed, base_url), (client, counters) in entries:
+            connections = _pool_connections(client)
+            clients.append({
+                "key": hashed,
+                "base_url": base_url,
+                "requests": counters["requests"],
+                "open": None if connections is None else len(connections),
+                "idle": None if connections is None else sum(1 for c in connections if c.is_idle()),
+            })
+        return {"clients": clients, "http2": self.http2}
+
+    def close(self):
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        for client, _ in entries:
+            client.close()
+
+
+def connection_limits(max_connections, keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY):
+    import httpx
+
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+def _pool_connections(client):
+    try:
+        return list(client._client._transport._pool.connections)
+    except AttributeError:
+        return None
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from dashboard.instrumentation import cache_result, timed
+
+DEFAULT_CONTEXT_TOKENS = 1500
+TOKENIZER_MODEL = "gpt-3.5-turbo"
+
+# Order in which optional rows are added while the budget allows, one of each per round.
+# Posts aren't part of the context: the ones relevant to each question are
+# retrieved separately (dashboard.retrieval), so they aren't sent twice.
+FILL_ORDER = ("countries", "cities", "tags")
+
+CACHE_SIZE = 256
+
+# None until first use, False when tiktoken isn't installed
+_encoding = None
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# Function to count tokens the way the chat model will, or estimate them at
+# ~4 characters per token when tiktoken isn't installed
+def count_tokens(text):
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken  # optional, and slow to import, so only loaded on first use
+        except ImportError:
+            _encoding = False
+        else:
+            _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    if _encoding is False:
+        return (len(text) + 3) // 4
+    return len(_encoding.encode(text))
+
+
+# Function to hash a profile's content; identical exports share cached contexts
+def profile_hash(profile_data):
+    payload = json.dumps(profile_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _format_followers(followers):
+    if followers >= 1_000_000:
+        return f"{followers/1_000_000:.1f}M"
+    elif followers >= 1_000:
+        return f"{followers/1_000:.1f}K"
+    return str(followers)
+
+
+def _share_rows(ranked):
+    # Ranked biggest market first, so the budget keeps the largest ones
+    return [f"{name}: {share:.1f}%" for name, share in zip(ranked["name"], ranked["share_pct"])]
+
+
+def _sections(info, pools, counts):
+    followers = info.users_count
+    avg_likes = info.avg_likes
+    avg_comments = info.avg_comments
+    avg_er = info.avg_er
+
+    # Calculate engagement rate if not available
+    if avg_er == 0 and followers > 0:
+        avg_er = (avg_likes + avg_comments) / followers
+
+    gender = info.gender
+    countries = pools["countries"][:counts["countries"]]
+    cities = pools["cities"][:counts["cities"]]
+    tags = pools["tags"][:counts["tags"]]
+    return {
+        "basic": f"""
+INSTAGRAM PROFILE ANALYSIS:
+
+Basic Information:
+- Name: {info.name}
+- Username: @{info.screen_name}
+- Followers: {_format_followers(followers)} ({followers} total)
+- Description: "{info.description or 'N/A'}"
+- Verified: {"Yes" if info.verified else "No"}
+
+Content Categories:
+- {', '.join(info.categories or ['N/A'])}
+""",
+        "tags": f"""
+Profile Tags:
+- {', '.join(tags) if tags else 'N/A'}
+""",
+        "demographics": f"""
+Audience Demographics:
+- Top Countries: {', '.join(countries) if countries else 'N/A'}
+- Top Cities: {', '.join(cities) if cities else 'N/A'}
+- Gender Split: {"Male-dominated" if gender == 'm' else "Female-dominated" if gender == 'f' else "Mixed"}
+- Age Group: {(info.age or 'N/A').replace('_', '-')}
+""",
+        "engagement": f"""
+Engagement Metrics:
+- Average Likes: {avg_likes:,}
+- Average Comments: {avg_comments:,}
+- Engagement Rate: {avg_er*100:.2f}%
+- Fake Followers Percentage: {info.pct_fake_followers*100:.1f}%
+""",
+    }
+
+
+# Function to build the profile context for the chat model within a token budget.
+#
+# The fixed sections (basic info, engagement, demographics summary) are always
+# included; countries, cities and tags are then added one row at a time
+# in FILL_ORDER for as long as the budget allows. The output depends only on
+# the profile and the budget, so the prompt prefix stays byte-stable across
+# requests and provider-side prompt caching can hit.
+#
+# Returns (context, report) where report holds the token size of each section,
+# the total and how many rows of each kind made it in.
+@timed("build_context")
+def build_context(model, content_hash, max_tokens=DEFAULT_CONTEXT_TOKENS):
+    from dashboard.demographics import profile_demographics  # pulls in pandas
+
+    info = model.info
+    demographics = profile_demographics(model, content_hash)
+    pools = {
+        "countries": _share_rows(demographics["countries"]),
+        "cities": _share_rows(demographics["cities"]),
+        "tags": list(info.tags),
+    }
+    counts = dict.fromkeys(pools, 0)
+    used = count_tokens("".join(_sections(info, pools, counts).values()))
+
+    # Greedily add rows using per-row token costs (+1 for the separator)
+    costs = {name: [count_tokens(row) + 1 for row in rows] for name, rows in pools.items()}
+    added = True
+    while added:
+        added = False
+        for name in FILL_ORDER:
+            n = counts[name]
+            if n < len(pools[name]) and used + costs[name][n] <= max_tokens:
+                counts[name] += 1
+                used += costs[name][n]
+                added = True
+
+    # Per-row estimates can drift from the real count; trim until the whole fits
+    sections = _sections(info, pools, counts)
+    total = count_tokens("".join(sections.values()))
+    while total > max_tokens and any(counts.values()):
+        name = next(name for name in reversed(FILL_ORDER) if counts[name])
+        counts[name] -= 1
+        sections = _sections(info, pools, counts)
+        total = count_tokens("".join(sections.values()))
+
+    report = {
+        "sections": {name: count_tokens(text) for name, text in sections.items()},
+        "total": total,
+        "budget": max_tokens,
+        "counts": counts,
+        "available": {name: len(rows) for name, rows in pools.items()},
+    }
+    return "".join(sections.values()), report
+
+
+# Function to get a profile's context from the process-wide cache, building it
+# on a miss. Contexts are keyed by content hash, so every session (and every
+# copy of the same export) shares one entry.
+def get_context(model, content_hash, max_tokens=DEFAULT_CONTEXT_TOKENS):
+    key = (content_hash, max_tokens)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            cache_result("chat_context", True)
+            return _cache[key]
+    cache_result("chat_context", False)
+    result = build_context(model, content_hash, max_tokens)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dashboard.instrumentation import cache_result, span
+
+DEFAULT_TOP_N = 10
+# Rows kept per kind in the cached aggregates; enough for charts and chat context
+MAX_ROWS = 50
+CACHE_SIZE = 256
+
+# Geography kinds, with their ProfileModel attribute and export key
+KINDS = {"countries": ("countries", "membersCountries"), "cities": ("cities", "membersCities")}
+
+_SUFFIXES = np.array(["B", "M", "K"])
+_DIVISORS = np.array([1_000_000_000, 1_000_000, 1_000])
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# Function to format a numeric series with K, M, B suffixes in one pass;
+# matches dashboard.formatting.format_number() for each element
+def format_numbers(values):
+    values = pd.Series(values)
+    numbers = values.to_numpy(dtype=float)
+    magnitude = np.abs(numbers)
+    bucket = np.select([magnitude >= d for d in _DIVISORS], [0, 1, 2], default=-1)
+    scaled = numbers / np.where(bucket >= 0, _DIVISORS[bucket], 1)
+    with_suffix = np.char.add(np.char.mod("%.1f", scaled), _SUFFIXES[bucket])
+    # Smaller numbers are shown as they are; the model stores counts as
+    # floats, so whole numbers are printed as ints, as in the export
+    whole = np.isfinite(numbers) & (numbers == np.trunc(numbers))
+    plain = np.where(whole, np.where(whole, numbers, 0).astype(np.int64).astype(str), values.astype(str))
+    return pd.Series(np.where(bucket >= 0, with_suffix, plain), index=values.index)
+
+
+# Function to turn a model's countries/cities column into a ranked frame with
+# formatted values, percentage shares and cumulative coverage.
+#
+# Exports store audience geography as fractions of the audience; those are
+# used as shares directly. Absolute counts are converted to shares of the
+# listed total instead.
+def rank_locations(locations, max_rows=MAX_ROWS):
+    df = pd.DataFrame({"name": list(locations.names), "value": locations.values})
+    df["value"] = df["value"].fillna(0)
+    total = df["value"].sum()
+    scale = 100 if total <= 1 else 100 / total
+    df = df.nlargest(max_rows, "value").reset_index(drop=True)
+    df["formatted_value"] = format_numbers(df["value"])
+    df["share_pct"] = df["value"] * scale
+    df["cumulative_pct"] = df["share_pct"].cumsum()
+    return df
+
+
+# Function to get the top-n rows of a ranked frame
+def top_n(df, n=DEFAULT_TOP_N):
+    return df.nlargest(n, "value")
+
+
+# Function to compute (and cache per profile content hash) the ranked
+# countries and cities for one profile model
+def profile_demographics(model, content_hash):
+    with _cache_lock:
+        if content_hash in _cache:
+            _cache.move_to_end(content_hash)
+            cache_result("demographics", True)
+            return _cache[content_hash]
+    cache_result("demographics", False)
+    with span("rank_locations"):
+        result = {kind: rank_locations(getattr(model, attr)) for kind, (attr, _) in KINDS.items()}
+    with _cache_lock:
+        _cache[content_hash] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+# Function to aggregate audience geography over many profiles at once.
+#
+# `rows` is a frame with profile_id, name, value (audience fraction) and
+# usersCount columns. Each location's audience is estimated as
+# fraction x followers and summed across profiles.
+def aggregate_geography(rows, max_rows=MAX_ROWS):
+    audience = rows["value"].astype(float) * rows["usersCount"].fillna(0).astype(float)
+    summed = (
+        rows.assign(audience=audience)
+        .groupby("name", sort=False)
+        .agg(audience=("audience", "sum"), profiles=("profile_id", "nunique"))
+        .reset_index()
+    )
+    total = rows.drop_duplicates("profile_id")["usersCount"].fillna(0).sum()
+    summed = summed.nlargest(max_rows, "audience").reset_index(drop=True)
+    summed["value"] = summed["audience"]
+    summed["formatted_value"] = format_numbers(summed["audience"])
+    summed["share_pct"] = summed["audience"] / (total or 1) * 100
+    summed["cumulative_pct"] = summed["share_pct"].cumsum()
+    return summed
+
+
+# Function to aggregate a geography kind ("countries" or "cities") over every
+# profile in a ProfileStore, reading only the columns it needs. Returns None
+# when the store is empty.
+def aggregate_store(store, kind):
+    from dashboard.store import LIST_TABLES, PROFILES_TABLE
+
+    table, _ = LIST_TABLES[KINDS[kind][1]]
+    locations = store.read_columns(table, ["profile_id", "name", "value"])
+    followers = store.read_columns(PROFILES_TABLE, ["profile_id", "usersCount"])
+    if locations is None or followers is None:
+        return None
+    rows = locations.to_pandas().merge(followers.to_pandas(), on="profile_id", how="left")
+    return aggregate_geography(rows)
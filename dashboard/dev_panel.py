@@ -0,0 +1,66 @@
+import os
+
+import streamlit as st
+
+from dashboard.instrumentation import REGISTRY
+
+
+# Function to check whether the developer panel is on: set DASHBOARD_DEV_PANEL=1,
+# or open any page with ?dev=1
+def dev_panel_enabled():
+    return os.environ.get("DASHBOARD_DEV_PANEL") == "1" or st.query_params.get("dev") == "1"
+
+
+# Function to start timing this rerun; call right after st.set_page_config()
+def begin_rerun():
+    REGISTRY.begin_rerun()
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+# Function to finish timing this rerun and, when enabled, show the developer
+# panel in the sidebar: this rerun's spans, rerun and external-call latency
+# percentiles, cache hit rates, and Prometheus/JSONL exports. Call at the end
+# of the page; reruns cut short by st.stop() aren't recorded.
+def dev_panel(page):
+    total, spans = REGISTRY.end_rerun(page)
+    if not dev_panel_enabled():
+        return
+    snapshot = REGISTRY.snapshot()
+    with st.sidebar.expander("🛠️ Performance", expanded=False):
+        if total is not None:
+            st.caption(f"This rerun: {total * 1000:.1f} ms")
+        if spans:
+            st.dataframe(
+                [{"Span": name, "ms": _ms(seconds), "External": external} for name, seconds, external in spans],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        latencies = [
+            {"Name": name, "Calls": s["count"], "p50 ms": _ms(s["p50"]), "p95 ms": _ms(s["p95"]),
+             "p99 ms": _ms(s["p99"]), "Max ms": _ms(s["max"])}
+            for kind in ("spans", "external")
+            for name, s in sorted(snapshot[kind].items())
+            if kind == "external" or name.startswith("rerun.")
+        ]
+        if latencies:
+            st.markdown("**Reruns and external calls**")
+            st.dataframe(latencies, hide_index=True, use_container_width=True)
+
+        caches = [
+            {"Cache": name, "Hits": s["hits"], "Misses": s["misses"],
+             "Hit rate": None if s["hit_rate"] is None else f"{s['hit_rate']:.0%}"}
+            for name, s in sorted(snapshot["caches"].items())
+        ]
+        if caches:
+            st.markdown("**Caches**")
+            st.dataframe(caches, hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        col1.download_button("Prometheus", REGISTRY.to_prometheus(), file_name="dashboard_metrics.prom",
+                             mime="text/plain", use_container_width=True)
+        col2.download_button("JSONL", REGISTRY.to_jsonl(), file_name="dashboard_metrics.jsonl",
+                             mime="application/x-ndjson", use_container_width=True)
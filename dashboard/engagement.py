@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dashboard.instrumentation import cache_result, span
+
+# Posts per rolling engagement-rate window
+ROLLING_WINDOW = 7
+# Modified z-score (on log engagement) above which a post counts as an outlier
+OUTLIER_Z = 3.5
+CACHE_SIZE = 128
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _posts_frame(posts, followers):
+    df = pd.DataFrame({
+        "date": posts.dates,
+        "likes": posts.likes,
+        "comments": posts.comments,
+        "views": posts.views,
+        "text": posts.texts,
+    })
+    df["engagement"] = df["likes"].fillna(0) + df["comments"].fillna(0)
+    df["er"] = df["engagement"] / followers if followers else np.nan
+    return df
+
+
+def _outliers(df):
+    log_engagement = np.log1p(df["engagement"].to_numpy())
+    median = np.median(log_engagement) if len(log_engagement) else 0.0
+    mad = np.median(np.abs(log_engagement - median)) if len(log_engagement) else 0.0
+    z = 0.6745 * (log_engagement - median) / mad if mad else np.zeros_like(log_engagement)
+    flagged = df.assign(z_score=z)[np.abs(z) > OUTLIER_Z]
+    return flagged.assign(direction=np.where(flagged["z_score"] > 0, "above", "below")).sort_values(
+        "z_score", key=np.abs, ascending=False
+    )
+
+
+def _cadence(dated):
+    gaps = dated["date"].diff().dt.total_seconds().to_numpy()[1:] / 86400
+    span_days = (dated["date"].iloc[-1] - dated["date"].iloc[0]).total_seconds() / 86400 if len(dated) > 1 else 0
+    return {
+        "dated_posts": len(dated),
+        "median_gap_days": float(np.median(gaps)) if len(gaps) else None,
+        "mean_gap_days": float(gaps.mean()) if len(gaps) else None,
+        "longest_gap_days": float(gaps.max()) if len(gaps) else None,
+        "posts_per_week": len(dated) / span_days * 7 if span_days else None,
+    }
+
+
+def _heatmap(dated):
+    grid = dated.assign(weekday=dated["date"].dt.dayofweek, hour=dated["date"].dt.hour)
+    heat = grid.groupby(["weekday", "hour"]).agg(posts=("er", "size"), avg_er=("er", "mean")).reset_index()
+    heat["weekday_name"] = np.array(WEEKDAYS)[heat["weekday"].to_numpy()]
+    return heat
+
+
+def _distribution(series):
+    values = series.dropna()
+    if values.empty:
+        return {}
+    quantiles = values.quantile([0.1, 0.25, 0.5, 0.75, 0.9]).to_numpy()
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std(ddof=0)),
+        "p10": quantiles[0], "p25": quantiles[1], "median": quantiles[2], "p75": quantiles[3], "p90": quantiles[4],
+    }
+
+
+# Function to compute every post-level engagement metric for one profile
+# model in a single pass over its post columns:
+# - "posts": per-post frame with engagement and ER
+# - "rolling": ER rolling mean over ROLLING_WINDOW posts, in date order
+# - "cadence": gaps between posts and posts per week
+# - "distributions": summary stats for likes, comments and ER
+# - "outliers": posts whose log engagement is unusually high or low
+# - "heatmap": post count and mean ER per weekday and hour
+def compute_engagement(model, window=ROLLING_WINDOW):
+    followers = model.info.users_count
+    df = _posts_frame(model.posts, followers)
+    dated = df.dropna(subset=["date"]).sort_values("date", kind="stable")
+    rolling = dated[["date", "er"]].assign(rolling_er=dated["er"].rolling(window, min_periods=1).mean())
+    return {
+        "posts": df,
+        "rolling": rolling,
+        "cadence": _cadence(dated),
+        "distributions": {name: _distribution(df[name]) for name in ("likes", "comments", "er")},
+        "outliers": _outliers(df),
+        "heatmap": _heatmap(dated),
+        "post_er": float(df["er"].mean()) if len(df) and followers else None,
+    }
+
+
+# Function to get a profile's engagement metrics, cached per content hash and window
+def profile_engagement(model, content_hash, window=ROLLING_WINDOW):
+    key = (content_hash, window)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            cache_result("engagement", True)
+            return _cache[key]
+    cache_result("engagement", False)
+    with span("compute_engagement"):
+        result = compute_engagement(model, window)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
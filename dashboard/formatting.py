@@ -0,0 +1,16 @@
+# Function to format numbers with K, M, B suffixes
+def format_number(num):
+    if not isinstance(num, (int, float)):
+        return num
+    
+    abs_num = abs(num)
+    sign = -1 if num < 0 else 1
+    
+    if abs_num >= 1_000_000_000:
+        return f"{sign * abs_num / 1_000_000_000:.1f}B"
+    elif abs_num >= 1_000_000:
+        return f"{sign * abs_num / 1_000_000:.1f}M"
+    elif abs_num >= 1_000:
+        return f"{sign * abs_num / 1_000:.1f}K"
+    else:
+        return str(num)
@@ -0,0 +1,208 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# Fixed-bucket latency histogram, as exported to Prometheus
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    # Function to estimate a quantile as the upper bound of its bucket
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+# Process-wide timings, cache hit rates and external-call latencies.
+#
+# Spans are timed code blocks; external spans are calls to Google Trends or
+# OpenAI and are kept in their own histograms. Spans recorded on a thread
+# between begin_rerun() and end_rerun() are also collected for that rerun, so
+# the developer panel can show where one Streamlit rerun spent its time.
+# Recording is a lock and a few additions, cheap enough to leave on.
+class Registry:
+    def __init__(self):
+        self._spans = {}
+        self._external = {}
+        self._caches = {}  # name -> [hits, misses]
+        self._lru_caches = {}  # name -> functools.lru_cache-wrapped function
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started = time.time()
+
+    def observe(self, name, seconds, external=False):
+        with self._lock:
+            histograms = self._external if external else self._spans
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = Histogram()
+            histogram.observe(seconds)
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is not None:
+            rerun.append((name, seconds, external))
+
+    @contextmanager
+    def span(self, name, external=False):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, external)
+
+    # Decorator form of span(), named after the function by default
+    def timed(self, name=None, external=False):
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, external):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def cache_result(self, name, hit):
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    # Function to report an lru_cache's own hit/miss counters alongside ours
+    def watch_lru(self, name, func):
+        self._lru_caches[name] = func
+
+    def begin_rerun(self):
+        self._local.rerun = []
+        self._local.rerun_started = time.perf_counter()
+
+    # Function to close this thread's rerun; records it as a "rerun.<page>"
+    # span and returns (total seconds, [(span, seconds, external), ...])
+    def end_rerun(self, page):
+        rerun = getattr(self._local, "rerun", None)
+        if rerun is None:
+            return None, []
+        total = time.perf_counter() - self._local.rerun_started
+        self._local.rerun = None
+        self.observe(f"rerun.{page}", total)
+        return total, rerun
+
+    def snapshot(self):
+        with self._lock:
+            spans = {name: h.summary() for name, h in self._spans.items()}
+            external = {name: h.summary() for name, h in self._external.items()}
+            caches = {name: tuple(counts) for name, counts in self._caches.items()}
+        for name, func in self._lru_caches.items():
+            info = func.cache_info()
+            caches[name] = (info.hits, info.misses)
+        return {
+            "spans": spans,
+            "external": external,
+            "caches": {
+                name: {"hits": hits, "misses": misses,
+                       "hit_rate": hits / (hits + misses) if hits + misses else None}
+                for name, (hits, misses) in caches.items()
+            },
+        }
+
+    # Function to export everything in the Prometheus text exposition format
+    def to_prometheus(self):
+        with self._lock:
+            histograms = [
+                ("dashboard_span_seconds", "Time spent in instrumented code blocks.", dict(self._spans)),
+                ("dashboard_external_call_seconds", "Latency of calls to external services.", dict(self._external)),
+            ]
+            lines = []
+            for metric, help_text, entries in histograms:
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for name, h in sorted(entries.items()):
+                    label = _label(name)
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + ("+Inf",), h.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{name="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{name="{label}"}} {h.total}')
+                    lines.append(f'{metric}_count{{name="{label}"}} {h.count}')
+        caches = self.snapshot()["caches"]
+        lines += ["# HELP dashboard_cache_requests_total Cache lookups by result.",
+                  "# TYPE dashboard_cache_requests_total counter"]
+        for name, stats in sorted(caches.items()):
+            for result, key in (("hit", "hits"), ("miss", "misses")):
+                lines.append(f'dashboard_cache_requests_total{{cache="{_label(name)}",result="{result}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    # Function to export a snapshot as JSON lines, one per span/cache
+    def to_jsonl(self):
+        snapshot = self.snapshot()
+        now = time.time()
+        rows = []
+        for kind, key in (("span", "spans"), ("external", "external")):
+            for name, summary in sorted(snapshot[key].items()):
+                rows.append({"ts": now, "type": kind, "name": name, **summary})
+        for name, stats in sorted(snapshot["caches"].items()):
+            rows.append({"ts": now, "type": "cache", "name": name, **stats})
+        return "".join(json.dumps(row) + "\n" for row in rows)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._external.clear()
+            self._caches.clear()
+            self.started = time.time()
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+REGISTRY = Registry()
+
+
+def span(name, external=False):
+    return REGISTRY.span(name, external)
+
+
+def timed(name=None, external=False):
+    return REGISTRY.timed(name, external)
+
+
+def observe(name, seconds, external=False):
+    REGISTRY.observe(name, seconds, external)
+
+
+def cache_result(name, hit):
+    REGISTRY.cache_result(name, hit)
@@ -0,0 +1,124 @@
+import json
+import mmap
+import os
+
+from dashboard.instrumentation import timed
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; fall back to the stdlib parser
+    ijson = None
+
+DEFAULT_DATA_PATH = "data/instagram_data.txt"
+DEFAULT_PROFILES_DIR = "data/profiles"
+DEFAULT_CACHE_DIR = "data/.cache/profiles"
+
+# The export is a text report; the JSON payload follows this marker and runs
+# until the first blank line (or the end of the file).
+MARKER = b"Raw JSON Data:\n"
+TERMINATOR = b"\n\n"
+
+INDEX_SUFFIX = ".idx"
+READ_CHUNK = 64 * 1024
+
+
+class DataLoadError(ValueError):
+    pass
+
+
+# Reads a bounded byte range out of a memory map without copying the whole range
+class _RangeReader:
+    def __init__(self, mm, start, end):
+        self._mm = mm
+        self._pos = start
+        self._end = end
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._end - self._pos
+        stop = min(self._pos + size, self._end)
+        chunk = self._mm[self._pos:stop]
+        self._pos = stop
+        return chunk
+
+
+def _index_path(file_path):
+    return file_path + INDEX_SUFFIX
+
+
+def _read_index(file_path, stat):
+    try:
+        with open(_index_path(file_path), "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("size") != stat.st_size or index.get("mtime_ns") != stat.st_mtime_ns:
+        return None
+    return index["start"], index["end"]
+
+
+def _write_index(file_path, stat, start, end):
+    index = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "start": start, "end": end}
+    tmp_path = f"{_index_path(file_path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, _index_path(file_path))
+    except OSError:
+        # The index is only an optimisation; a read-only data dir is fine.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _find_payload(mm):
+    marker_at = mm.find(MARKER)
+    if marker_at < 0:
+        raise DataLoadError("JSON data not found in file.")
+    start = marker_at + len(MARKER)
+    end = mm.find(TERMINATOR, start)
+    if end < 0:
+        end = len(mm)
+    return start, end
+
+
+# Returns the (start, end) byte offsets of the JSON payload, using the sidecar
+# index when it still matches the file's size and mtime.
+def payload_offsets(file_path):
+    stat = os.stat(file_path)
+    if stat.st_size == 0:
+        raise DataLoadError("JSON data not found in file.")
+    offsets = _read_index(file_path, stat)
+    if offsets is not None:
+        return offsets
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start, end = _find_payload(mm)
+    _write_index(file_path, stat, start, end)
+    return start, end
+
+
+def _parse(mm, start, end):
+    if ijson is not None:
+        # Stream the payload so we never hold a second copy of the raw bytes
+        try:
+            return next(ijson.items(_RangeReader(mm, start, end), "", use_float=True))
+        except (ijson.JSONError, StopIteration) as e:
+            raise DataLoadError(f"Error parsing JSON: {e}") from e
+    try:
+        return json.loads(mm[start:end])
+    except ValueError as e:
+        raise DataLoadError(f"Error parsing JSON: {e}") from e
+
+
+# Function to load the JSON payload out of an Instagram export text file.
+# Raises OSError if the file can't be read and DataLoadError if it has no
+# valid payload.
+@timed("load_export")
+def load_export(file_path=DEFAULT_DATA_PATH):
+    start, end = payload_offsets(file_path)
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if end > len(mm):
+            # The file shrank between indexing and reading; rescan it.
+            start, end = _find_payload(mm)
+        return _parse(mm, start, end)
@@ -0,0 +1,134 @@
+import itertools
+import threading
+
+from dashboard.chat import DEFAULT_MODEL
+from dashboard.context import count_tokens
+from dashboard.instrumentation import span
+
+# Token budget for prior conversation (summary + recent turns) in each request
+DEFAULT_MEMORY_TOKENS = 1200
+# Hard cap on raw turns kept per session, summarised or not
+DEFAULT_MAX_TURNS = 50
+SUMMARY_MAX_TOKENS = 300
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a marketing consultant (the assistant) and a user
+asking about an Instagram influencer. Merge the previous summary with the new exchanges into one concise summary.
+Keep the user's goals, products and constraints, the key facts and recommendations already given, and any open
+questions. Do not exceed 200 words.
+"""
+
+
+# Rolling conversation memory for one chat session.
+#
+# Recent turns are sent verbatim for as long as they fit in `max_tokens`;
+# once the raw turns outgrow half the budget, the oldest ones are folded into
+# a running summary off the request path, so request size stays flat however
+# long the conversation gets. At most `max_turns` raw turns are kept.
+class ConversationMemory:
+    def __init__(self, max_tokens=DEFAULT_MEMORY_TOKENS, max_turns=DEFAULT_MAX_TURNS):
+        self.max_tokens = max_tokens
+        self.max_turns = max_turns
+        self.summary = ""
+        self._summary_tokens = 0
+        self._turns = []  # (turn_id, question, answer, tokens), oldest first
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._summarising = False
+        # Bumped by clear(), so a summary of the old conversation still being
+        # built is dropped when it finishes
+        self._generation = 0
+
+    def add_turn(self, question, answer):
+        tokens = count_tokens(question) + count_tokens(answer)
+        with self._lock:
+            self._turns.append((next(self._ids), question, answer, tokens))
+            del self._turns[:-self.max_turns]
+
+    def is_empty(self):
+        with self._lock:
+            return not self._turns and not self.summary
+
+    # Function to get the prior conversation as chat messages: the summary (if
+    # any) followed by as many recent turns as fit in the budget
+    def messages(self):
+        with self._lock:
+            summary, summary_tokens, turns = self.summary, self._summary_tokens, list(self._turns)
+        budget = self.max_tokens - summary_tokens
+        recent = []
+        for _, question, answer, tokens in reversed(turns):
+            if tokens > budget:
+                break
+            budget -= tokens
+            recent.append(({"role": "user", "content": question}, {"role": "assistant", "content": answer}))
+
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        for user_message, assistant_message in reversed(recent):
+            messages += [user_message, assistant_message]
+        return messages
+
+    def _turns_to_fold(self):
+        keep_tokens = self.max_tokens // 2
+        kept = 0
+        for i in range(len(self._turns) - 1, -1, -1):
+            kept += self._turns[i][3]
+            if kept > keep_tokens:
+                return self._turns[:i + 1]
+        return []
+
+    # Function to fold the oldest turns into the summary on `executor` when the
+    # raw turns have outgrown their share of the budget. `summarise` is called
+    # as summarise(previous_summary, [(question, answer), ...]) -> new summary.
+    def summarise_async(self, summarise, executor):
+        with self._lock:
+            if self._summarising:
+                return None
+            folding = self._turns_to_fold()
+            if not folding:
+                return None
+            self._summarising = True
+            previous = self.summary
+            generation = self._generation
+        return executor.submit(self._summarise, summarise, previous, folding, generation)
+
+    def _summarise(self, summarise, previous, folding, generation):
+        try:
+            summary = summarise(previous, [(question, answer) for _, question, answer, _ in folding])
+        except Exception:
+            summary = None  # keep the raw turns; the next answer retries
+        with self._lock:
+            if summary and generation == self._generation:
+                last_id = folding[-1][0]
+                self.summary = summary
+                self._summary_tokens = count_tokens(summary)
+                self._turns = [turn for turn in self._turns if turn[0] > last_id]
+            self._summarising = False
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.summary = ""
+            self._summary_tokens = 0
+            self._turns = []
+
+
+# Function to create a summarise() callable for ConversationMemory backed by
+# the chat model
+def make_summariser(client, model=DEFAULT_MODEL, timeout=30.0):
+    def summarise(previous_summary, turns):
+        transcript = "\n\n".join(f"User: {question}\nAssistant: {answer}" for question, answer in turns)
+        with span("openai.summary", external=True):
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": f"Previous summary:\n{previous_summary or '(none)'}\n\nNew exchanges:\n{transcript}"},
+                ],
+                temperature=0,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                timeout=timeout,
+            )
+        return response.choices[0].message.content.strip()
+    return summarise
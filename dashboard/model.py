@@ -0,0 +1,155 @@
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _str(value, default=""):
+    return value if isinstance(value, str) else default
+
+
+def _number(value, default=0):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def _names(values):
+    return tuple(_intern(str(v)) for v in values or () if v is not None)
+
+
+def _floats(values):
+    array = np.fromiter((_number(v, np.nan) for v in values), dtype=np.float64, count=len(values))
+    array.setflags(write=False)  # shared between sessions, like the rest of the model
+    return array
+
+
+# Converts a post date (ISO string or unix seconds/milliseconds) to datetime64[s], NaT if unparseable
+def _timestamp(value):
+    try:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return np.datetime64(int(value / 1000 if value > 1e11 else value), "s")
+        if isinstance(value, str) and value:
+            return np.datetime64(value.rstrip("Z")[:19], "s")
+    except (ValueError, OverflowError):
+        pass
+    return np.datetime64("NaT", "s")
+
+
+def _timestamps(values):
+    array = np.array([_timestamp(v) for v in values], dtype="datetime64[s]")
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileInfo:
+    name: str
+    screen_name: str
+    description: str
+    image: str
+    users_count: int
+    avg_likes: float
+    avg_comments: float
+    avg_er: float
+    verified: bool
+    gender: str
+    age: str
+    pct_fake_followers: float
+    categories: tuple
+    tags: tuple
+    suggested_tags: tuple
+
+
+# A named numeric column, e.g. audience share per country or score per rating tag
+@dataclass(frozen=True, slots=True)
+class NamedValues:
+    names: tuple
+    values: np.ndarray
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_items(cls, items):
+        rows = [item for item in items or () if isinstance(item, dict) and item.get("name") is not None]
+        return cls(
+            names=tuple(_intern(str(item["name"])) for item in rows),
+            values=_floats([item.get("value") for item in rows]),
+        )
+
+
+# lastPosts as columns: captions and hashtags as tuples, metrics as arrays
+@dataclass(frozen=True, slots=True)
+class Posts:
+    texts: tuple
+    hashtags: tuple
+    dates: np.ndarray
+    likes: np.ndarray
+    comments: np.ndarray
+    views: np.ndarray
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def from_items(cls, items):
+        rows = [item for item in items or () if isinstance(item, dict)]
+        return cls(
+            texts=tuple(_str(post.get("text")) for post in rows),
+            hashtags=tuple(_names(post.get("hashtags")) if isinstance(post.get("hashtags"), (list, tuple)) else ()
+                           for post in rows),
+            dates=_timestamps([post.get("date") for post in rows]),
+            likes=_floats([post.get("likes") for post in rows]),
+            comments=_floats([post.get("comments") for post in rows]),
+            views=_floats([post.get("views") for post in rows]),
+        )
+
+
+# The parts of an Instagram export the dashboard uses, in compact form.
+# Built in one pass over the parsed export; everything else is dropped.
+@dataclass(frozen=True, slots=True)
+class ProfileModel:
+    info: ProfileInfo
+    countries: NamedValues
+    cities: NamedValues
+    rating_tags: NamedValues
+    posts: Posts
+
+    @classmethod
+    def from_export(cls, export):
+        profile = export.get("data", {}) if isinstance(export, dict) else {}
+        info = ProfileInfo(
+            name=_str(profile.get("name"), "N/A"),
+            screen_name=_str(profile.get("screenName"), "N/A"),
+            description=_str(profile.get("description")),
+            image=_str(profile.get("image")),
+            users_count=int(_number(profile.get("usersCount"))),
+            avg_likes=_number(profile.get("avgLikes")),
+            avg_comments=_number(profile.get("avgComments")),
+            avg_er=_number(profile.get("avgER")),
+            verified=bool(profile.get("verified", False)),
+            gender=_intern(_str(profile.get("gender"))),
+            age=_intern(_str(profile.get("age"))),
+            pct_fake_followers=_number(profile.get("pctFakeFollowers")),
+            categories=_names(profile.get("categories")),
+            tags=_names(profile.get("tags")),
+            suggested_tags=_names(profile.get("suggestedTags")),
+        )
+        return cls(
+            info=info,
+            countries=NamedValues.from_items(profile.get("membersCountries")),
+            cities=NamedValues.from_items(profile.get("membersCities")),
+            rating_tags=NamedValues.from_items(profile.get("ratingTags")),
+            posts=Posts.from_items(profile.get("lastPosts")),
+        )
+
+    # Function to make every array read-only again, e.g. after loading a
+    # prebuilt snapshot, which restores them writeable. Returns the model.
+    def freeze(self):
+        for array in (self.countries.values, self.cities.values, self.rating_tags.values, self.posts.dates,
+                      self.posts.likes, self.posts.comments, self.posts.views):
+            array.setflags(write=False)
+        return self
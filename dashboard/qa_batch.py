@@ -0,0 +1,236 @@
+"""Ask a fixed set of questions about every profile in a directory of exports.
+
+Each profile x question pair is one chat completion. Requests share a single
+connection-pooled AsyncOpenAI client, run with bounded concurrency, and are
+retried with jittered exponential backoff on rate limits, timeouts and server
+errors. Every answer is appended to a JSONL file with its token usage,
+latency and attempt count, so an interrupted run resumes where it stopped.
+
+With ``--batch-file`` nothing is sent; the requests are written in the
+OpenAI Batch API input format instead, ready to submit as a batch job.
+
+Usage::
+
+    python -m dashboard.qa_batch data/profiles --questions questions.txt --out answers.jsonl
+    python -m dashboard.qa_batch data/profiles --questions questions.txt --batch-file requests.jsonl
+
+Against the local stub server::
+
+    python scripts/mock_openai_server.py --port 8001 --fail-rate 0.1
+    OPENAI_API_KEY=test python -m dashboard.qa_batch data/profiles --out answers.jsonl \\
+        --base-url http://127.0.0.1:8001/v1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from dashboard.batch import DEFAULT_QUESTION, ExportPool, completed_ids, list_exports, row_failed
+from dashboard.chat import DEFAULT_MODEL, DEFAULT_TEMPERATURE, DEFAULT_TIMEOUT, build_messages, complete_async
+from dashboard.context import DEFAULT_CONTEXT_TOKENS
+from dashboard.loader import DataLoadError
+
+DEFAULT_QUESTIONS = (
+    DEFAULT_QUESTION,
+    "What should this influencer do to improve retention?",
+    "What type of brands would be a good fit for collaboration with this influencer?",
+)
+DEFAULT_CONCURRENCY = 16
+MAX_RETRIES = 5
+BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+# Function to read questions from a file, one per line; blank lines and
+# lines starting with "#" are skipped
+def load_questions(path):
+    with open(path, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def request_id(profile_id, question_index):
+    return f"{profile_id}:{question_index}"
+
+
+# Function to create the AsyncOpenAI client shared by every request, with a
+# keep-alive pool sized to the concurrency. Retries are done by
+# ask_with_retries() so they can be jittered and counted.
+def make_client(concurrency, timeout, base_url=None):
+    import httpx
+    import openai
+
+    from dashboard.clients import connection_limits
+
+    return openai.AsyncOpenAI(
+        base_url=base_url,
+        max_retries=0,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=connection_limits(concurrency), timeout=httpx.Timeout(timeout)
+        ),
+    )
+
+
+def _is_retryable(error):
+    import openai
+
+    return isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError))
+
+
+# Function to get one answer, retrying transient failures with "full jitter"
+# exponential backoff so concurrent requests don't retry in lockstep.
+# Returns (answer, usage, attempts, latency of the successful attempt).
+async def ask_with_retries(client, messages, model=DEFAULT_MODEL, timeout=DEFAULT_TIMEOUT,
+                           max_retries=MAX_RETRIES, backoff=BACKOFF):
+    for attempt in range(max_retries + 1):
+        started = time.perf_counter()
+        try:
+            answer, usage = await complete_async(client, messages, model=model, timeout=timeout)
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            await asyncio.sleep(random.uniform(0, min(MAX_BACKOFF, backoff * 2 ** attempt)))
+        else:
+            return answer, usage, attempt + 1, time.perf_counter() - started
+
+
+def batch_line(custom_id, messages, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE):
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": model, "messages": messages, "temperature": temperature},
+    }
+
+
+class QuestionBatch:
+    def __init__(self, args, questions):
+        self.args = args
+        self.questions = questions
+        self.latencies = []
+        self.tokens = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        self.answered = 0
+        self.failed = 0
+        self.retried = 0
+
+    def _record(self, out, row):
+        out.write(json.dumps(row) + "\n")
+        out.flush()
+        if row_failed(row):
+            self.failed += 1
+            return
+        self.answered += 1
+        self.retried += row["attempts"] > 1
+        self.latencies.append(row["latency_s"])
+        for key in self.tokens:
+            self.tokens[key] += row["usage"].get(key) or 0
+
+    async def _ask(self, client, slots, out, profile, index, done):
+        custom_id = request_id(profile["profile_id"], index)
+        if custom_id in done:
+            return
+        question = self.questions[index]
+        messages = build_messages(profile["_context"], question, extra_context=profile["_posts_context"][index])
+        row = {"id": custom_id, "profile_id": profile["profile_id"], "question_index": index, "question": question}
+        async with slots:
+            try:
+                answer, usage, attempts, latency = await ask_with_retries(
+                    client, messages, model=self.args.model, timeout=self.args.timeout,
+                    max_retries=self.args.max_retries,
+                )
+            except Exception as e:
+                row["error"] = str(e)
+            else:
+                row.update(answer=answer, usage=usage, attempts=attempts, latency_s=round(latency, 3))
+        self._record(out, row)
+
+    async def run(self):
+        args = self.args
+        paths = list_exports(args.directory)
+        offline = args.batch_file is not None
+        output_path = args.batch_file if offline else args.out
+        # Only answered requests count as done, so a resumed run retries failures
+        done = set() if offline else completed_ids(output_path, "id")
+        client = None if offline else make_client(args.concurrency, args.timeout, args.base_url)
+        request_slots = asyncio.Semaphore(args.concurrency)
+        started = time.perf_counter()
+
+        with ExportPool(args.workers, args.context_tokens, self.questions) as pool, open(output_path, "w" if offline else "a") as out:
+            async def handle(path):
+                # Nothing is written for a profile that can't be analysed, so
+                # its requests are retried on resume
+                try:
+                    profile = await pool.analyse(path)
+                except (OSError, DataLoadError) as e:
+                    print(f"Skipping {path}: {e}", file=sys.stderr)
+                    return
+                except Exception as e:
+                    print(f"Skipping {path}: {type(e).__name__}: {e}", file=sys.stderr)
+                    return
+                if offline:
+                    for index, question in enumerate(self.questions):
+                        messages = build_messages(
+                            profile["_context"], question, extra_context=profile["_posts_context"][index]
+                        )
+                        line = batch_line(request_id(profile["profile_id"], index), messages, model=args.model)
+                        out.write(json.dumps(line) + "\n")
+                    return
+                # A profile's questions share the same prompt prefix, so they
+                # are sent together while the provider's prefix cache is warm
+                await asyncio.gather(*(
+                    self._ask(client, request_slots, out, profile, index, done)
+                    for index in range(len(self.questions))
+                ))
+
+            try:
+                await asyncio.gather(*(handle(path) for path in paths))
+            finally:
+                if client is not None:
+                    await client.close()
+
+        elapsed = time.perf_counter() - started
+        if offline:
+            print(f"Wrote {len(paths) * len(self.questions)} requests to {output_path}", file=sys.stderr)
+        else:
+            self._report(elapsed)
+
+    def _report(self, elapsed):
+        requests = self.answered + self.failed
+        print(f"{requests} requests ({self.failed} failed, {self.retried} retried) in {elapsed:.1f}s: "
+              f"{requests / elapsed if elapsed else 0:.1f} requests/s", file=sys.stderr)
+        print("Tokens: " + ", ".join(f"{value:,} {key.split('_')[0]}" for key, value in self.tokens.items()),
+              file=sys.stderr)
+        if len(self.latencies) >= 2:
+            cuts = statistics.quantiles(self.latencies, n=100, method="inclusive")
+            print(f"Latency: p50 {cuts[49]:.2f}s, p95 {cuts[94]:.2f}s, max {max(self.latencies):.2f}s",
+                  file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="directory of exported .txt files")
+    parser.add_argument("--questions", help="file with one question per line (default: built-in set)")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="answers JSONL, appended to and resumed from")
+    output.add_argument("--batch-file", help="write Batch API requests here instead of calling the API")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="parsing processes")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKENS)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"),
+                        help="OpenAI-compatible endpoint, e.g. the local stub server")
+    args = parser.parse_args(argv)
+    if args.out and not os.environ.get("OPENAI_API_KEY"):
+        parser.error("set OPENAI_API_KEY to call the API, or use --batch-file")
+    questions = load_questions(args.questions) if args.questions else list(DEFAULT_QUESTIONS)
+    asyncio.run(QuestionBatch(args, questions).run())
+
+
+if __name__ == "__main__":
+    main()
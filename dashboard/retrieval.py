@@ -0,0 +1,222 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from dashboard.instrumentation import timed
+
+DEFAULT_INDEX_DIR = "data/.cache/post_index"
+DEFAULT_TOP_K = 5
+INDEX_VERSION = 1
+
+# Standard BM25 parameters
+K1 = 1.2
+B = 0.75
+
+MAX_SNIPPET_CHARS = 400
+MEMORY_CACHE_SIZE = 64
+# Persisted indexes kept in index_dir; the oldest are removed beyond this
+MAX_INDEX_FILES = 256
+
+_TOKEN = re.compile(r"#?\w+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i in is it its me my of on or our she so that the their
+them they this to was we were what which who will with you your how do does did should would can could about
+""".split())
+
+
+# Function to split text into index terms. Hashtags index both as "#tag" and
+# "tag" so "#fitness" matches a question about fitness.
+def tokenize(text):
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token.startswith("#"):
+            terms.append(token)
+            token = token[1:]
+        if token and token not in STOPWORDS:
+            terms.append(token)
+    return terms
+
+
+def _post_text(text, hashtags):
+    if hashtags:
+        text += " " + " ".join(f"#{tag.lstrip('#')}" for tag in hashtags)
+    return text
+
+
+def _value(array, i):
+    value = array[i]
+    return None if math.isnan(value) else value
+
+
+# BM25 index over one profile's posts: caption text plus hashtags. Engagement
+# (likes + comments) breaks ties, so questions with no matching terms fall
+# back to the best-performing posts.
+class PostIndex:
+    def __init__(self, postings, doc_lengths, engagement, build_ms=0.0):
+        self.postings = postings  # term -> [[doc_id, term_frequency], ...]
+        self.doc_lengths = doc_lengths
+        self.engagement = engagement
+        self.avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+        self.build_ms = build_ms
+        self.last_query_ms = 0.0
+
+    # Builds the index from a ProfileModel's Posts columns
+    @classmethod
+    def build(cls, posts):
+        started = time.perf_counter()
+        postings = {}
+        doc_lengths = []
+        for doc_id, (text, hashtags) in enumerate(zip(posts.texts, posts.hashtags)):
+            terms = tokenize(_post_text(text, hashtags))
+            doc_lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append([doc_id, tf])
+        engagement = (np.nan_to_num(posts.likes) + np.nan_to_num(posts.comments)).tolist()
+        return cls(postings, doc_lengths, engagement, (time.perf_counter() - started) * 1000)
+
+    def to_dict(self):
+        return {
+            "version": INDEX_VERSION,
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "engagement": self.engagement,
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(payload["postings"], payload["doc_lengths"], payload["engagement"])
+
+    # Returns up to k (doc_id, score) pairs, best first
+    def search(self, query, k=DEFAULT_TOP_K):
+        started = time.perf_counter()
+        n_docs = len(self.doc_lengths)
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs:
+                norm = K1 * (1 - B + B * self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        ranked = sorted(range(n_docs), key=lambda d: (-scores.get(d, 0.0), -self.engagement[d], d))[:k]
+        self.last_query_ms = (time.perf_counter() - started) * 1000
+        return [(doc_id, scores.get(doc_id, 0.0)) for doc_id in ranked]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _index_path(index_dir, content_hash):
+    return os.path.join(index_dir, f"{content_hash}.json")
+
+
+# Function to remove all but the `keep` most recently written indexes, so the
+# directory doesn't grow with every export ever opened
+def _prune_indexes(index_dir, keep=MAX_INDEX_FILES):
+    with os.scandir(index_dir) as entries:
+        files = [entry for entry in entries if entry.name.endswith(".json")]
+    if len(files) <= keep:
+        return
+    files.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    for entry in files[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+# Function to get a profile's post index: from memory, then from disk, and
+# built (and persisted) only when neither has it. With index_dir=None the
+# index is only kept in memory.
+def get_post_index(content_hash, posts, index_dir=DEFAULT_INDEX_DIR):
+    with _indexes_lock:
+        if content_hash in _indexes:
+            _indexes.move_to_end(content_hash)
+            return _indexes[content_hash]
+
+    index = None
+    path = None if index_dir is None else _index_path(index_dir, content_hash)
+    if path is not None:
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+            if payload.get("version") == INDEX_VERSION and len(payload["doc_lengths"]) == len(posts):
+                index = PostIndex.from_dict(payload)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    if index is None:
+        index = PostIndex.build(posts)
+        if path is not None:
+            try:
+                os.makedirs(index_dir, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(index.to_dict(), f, separators=(",", ":"))
+                os.replace(tmp_path, path)
+                _prune_indexes(index_dir)
+            except OSError:
+                pass  # persistence is best effort
+
+    with _indexes_lock:
+        _indexes[content_hash] = index
+        while len(_indexes) > MEMORY_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _format_post(posts, i):
+    text = " ".join(posts.texts[i].split())
+    if len(text) > MAX_SNIPPET_CHARS:
+        text = text[:MAX_SNIPPET_CHARS].rstrip() + "..."
+    details = []
+    if not np.isnat(posts.dates[i]):
+        details.append(str(posts.dates[i].astype("datetime64[D]")))
+    for label in ("likes", "comments", "views"):
+        value = _value(getattr(posts, label), i)
+        if value is not None:
+            details.append(f"{value:,.0f} {label}")
+    suffix = f" ({', '.join(details)})" if details else ""
+    return f"- \"{text}\"{suffix}"
+
+
+# Function to build the per-question system message with the top-k most
+# relevant posts, or None when the profile has no posts
+@timed("retrieve_posts_context")
+def retrieve_posts_context(content_hash, posts, question, k=DEFAULT_TOP_K, index_dir=DEFAULT_INDEX_DIR):
+    if not len(posts):
+        return None
+    index = get_post_index(content_hash, posts, index_dir)
+    hits = index.search(question, k)
+    lines = "\n".join(_format_post(posts, doc_id) for doc_id, _ in hits)
+    return f"Posts from this profile most relevant to the question:\n{lines}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dashboard.loader import DEFAULT_DATA_PATH, load_export
+    from dashboard.model import ProfileModel
+
+    parser = argparse.ArgumentParser(description="Time building and querying the post index for an export.")
+    parser.add_argument("question")
+    parser.add_argument("--path", default=DEFAULT_DATA_PATH)
+    parser.add_argument("-k", type=int, default=DEFAULT_TOP_K)
+    args = parser.parse_args()
+
+    export_posts = ProfileModel.from_export(load_export(args.path)).posts
+    post_index = PostIndex.build(export_posts)
+    results = post_index.search(args.question, args.k)
+    print(f"{len(export_posts)} posts, {len(post_index.postings)} terms")
+    print(f"build {post_index.build_ms:.2f}ms, query {post_index.last_query_ms:.3f}ms")
+    for doc_id, score in results:
+        print(f"{score:6.2f} {_format_post(export_posts, doc_id)}")
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "data/.cache/trends.sqlite"
+# Seconds a score is fresh for, then served stale for up to DEFAULT_STALE_TTL more
+DEFAULT_TTL = 3600
+DEFAULT_STALE_TTL = 7 * 24 * 3600
+# Hits are written back (for LRU eviction) in batches of this many
+TOUCH_BATCH = 64
+# The size limit is enforced once every this many inserts
+EVICT_EVERY = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    keyword TEXT NOT NULL,
+    anchor TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    score REAL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (keyword, anchor, timeframe, geo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_accessed_at ON scores (accessed_at);
+"""
+
+
+# Disk-backed Trends score cache shared by every process that points at the
+# same SQLite file. Entries older than `ttl` are still served as stale for up
+# to `stale_ttl` more seconds so callers can refresh them in the background;
+# the least recently used rows are evicted once there are more than
+# `max_entries`. To keep reads and writes cheap, hits only update a row's
+# access time in batches of TOUCH_BATCH, and the size limit is checked every
+# EVICT_EVERY inserts, so the table can briefly run over it.
+#
+# get() returns (score, fetched_at, is_stale) or None, like MemoryScoreCache.
+class SQLiteScoreCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL, max_entries=50_000):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+        self._touched = {}  # key -> access time not yet written
+        self._inserts = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    # SQLite connections can't be shared across threads, so keep one per thread
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT score, fetched_at FROM scores WHERE keyword=? AND anchor=? AND timeframe=? AND geo=?",
+            key,
+        ).fetchone()
+        now = time.time()
+        if row is None or now - row[1] > self.ttl + self.stale_ttl:
+            self._count("misses")
+            return None
+        stale = now - row[1] > self.ttl
+        with self._lock:
+            self._counters["stale" if stale else "hits"] += 1
+            self._touched[tuple(key)] = now
+            flush = len(self._touched) >= TOUCH_BATCH
+        if flush:
+            self._write_touched(conn)
+        return row[0], row[1], stale
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO scores (keyword, anchor, timeframe, geo, score, fetched_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, value, now, now),
+        )
+        with self._lock:
+            self._inserts += 1
+            due = self._inserts % EVICT_EVERY == 0
+        if due:
+            self._evict(conn)
+
+    def _write_touched(self, conn):
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                "UPDATE scores SET accessed_at=? WHERE keyword=? AND anchor=? AND timeframe=? AND geo=?",
+                [(accessed_at, *key) for key, accessed_at in touched.items()],
+            )
+
+    def _evict(self, conn):
+        self._write_touched(conn)  # so recent hits aren't evicted
+        (size,) = conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        excess = size - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM scores WHERE (keyword, anchor, timeframe, geo) IN "
+                "(SELECT keyword, anchor, timeframe, geo FROM scores ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self._count("evictions", excess)
+
+    def stats(self):
+        (size,) = self._connect().execute("SELECT COUNT(*) FROM scores").fetchone()
+        with self._lock:
+            return {**self._counters, "size": size}
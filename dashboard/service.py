@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dashboard.context import profile_hash
+from dashboard.instrumentation import span
+from dashboard.loader import DEFAULT_CACHE_DIR, DEFAULT_DATA_PATH, DEFAULT_PROFILES_DIR, DataLoadError, load_export
+from dashboard.model import ProfileModel
+from dashboard.snapshots import DEFAULT_SNAPSHOT_DIR, load_snapshot, source_path
+
+# How often the source file is stat()ed for changes, in seconds
+CHECK_INTERVAL = 2.0
+# Rescanning a directory of thousands of exports is costlier, so do it less often
+RESCAN_INTERVAL = 60.0
+PROFILE_CACHE_SIZE = 32
+
+# Key under which the single-file export is served
+DEFAULT_PROFILE_ID = ""
+
+
+# An immutable, shared view of one version of a profile. `artifacts` holds
+# the pages' precomputed views when it was loaded from a prebuilt snapshot
+# (see dashboard.snapshots), and is None when pages compute them live.
+class ProfileSnapshot:
+    __slots__ = ("profile_id", "model", "content_hash", "loaded_at", "artifacts")
+
+    # The raw export is only used to hash and build the model, then dropped
+    def __init__(self, profile_id, export):
+        self.profile_id = profile_id
+        with span("profile_snapshot"):
+            self.content_hash = profile_hash(export)
+            self.model = ProfileModel.from_export(export)
+        self.loaded_at = time.time()
+        self.artifacts = None
+
+    # Function to wrap a payload from load_snapshot(), skipping the export entirely
+    @classmethod
+    def prebuilt(cls, profile_id, payload):
+        snapshot = cls.__new__(cls)
+        snapshot.profile_id = profile_id
+        snapshot.content_hash = payload["content_hash"]
+        snapshot.model = payload["model"]
+        snapshot.loaded_at = time.time()
+        snapshot.artifacts = payload["artifacts"]
+        return snapshot
+
+
+# Process-wide, read-only access to profile data.
+#
+# Every session reads the same ProfileSnapshot objects instead of keeping its
+# own parsed copy. The single export at `data_path` is reloaded when its size
+# or mtime changes; the profiles catalogue is re-ingested every
+# RESCAN_INTERVAL seconds, in a background thread after the first time. New
+# snapshots replace old ones with a single reference swap, so a rerun never
+# sees a half-loaded profile.
+#
+# A profile whose source hasn't changed since its snapshot was prebuilt into
+# `snapshot_dir` is served from that snapshot, without parsing the export;
+# pass snapshot_dir=None to always load profiles live.
+class DataService:
+    def __init__(self, data_path=DEFAULT_DATA_PATH, profiles_dir=DEFAULT_PROFILES_DIR, cache_dir=DEFAULT_CACHE_DIR,
+                 snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+        self.data_path = data_path
+        self.profiles_dir = profiles_dir
+        self.cache_dir = cache_dir
+        self.snapshot_dir = snapshot_dir
+        self._store = None
+        self._file_snapshot = None
+        self._file_stat = None
+        self._file_checked = 0.0
+        self._profiles = OrderedDict()
+        self._scanned = 0.0
+        self._tag_index = None
+        self._lock = threading.Lock()
+        # Held for a whole catalogue ingest, which runs outside _lock
+        self._ingest_lock = threading.Lock()
+
+    # The Parquet store (and pyarrow) is only loaded once a catalogue is used
+    @property
+    def store(self):
+        if self._store is None:
+            from dashboard.store import ProfileStore
+
+            self._store = ProfileStore(self.profiles_dir, self.cache_dir)
+        return self._store
+
+    def has_catalogue(self):
+        return os.path.isdir(self.profiles_dir)
+
+    def _rescan(self):
+        now = time.monotonic()
+        if not self.has_catalogue() or now - self._scanned <= RESCAN_INTERVAL:
+            return
+        # Nothing can be listed before the first ingest, so that one is waited
+        # for; later ones run in the background while sessions keep reading
+        # the current data
+        first = self._scanned == 0.0
+        if not self._ingest_lock.acquire(blocking=first):
+            return
+        if time.monotonic() - self._scanned <= RESCAN_INTERVAL:  # ingested while we waited
+            self._ingest_lock.release()
+        elif first:
+            self._ingest()
+        else:
+            threading.Thread(target=self._ingest, name="catalogue-ingest", daemon=True).start()
+
+    # Function to re-ingest the catalogue, and resync the tag index if it is
+    # loaded, then swap the results in. Called with _ingest_lock held, which
+    # it releases; _lock is only taken for the swap.
+    def _ingest(self):
+        try:
+            changed = self.store.ingest()
+            tag_index = self._open_tag_index() if changed and self._tag_index is not None else None
+            with self._lock:
+                if changed:
+                    self._profiles.clear()
+                if tag_index is not None:
+                    self._tag_index = tag_index
+        finally:
+            self._scanned = time.monotonic()
+            self._ingest_lock.release()
+
+    def list_profiles(self):
+        self._rescan()
+        return self.store.list_profiles()
+
+    def _open_tag_index(self):
+        from dashboard.tag_index import INDEX_FILE, TagIndex
+
+        tag_index = TagIndex.open(os.path.join(self.cache_dir, INDEX_FILE))
+        if tag_index.sync(self.store):
+            tag_index.save()
+        return tag_index
+
+    # Function to get the catalogue's tag index. It is loaded from disk once
+    # and replaced by a resynced copy whenever the catalogue is re-ingested,
+    # so readers never see it half updated.
+    def tag_index(self):
+        self._rescan()
+        if self._tag_index is None:
+            # Not during an ingest, so the index is synced with a settled store
+            with self._ingest_lock:
+                if self._tag_index is None:
+                    self._tag_index = self._open_tag_index()
+        return self._tag_index
+
+    # Function to get a profile's prebuilt snapshot, if there is one for the
+    # source as it is now
+    def _prebuilt(self, profile_id, stat):
+        if self.snapshot_dir is None:
+            return None
+        payload = load_snapshot(self.snapshot_dir, profile_id, (stat.st_size, stat.st_mtime_ns))
+        return None if payload is None else ProfileSnapshot.prebuilt(profile_id, payload)
+
+    # Function to get the snapshot of the single-file export, reloading it if
+    # the file changed. Raises OSError or DataLoadError if it can't be loaded.
+    def default_profile(self):
+        now = time.monotonic()
+        snapshot = self._file_snapshot
+        if snapshot is not None and now - self._file_checked < CHECK_INTERVAL:
+            return snapshot
+        stat = os.stat(self.data_path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        if snapshot is not None and key == self._file_stat:
+            self._file_checked = now
+            return snapshot
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._file_snapshot is not None and self._file_stat == key:
+                return self._file_snapshot
+            snapshot = self._prebuilt(DEFAULT_PROFILE_ID, stat)
+            if snapshot is None:
+                snapshot = ProfileSnapshot(DEFAULT_PROFILE_ID, load_export(self.data_path))
+            self._file_snapshot, self._file_stat, self._file_checked = snapshot, key, now
+            return snapshot
+
+    # Function to get a catalogue profile's snapshot, or the single-file
+    # export for DEFAULT_PROFILE_ID
+    def profile(self, profile_id):
+        if profile_id == DEFAULT_PROFILE_ID:
+            return self.default_profile()
+        self._rescan()
+        with self._lock:
+            snapshot = self._profiles.get(profile_id)
+            if snapshot is not None:
+                self._profiles.move_to_end(profile_id)
+                return snapshot
+            try:
+                snapshot = self._prebuilt(profile_id, os.stat(source_path(self.profiles_dir, profile_id)))
+            except OSError:
+                snapshot = None
+            if snapshot is None:
+                data = self.store.load_profile(profile_id)
+                if data is None:
+                    raise DataLoadError(f"Profile '{profile_id}' not found in the cache.")
+                snapshot = ProfileSnapshot(profile_id, data)
+            self._profiles[profile_id] = snapshot
+            while len(self._profiles) > PROFILE_CACHE_SIZE:
+                self._profiles.popitem(last=False)
+            return snapshot
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+# Function to get the process-wide DataService
+def get_data_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = DataService()
+    return _service
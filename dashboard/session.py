@@ -0,0 +1,43 @@
+import streamlit as st
+
+from dashboard.loader import DataLoadError
+from dashboard.service import DEFAULT_PROFILE_ID, get_data_service
+
+# Session keys derived from one version of the profile; dropped when it changes
+DERIVED_KEYS = ("detailed_profile_context", "context_report")
+# Session keys tied to the selected profile; dropped when switching profiles
+CONVERSATION_KEYS = ("chat_history", "chat_metrics", "chat_memory", "transcript_window")
+
+
+# Function to switch this session to another profile
+def select_profile(profile_id):
+    if st.session_state.get("profile_id") != profile_id:
+        st.session_state.profile_id = profile_id
+        for key in DERIVED_KEYS + CONVERSATION_KEYS:
+            st.session_state.pop(key, None)
+
+
+# Function to get the profile a session starts on, the same one Home.py
+# preselects: the first catalogue profile, else the single-file export
+def default_profile_id(service):
+    profiles = service.list_profiles() if service.has_catalogue() else []
+    return profiles[0]["profile_id"] if profiles else DEFAULT_PROFILE_ID
+
+
+# Function to get this session's profile from the shared data service. Only
+# the profile id and content hash live in session state, so per-session
+# memory doesn't grow with the size of the profile.
+def current_profile():
+    service = get_data_service()
+    try:
+        if "profile_id" not in st.session_state:
+            select_profile(default_profile_id(service))
+        snapshot = service.profile(st.session_state.profile_id)
+    except (OSError, DataLoadError) as e:
+        st.error(str(e))
+        st.stop()
+    if st.session_state.get("profile_hash") != snapshot.content_hash:
+        for key in DERIVED_KEYS:
+            st.session_state.pop(key, None)
+        st.session_state.profile_hash = snapshot.content_hash
+    return snapshot
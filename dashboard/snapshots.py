@@ -0,0 +1,312 @@
+import dataclasses
+import json
+import os
+import time
+
+import numpy as np
+
+from dashboard.context import DEFAULT_CONTEXT_TOKENS, get_context
+from dashboard.instrumentation import cache_result, span, timed
+from dashboard.model import NamedValues, Posts, ProfileInfo, ProfileModel
+from dashboard.score_cache import DEFAULT_TTL
+
+DEFAULT_SNAPSHOT_DIR = "data/.cache/snapshots"
+EXPORT_SUFFIX = ".txt"
+
+# Bumped whenever the layout of the artifacts changes; older snapshots are ignored
+FORMAT_VERSION = 3
+SNAPSHOT_SUFFIX = ".snapshot"
+# Written by older versions, which pickled the payload; never loaded
+LEGACY_SUFFIX = ".pkl"
+# Names the snapshot a profile is currently served from
+POINTER_FILE = "CURRENT"
+# Versions kept per profile, so a reader racing a rebuild still finds its file
+KEEP_VERSIONS = 2
+
+
+def _profile_dir(snapshot_dir, profile_id):
+    # The single-file export is served under the empty profile id
+    if not profile_id:
+        return os.path.join(snapshot_dir, "default")
+    return os.path.join(snapshot_dir, "profiles", profile_id)
+
+
+# Function to get the path of a catalogue profile's raw export
+def source_path(profiles_dir, profile_id):
+    return os.path.join(profiles_dir, profile_id + EXPORT_SUFFIX)
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# The model's classes, by name, as written in a snapshot's document
+MODEL_CLASSES = {cls.__name__: cls for cls in (ProfileModel, ProfileInfo, NamedValues, Posts)}
+# Array buffers in a snapshot file start at multiples of this many bytes
+ALIGNMENT = 64
+
+
+# Function to split a payload into a JSON-serialisable document and a dict
+# of numpy arrays. Arrays, DataFrame columns and model dataclasses are
+# replaced in the document by references named after their path.
+def _encode(value, path, arrays):
+    import pandas as pd
+
+    if isinstance(value, np.ndarray):
+        arrays[path] = value
+        return {"__array__": path}
+    if isinstance(value, pd.DataFrame):
+        for i, name in enumerate(value.columns):
+            column = value[name]
+            # String columns become fixed-width unicode arrays, which need no pickling
+            arrays[f"{path}/{i}"] = (
+                np.array(column.tolist(), dtype=str) if pd.api.types.is_string_dtype(column) else column.to_numpy()
+            )
+        return {"__frame__": path, "columns": list(value.columns)}
+    if dataclasses.is_dataclass(value) and type(value).__name__ in MODEL_CLASSES:
+        fields = {f.name: _encode(getattr(value, f.name), f"{path}.{f.name}", arrays)
+                  for f in dataclasses.fields(value)}
+        return {"__model__": type(value).__name__, "fields": fields}
+    if isinstance(value, dict):
+        return {str(key): _encode(item, f"{path}.{key}", arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, f"{path}.{i}", arrays) for i, item in enumerate(value)]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# Function to turn a model field's JSON lists back into tuples; the model's
+# sequences are either flat or all nested one level, e.g. post hashtags
+def _tuples(value):
+    if not isinstance(value, list):
+        return value
+    return tuple(map(_tuples, value)) if value and isinstance(value[0], list) else tuple(value)
+
+
+# Function to resolve one JSON object of an _encode() document, once its
+# members have been decoded; used as json.loads()'s object_hook
+def _decoder(arrays):
+    def decode(obj):
+        if "__array__" in obj:
+            return arrays[obj["__array__"]]
+        if "__frame__" in obj:
+            import pandas as pd
+
+            path, columns = obj["__frame__"], obj["columns"]
+            return pd.DataFrame({name: arrays[f"{path}/{i}"] for i, name in enumerate(columns)}, copy=False)
+        if "__model__" in obj:
+            # The model keeps sequences as tuples, which JSON turns into lists
+            return MODEL_CLASSES[obj["__model__"]](**{name: _tuples(v) for name, v in obj["fields"].items()})
+        return obj
+    return decode
+
+
+# Function to serialise a payload without pickle. The file holds a JSON
+# layout of the arrays (dtype, shape, offset), the JSON document, then each
+# array's raw bytes; the two JSON parts are preceded by their lengths.
+def _dump_payload(payload):
+    arrays = {}
+    document = json.dumps(_encode(payload, "payload", arrays)).encode()
+    layout, chunks, offset = {}, [], 0
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise TypeError(f"{name}: arrays of Python objects can't be stored in a snapshot")
+        data = np.ascontiguousarray(array).tobytes()
+        padding = -len(data) % ALIGNMENT
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        chunks += [data, bytes(padding)]
+        offset += len(data) + padding
+    layout = json.dumps(layout).encode()
+    header = [len(layout).to_bytes(8, "little"), len(document).to_bytes(8, "little"), layout, document]
+    padding = -(16 + len(layout) + len(document)) % ALIGNMENT
+    return b"".join([*header, bytes(padding), *chunks])
+
+
+# Function to read a _dump_payload() file. Arrays are read-only views of the
+# file's bytes; nothing in it can name code to run.
+def _load_payload(data):
+    layout_size, document_size = int.from_bytes(data[:8], "little"), int.from_bytes(data[8:16], "little")
+    start = 16 + layout_size + document_size
+    start += -start % ALIGNMENT
+    arrays = {}
+    for name, (dtype, shape, offset) in json.loads(data[16:16 + layout_size]).items():
+        dtype = np.dtype(dtype)
+        if dtype.hasobject:
+            raise ValueError(f"{name}: arrays of Python objects are not loaded")
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(data, dtype, count, start + offset).reshape(shape)
+    return json.loads(data[16 + layout_size:16 + layout_size + document_size], object_hook=_decoder(arrays))
+
+
+# Function to compute every page's render-ready artifacts for one
+# ProfileSnapshot:
+# - "demographics": ranked countries and cities, as profile_demographics()
+# - "engagement": profile_engagement() metrics at the default rolling window
+# - "charts": Vega-Lite specs of every chart on those two pages
+# - "context": the chat context and its report at `context_tokens`
+# - "trends": 0-100 Trends scores of the rating tags, when a TrendsEngine is
+#   given and every payload succeeded
+# Returns (artifacts, errors) where errors lists the Trends failures.
+@timed("build_artifacts")
+def build_artifacts(snapshot, trends_engine=None, context_tokens=DEFAULT_CONTEXT_TOKENS):
+    from dashboard.charts import LOCATION_CHARTS, engagement_charts, location_chart
+    from dashboard.demographics import DEFAULT_TOP_N, profile_demographics, top_n
+    from dashboard.engagement import ROLLING_WINDOW, profile_engagement
+    from dashboard.trends import get_interest_data
+
+    model, content_hash = snapshot.model, snapshot.content_hash
+    demographics = profile_demographics(model, content_hash)
+    charts = {}
+    for kind, (title, scheme) in LOCATION_CHARTS.items():
+        df = top_n(demographics[kind], DEFAULT_TOP_N)
+        if not df.empty:
+            charts[kind] = location_chart(df, title, scheme).to_dict()
+    artifacts = {"built_at": time.time(), "demographics": demographics, "charts": charts}
+
+    if len(model.posts):
+        metrics = profile_engagement(model, content_hash, ROLLING_WINDOW)
+        artifacts["engagement"] = {"window": ROLLING_WINDOW, "metrics": metrics}
+        charts.update((name, chart.to_dict()) for name, chart in engagement_charts(metrics).items())
+
+    context, report = get_context(model, content_hash, context_tokens)
+    artifacts["context"] = {"budget": context_tokens, "text": context, "report": report}
+
+    errors = []
+    if trends_engine is not None and len(model.rating_tags):
+        scores = get_interest_data(trends_engine, model.rating_tags.names, on_error=errors.append)
+        # Partial scores would be served as the real thing; leave Trends to the page instead
+        if not errors:
+            artifacts["trends"] = {"scores": scores, "fetched_at": time.time()}
+    return artifacts, errors
+
+
+# Function to store a profile's artifacts as its current snapshot. The
+# snapshot file is named by content hash; the pointer next to it records
+# which one is current and the size and mtime of the source it was built
+# from, and is swapped in last so readers never see a half-written snapshot.
+def save_snapshot(snapshot_dir, snapshot, artifacts, source):
+    directory = _profile_dir(snapshot_dir, snapshot.profile_id)
+    os.makedirs(directory, exist_ok=True)
+    payload = {
+        "version": FORMAT_VERSION,
+        "content_hash": snapshot.content_hash,
+        "model": snapshot.model,
+        "artifacts": artifacts,
+    }
+    # No pickles: the cache directory is writable, and loading a pickle runs
+    # whatever code it names
+    _write_atomic(os.path.join(directory, snapshot.content_hash + SNAPSHOT_SUFFIX), _dump_payload(payload))
+    pointer = {"version": FORMAT_VERSION, "content_hash": snapshot.content_hash, "size": source[0], "mtime_ns": source[1]}
+    _write_atomic(os.path.join(directory, POINTER_FILE), json.dumps(pointer).encode())
+
+    # Drop all but the newest versions, and any written in the legacy format
+    with os.scandir(directory) as entries:
+        entries = list(entries)
+    versions = sorted(
+        (entry for entry in entries if entry.name.endswith(SNAPSHOT_SUFFIX)),
+        key=lambda entry: entry.stat().st_mtime_ns,
+        reverse=True,
+    )
+    legacy = [entry for entry in entries if entry.name.endswith(LEGACY_SUFFIX)]
+    for entry in versions[KEEP_VERSIONS:] + legacy:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+# Function to load a profile's current snapshot if it was built from the
+# source as it is now, i.e. with the same (size, mtime_ns). Returns the
+# stored {"content_hash", "model", "artifacts"} dict, or None when there is
+# no usable snapshot and the caller should compute the profile live. The
+# model's arrays come back read-only, as ProfileModel.from_export() makes them.
+# Nothing in the file is unpickled.
+def load_snapshot(snapshot_dir, profile_id, source):
+    directory = _profile_dir(snapshot_dir, profile_id)
+    try:
+        with open(os.path.join(directory, POINTER_FILE), "rb") as f:
+            pointer = json.load(f)
+    except (OSError, ValueError):
+        cache_result("prebuilt_snapshot", False)
+        return None
+    if pointer.get("version") != FORMAT_VERSION or (pointer.get("size"), pointer.get("mtime_ns")) != tuple(source):
+        cache_result("prebuilt_snapshot", False)
+        return None
+    try:
+        path = os.path.join(directory, str(pointer["content_hash"]) + SNAPSHOT_SUFFIX)
+        with span("snapshot.load"), open(path, "rb") as f:
+            payload = _load_payload(f.read())
+    except (OSError, ValueError, KeyError, TypeError):
+        cache_result("prebuilt_snapshot", False)
+        return None
+    # The model is shared between sessions; make sure none of it is writeable
+    payload["model"].freeze()
+    cache_result("prebuilt_snapshot", True)
+    return payload
+
+
+# Function to get a snapshot's prebuilt Trends scores, or None when there
+# are none or they were fetched more than `ttl` seconds ago. Checked on
+# every use, since a loaded snapshot is kept in memory for as long as its
+# source doesn't change.
+def fresh_trends(artifacts, ttl=DEFAULT_TTL):
+    trends = (artifacts or {}).get("trends")
+    if trends is None or time.time() - trends["fetched_at"] > ttl:
+        return None
+    return trends
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dashboard.loader import DataLoadError
+    from dashboard.service import DEFAULT_PROFILE_ID, DataService
+    from dashboard.trends import make_trends_engine
+
+    parser = argparse.ArgumentParser(description="Prebuild every page's artifacts for the served profiles.")
+    parser.add_argument("profile_ids", nargs="*", help="catalogue profiles to build (default: all, plus the single export)")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKENS)
+    parser.add_argument("--no-trends", dest="trends", action="store_false", help="leave Trends scores to the page")
+    parser.add_argument("--force", action="store_true", help="rebuild snapshots that are up to date")
+    args = parser.parse_args()
+
+    # Profiles are computed live here, whatever snapshots already exist
+    service = DataService(snapshot_dir=None)
+    profile_ids = args.profile_ids
+    if not profile_ids:
+        if os.path.exists(service.data_path):
+            profile_ids.append(DEFAULT_PROFILE_ID)
+        if service.has_catalogue():
+            profile_ids += [row["profile_id"] for row in service.list_profiles()]
+    elif service.has_catalogue():
+        service.list_profiles()  # ingest the catalogue first
+    engine = make_trends_engine() if args.trends else None
+
+    built = skipped = failed = 0
+    for profile_id in profile_ids:
+        label = profile_id or service.data_path
+        path = source_path(service.profiles_dir, profile_id) if profile_id else service.data_path
+        try:
+            stat = os.stat(path)
+            source = (stat.st_size, stat.st_mtime_ns)
+            payload = None if args.force else load_snapshot(args.snapshot_dir, profile_id, source)
+            # Rebuilt anyway when its Trends scores are missing or have expired
+            if payload is not None and (not args.trends or fresh_trends(payload["artifacts"]) is not None):
+                skipped += 1
+                continue
+            snapshot = service.profile(profile_id)
+        except (OSError, DataLoadError) as e:
+            print(f"{label}: {e}")
+            failed += 1
+            continue
+        artifacts, errors = build_artifacts(snapshot, engine, args.context_tokens)
+        if errors:
+            print(f"{label}: Trends unavailable ({errors[0]}); the page will fetch scores live")
+        save_snapshot(args.snapshot_dir, snapshot, artifacts, source)
+        built += 1
+    print(f"Built {built} snapshot(s), {skipped} up to date, {failed} failed, in {args.snapshot_dir}")
@@ -0,0 +1,248 @@
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from dashboard.loader import DEFAULT_CACHE_DIR, DEFAULT_PROFILES_DIR, DataLoadError, load_export
+
+EXPORT_SUFFIX = ".txt"
+
+# Scalar profile fields kept in the profiles table, with their Arrow types
+SCALAR_FIELDS = {
+    "name": pa.string(),
+    "screenName": pa.string(),
+    "description": pa.string(),
+    "image": pa.string(),
+    "usersCount": pa.int64(),
+    "avgLikes": pa.float64(),
+    "avgComments": pa.float64(),
+    "avgER": pa.float64(),
+    "verified": pa.bool_(),
+    "gender": pa.string(),
+    "age": pa.string(),
+    "pctFakeFollowers": pa.float64(),
+    "categories": pa.list_(pa.string()),
+    "suggestedTags": pa.list_(pa.string()),
+}
+
+# Per-post fields kept in the last_posts table
+POST_FIELDS = {
+    "id": pa.string(),
+    "url": pa.string(),
+    "text": pa.string(),
+    "date": pa.string(),
+    "likes": pa.float64(),
+    "comments": pa.float64(),
+    "views": pa.float64(),
+    "er": pa.float64(),
+    "hashtags": pa.list_(pa.string()),
+}
+
+# One table per repeated section of the export. Each maps the export key to
+# the table's row schema (besides profile_id).
+LIST_TABLES = {
+    "membersCountries": ("members_countries", {"name": pa.string(), "value": pa.float64()}),
+    "membersCities": ("members_cities", {"name": pa.string(), "value": pa.float64()}),
+    "tags": ("tags", {"name": pa.string()}),
+    "ratingTags": ("rating_tags", {"name": pa.string(), "value": pa.float64()}),
+    "lastPosts": ("last_posts", POST_FIELDS),
+}
+
+PROFILES_TABLE = "profiles"
+PROFILE_FIELDS = {
+    "source_path": pa.string(),
+    "source_size": pa.int64(),
+    "source_mtime_ns": pa.int64(),
+    **SCALAR_FIELDS,
+}
+
+# Exports that failed to parse, keyed like the profiles table, so they are
+# skipped until the file changes instead of being re-parsed on every ingest
+FAILURES_TABLE = "failures"
+FAILURE_FIELDS = {
+    "source_size": pa.int64(),
+    "source_mtime_ns": pa.int64(),
+    "error": pa.string(),
+}
+
+# Keep row groups small so a single-profile read only touches a few of them
+ROW_GROUP_SIZE = 16 * 1024
+
+
+def _schema(fields):
+    return pa.schema([("profile_id", pa.string())] + list(fields.items()))
+
+
+def _coerce(value, arrow_type):
+    if value is None:
+        return None
+    try:
+        if pa.types.is_integer(arrow_type):
+            return int(value)
+        if pa.types.is_floating(arrow_type):
+            return float(value)
+        if pa.types.is_boolean(arrow_type):
+            return bool(value)
+        if pa.types.is_list(arrow_type):
+            return [str(v) for v in value] if isinstance(value, list) else None
+        return str(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _list_rows(profile_id, items, fields):
+    rows = []
+    for item in items or []:
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict):
+            continue
+        row = {"profile_id": profile_id}
+        for key, arrow_type in fields.items():
+            row[key] = _coerce(item.get(key), arrow_type)
+        rows.append(row)
+    return rows
+
+
+# Columnar cache of many Instagram exports. Each export in profiles_dir is
+# parsed once and flattened into a set of Parquet tables sorted by profile_id,
+# so reading one profile only scans the row groups whose statistics contain it.
+class ProfileStore:
+    def __init__(self, profiles_dir=DEFAULT_PROFILES_DIR, cache_dir=DEFAULT_CACHE_DIR):
+        self.profiles_dir = profiles_dir
+        self.cache_dir = cache_dir
+
+    def _table_path(self, table):
+        return os.path.join(self.cache_dir, f"{table}.parquet")
+
+    def _read_table(self, table, fields, filters=None):
+        path = self._table_path(table)
+        if not os.path.exists(path):
+            return _schema(fields).empty_table()
+        return pq.read_table(path, filters=filters)
+
+    def _write_table(self, table, fields, rows_or_table):
+        if isinstance(rows_or_table, pa.Table):
+            data = rows_or_table
+        else:
+            data = pa.Table.from_pylist(rows_or_table, schema=_schema(fields))
+        data = data.sort_by("profile_id")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._table_path(table)}.{os.getpid()}.tmp"
+        pq.write_table(data, tmp_path, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, self._table_path(table))
+
+    def _scan_sources(self):
+        sources = {}
+        if not os.path.isdir(self.profiles_dir):
+            return sources
+        with os.scandir(self.profiles_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(EXPORT_SUFFIX):
+                    stat = entry.stat()
+                    profile_id = entry.name[: -len(EXPORT_SUFFIX)]
+                    sources[profile_id] = (entry.path, stat.st_size, stat.st_mtime_ns)
+        return sources
+
+    # Function to delete cached tables written with an older schema (e.g.
+    # before a column was added), so the next ingest rebuilds them
+    def _drop_outdated_tables(self):
+        outdated = False
+        tables = [(PROFILES_TABLE, PROFILE_FIELDS), (FAILURES_TABLE, FAILURE_FIELDS), *LIST_TABLES.values()]
+        for table, fields in tables:
+            path = self._table_path(table)
+            if os.path.exists(path) and not pq.read_schema(path).equals(_schema(fields)):
+                outdated = True
+        if outdated:
+            for table in [PROFILES_TABLE, FAILURES_TABLE, *(table for table, _ in LIST_TABLES.values())]:
+                if os.path.exists(self._table_path(table)):
+                    os.remove(self._table_path(table))
+
+    # Ingests new and changed exports, drops removed ones and rewrites the
+    # tables. Returns the number of exports that were (re)parsed or removed,
+    # so 0 means the catalogue is unchanged.
+    def ingest(self):
+        self._drop_outdated_tables()
+        known = {}
+        for table, fields in [(PROFILES_TABLE, PROFILE_FIELDS), (FAILURES_TABLE, FAILURE_FIELDS)]:
+            for row in self._read_table(table, fields).select(
+                ["profile_id", "source_size", "source_mtime_ns"]
+            ).to_pylist():
+                known[row["profile_id"]] = (row["source_size"], row["source_mtime_ns"])
+
+        sources = self._scan_sources()
+        changed = {pid for pid, (_, size, mtime) in sources.items() if known.get(pid) != (size, mtime)}
+        removed = set(known) - set(sources)
+        if not changed and not removed:
+            return 0
+
+        profile_rows = []
+        failure_rows = []
+        list_rows = {key: [] for key in LIST_TABLES}
+        for profile_id in sorted(changed):
+            path, size, mtime = sources[profile_id]
+            try:
+                profile = (load_export(path) or {}).get("data", {})
+            except (OSError, DataLoadError) as e:
+                failure_rows.append({
+                    "profile_id": profile_id, "source_size": size, "source_mtime_ns": mtime, "error": str(e),
+                })
+                continue
+            row = {"profile_id": profile_id, "source_path": path, "source_size": size, "source_mtime_ns": mtime}
+            for key, arrow_type in SCALAR_FIELDS.items():
+                row[key] = _coerce(profile.get(key), arrow_type)
+            profile_rows.append(row)
+            for key, (_, fields) in LIST_TABLES.items():
+                list_rows[key].extend(_list_rows(profile_id, profile.get(key), fields))
+
+        stale = pa.array(sorted(changed | removed), pa.string())
+        tables = [(PROFILES_TABLE, PROFILE_FIELDS, profile_rows), (FAILURES_TABLE, FAILURE_FIELDS, failure_rows)]
+        tables += [(table, fields, list_rows[key]) for key, (table, fields) in LIST_TABLES.items()]
+        for table, fields, rows in tables:
+            existing = self._read_table(table, fields)
+            keep = pc.invert(pc.is_in(existing["profile_id"], value_set=stale))
+            fresh = pa.Table.from_pylist(rows, schema=_schema(fields))
+            self._write_table(table, fields, pa.concat_tables([existing.filter(keep), fresh.cast(existing.schema)]))
+        return len(changed | removed)
+
+    # Function to read whole columns of one cached table across every profile,
+    # or only the rows matching `filters`
+    def read_columns(self, table, columns, filters=None):
+        path = self._table_path(table)
+        if not os.path.exists(path):
+            return None
+        return pq.read_table(path, columns=columns, filters=filters)
+
+    # Function to list the cached profiles as (profile_id, name, screenName) rows
+    def list_profiles(self):
+        path = self._table_path(PROFILES_TABLE)
+        if not os.path.exists(path):
+            return []
+        return pq.read_table(path, columns=["profile_id", "name", "screenName"]).to_pylist()
+
+    # Function to rebuild one profile in the export's {"data": {...}} shape
+    # from the columnar cache, without touching the raw export.
+    def load_profile(self, profile_id):
+        filters = [("profile_id", "==", profile_id)]
+        rows = self._read_table(PROFILES_TABLE, PROFILE_FIELDS, filters).to_pylist()
+        if not rows:
+            return None
+        profile = {key: rows[0][key] for key in SCALAR_FIELDS if rows[0][key] is not None}
+        for key, (table, fields) in LIST_TABLES.items():
+            items = self._read_table(table, fields, filters).drop(["profile_id"]).to_pylist()
+            if key == "tags":
+                items = [item["name"] for item in items]
+            profile[key] = items
+        return {"data": profile}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest a directory of Instagram exports into the profile cache.")
+    parser.add_argument("profiles_dir", nargs="?", default=DEFAULT_PROFILES_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+    count = ProfileStore(args.profiles_dir, args.cache_dir).ingest()
+    print(f"Updated {count} profile(s) in {args.cache_dir}")
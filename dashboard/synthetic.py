@@ -0,0 +1,78 @@
+import json
+import random
+
+# Shape of the sample export, used as the 1x baseline for synthetic profiles
+SAMPLE_SHAPE = {
+    "posts": 12,
+    "countries": 50,
+    "cities": 100,
+    "tags": 15,
+    "suggested_tags": 10,
+    "rating_tags": 30,
+}
+
+_WORDS = (
+    "travel food fitness style beauty summer vibes family coffee sunset workout recipe outfit "
+    "brand collab giveaway new launch morning routine weekend city beach music art design tips"
+).split()
+_COUNTRIES = ["United States", "United Kingdom", "India", "Brazil", "Germany", "France", "Canada",
+              "Mexico", "Spain", "Italy", "Australia", "Japan", "Indonesia", "Turkey", "Nigeria"]
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _shares(rng, names):
+    weights = [rng.random() ** 3 for _ in names]
+    total = sum(weights) or 1
+    return [{"name": name, "value": round(w / total, 6)} for name, w in zip(names, weights)]
+
+
+# Function to generate a synthetic export in the {"data": {...}} shape, with
+# every list `scale` times as long as in the sample export
+def make_export(scale=1, seed=0):
+    rng = random.Random(seed)
+    n = {key: max(1, int(count * scale)) for key, count in SAMPLE_SHAPE.items()}
+    countries = [_COUNTRIES[i % len(_COUNTRIES)] + ("" if i < len(_COUNTRIES) else f" {i}") for i in range(n["countries"])]
+    followers = rng.randint(10_000, 5_000_000)
+    posts = []
+    for i in range(n["posts"]):
+        likes = int(followers * rng.uniform(0.005, 0.08))
+        posts.append({
+            "id": str(1_000_000 + i),
+            "url": f"https://www.instagram.com/p/{1_000_000 + i}/",
+            "text": _sentence(rng, rng.randint(8, 60)) + " " + " ".join(f"#{rng.choice(_WORDS)}" for _ in range(3)),
+            "date": f"2024-{1 + i * 7 // 28 % 12:02d}-{1 + i * 7 % 28:02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z",
+            "likes": likes,
+            "comments": int(likes * rng.uniform(0.005, 0.05)),
+            "views": int(likes * rng.uniform(2, 10)),
+        })
+    return {
+        "data": {
+            "name": "Synthetic Creator",
+            "screenName": "synthetic.creator",
+            "description": _sentence(rng, 20),
+            "image": "",
+            "usersCount": followers,
+            "avgLikes": sum(p["likes"] for p in posts) / len(posts),
+            "avgComments": sum(p["comments"] for p in posts) / len(posts),
+            "avgER": 0,
+            "verified": rng.random() < 0.3,
+            "gender": rng.choice(["m", "f", ""]),
+            "age": rng.choice(["18_24", "25_34", "35_44"]),
+            "pctFakeFollowers": round(rng.uniform(0, 0.2), 3),
+            "categories": rng.sample(_WORDS, 3),
+            "tags": [f"{rng.choice(_WORDS)}{i}" for i in range(n["tags"])],
+            "suggestedTags": [f"{rng.choice(_WORDS)}{i}" for i in range(n["suggested_tags"])],
+            "ratingTags": [{"name": f"{rng.choice(_WORDS)} {i}", "value": rng.random()} for i in range(n["rating_tags"])],
+            "membersCountries": _shares(rng, countries),
+            "membersCities": _shares(rng, [f"City {i}" for i in range(n["cities"])]),
+            "lastPosts": posts,
+        }
+    }
+
+
+# Function to render an export the way the source text files store it
+def make_export_text(scale=1, seed=0):
+    return f"Instagram profile report\n\nRaw JSON Data:\n{json.dumps(make_export(scale, seed), indent=2)}\n\nEnd of report\n"
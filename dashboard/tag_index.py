@@ -0,0 +1,302 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from dashboard.loader import DEFAULT_CACHE_DIR
+
+INDEX_FILE = "tag_index.npz"
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, INDEX_FILE)
+DEFAULT_K = 10
+METRICS = ("cosine", "jaccard")
+# Related-tag results kept per index version; the most common tags co-occur
+# with nearly every profile and are the slowest to recompute
+RELATED_CACHE_SIZE = 1024
+
+# Tag lists of the export indexed per profile, as store tables
+TAG_TABLES = ("tags", "rating_tags")
+
+
+def normalise_tag(tag):
+    return " ".join(str(tag).lower().split())
+
+
+# Function to gather the column indices of several CSR rows in one pass
+def _gather(indptr, indices, rows):
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return indices[offsets + np.arange(lengths.sum())]
+
+
+def _top_k(scores, overlap, candidates, k):
+    if len(candidates) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        candidates, scores, overlap = candidates[keep], scores[keep], overlap[keep]
+    order = np.lexsort((-overlap, -scores))
+    return candidates[order], scores[order], overlap[order]
+
+
+# Sparse tag x profile index over the whole catalogue.
+#
+# Each profile's tags (profile tags plus rating tags) are kept as a row of a
+# profile x tag CSR matrix; its transpose (tag -> profiles postings) is
+# rebuilt with a single argsort when the index changes. Co-occurrence of a tag
+# with every other tag, and overlap of a tag set with every profile, are one
+# sparse row product each, computed with np.bincount, so queries take a few
+# milliseconds even at 100k profiles.
+#
+# sync() only reads the profiles that were added, changed or removed in the
+# ProfileStore since the last sync; the index is persisted as a single .npz
+# file.
+class TagIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self.tags = []
+        self._tag_ids = {}
+        self.profile_ids = []
+        self._profile_rows = {}
+        self.names = []
+        self._profile_tags = []  # per profile row, an int32 array of tag ids
+        self._signatures = {}  # profile_id -> (source_size, source_mtime_ns)
+        self._arrays = None
+        self._related = OrderedDict()  # (tag, k, metric) -> rows, for the current arrays
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path=DEFAULT_INDEX_PATH):
+        index = cls(path)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                index.tags = data["tags"].tolist()
+                index.profile_ids = data["profile_ids"].tolist()
+                index.names = data["names"].tolist()
+                indptr, indices = data["indptr"], data["indices"]
+                sizes, mtimes = data["source_size"], data["source_mtime_ns"]
+            index._tag_ids = {tag: i for i, tag in enumerate(index.tags)}
+            index._profile_rows = {pid: i for i, pid in enumerate(index.profile_ids)}
+            index._profile_tags = [indices[indptr[i]:indptr[i + 1]] for i in range(len(index.profile_ids))]
+            index._signatures = {
+                pid: (int(sizes[i]), int(mtimes[i]))
+                for i, pid in enumerate(index.profile_ids) if sizes[i] >= 0
+            }
+        return index
+
+    def save(self):
+        with self._lock:
+            arrays = self._build()
+            sizes = np.full(len(self.profile_ids), -1, dtype=np.int64)
+            mtimes = np.full(len(self.profile_ids), -1, dtype=np.int64)
+            for pid, (size, mtime) in self._signatures.items():
+                row = self._profile_rows[pid]
+                sizes[row], mtimes[row] = size, mtime
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                tmp_path,
+                tags=np.array(self.tags, dtype=str),
+                profile_ids=np.array(self.profile_ids, dtype=str),
+                names=np.array(self.names, dtype=str),
+                indptr=arrays["p_indptr"],
+                indices=arrays["p_indices"],
+                source_size=sizes,
+                source_mtime_ns=mtimes,
+            )
+            os.replace(tmp_path, self.path)
+
+    def _tag_id(self, tag):
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        return tag_id
+
+    # Function to add or replace one profile's tags. Removed profiles keep
+    # their row with no tags, so row numbers stay stable.
+    def set_profile(self, profile_id, tags, name="", signature=None):
+        with self._lock:
+            tag_ids = np.array(sorted({self._tag_id(t) for t in map(normalise_tag, tags) if t}), dtype=np.int32)
+            row = self._profile_rows.get(profile_id)
+            if row is None:
+                row = self._profile_rows[profile_id] = len(self.profile_ids)
+                self.profile_ids.append(profile_id)
+                self.names.append(name)
+                self._profile_tags.append(tag_ids)
+            else:
+                self.names[row] = name
+                self._profile_tags[row] = tag_ids
+            if signature is not None:
+                self._signatures[profile_id] = signature
+            self._arrays = None
+
+    def remove_profile(self, profile_id):
+        with self._lock:
+            row = self._profile_rows.get(profile_id)
+            if row is not None:
+                self._profile_tags[row] = np.empty(0, dtype=np.int32)
+                self._signatures.pop(profile_id, None)
+                self._arrays = None
+
+    # Function to bring the index up to date with a ProfileStore. Returns the
+    # number of profiles added, changed or removed.
+    def sync(self, store):
+        from dashboard.store import PROFILES_TABLE
+
+        sources = store.read_columns(PROFILES_TABLE, ["profile_id", "source_size", "source_mtime_ns", "name", "screenName"])
+        if sources is None:
+            return 0
+        sources = {row["profile_id"]: row for row in sources.to_pylist()}
+        changed = [
+            pid for pid, row in sources.items()
+            if self._signatures.get(pid) != (row["source_size"], row["source_mtime_ns"])
+        ]
+        removed = [pid for pid in self._signatures if pid not in sources]
+        if changed:
+            tags = {pid: [] for pid in changed}
+            for table in TAG_TABLES:
+                rows = store.read_columns(table, ["profile_id", "name"], filters=[("profile_id", "in", changed)])
+                if rows is not None:
+                    for pid, tag in zip(rows["profile_id"].to_pylist(), rows["name"].to_pylist()):
+                        if tag:
+                            tags[pid].append(tag)
+            for pid in changed:
+                row = sources[pid]
+                name = row["name"] or ""
+                if row["screenName"]:
+                    name = f"{name} (@{row['screenName']})".strip()
+                self.set_profile(pid, tags[pid], name or pid, (row["source_size"], row["source_mtime_ns"]))
+        for pid in removed:
+            self.remove_profile(pid)
+        return len(changed) + len(removed)
+
+    # Builds the CSR arrays (and the transposed postings) after changes
+    def _build(self):
+        arrays = self._arrays
+        if arrays is not None:
+            return arrays
+        sizes = np.fromiter((len(t) for t in self._profile_tags), dtype=np.int64, count=len(self._profile_tags))
+        p_indptr = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=p_indptr[1:])
+        p_indices = np.concatenate(self._profile_tags) if self._profile_tags else np.empty(0, dtype=np.int32)
+        p_indices = p_indices.astype(np.int32, copy=False)
+        df = np.bincount(p_indices, minlength=len(self.tags))
+        t_indptr = np.zeros(len(self.tags) + 1, dtype=np.int64)
+        np.cumsum(df, out=t_indptr[1:])
+        owners = np.repeat(np.arange(len(sizes), dtype=np.int32), sizes)
+        t_indices = owners[np.argsort(p_indices, kind="stable")]
+        self._related.clear()
+        arrays = self._arrays = {
+            "p_indptr": p_indptr, "p_indices": p_indices, "sizes": sizes,
+            "t_indptr": t_indptr, "t_indices": t_indices, "df": df,
+        }
+        return arrays
+
+    def _arrays_for_query(self):
+        arrays = self._arrays
+        if arrays is None:
+            with self._lock:
+                arrays = self._build()
+        return arrays
+
+    # Function to count how often each tag appears alongside `tag`; returns
+    # (tag ids, counts) for every co-occurring tag
+    def cooccurrence(self, tag):
+        tag_id = self._tag_ids.get(normalise_tag(tag))
+        arrays = self._arrays_for_query()
+        if tag_id is None or tag_id >= len(arrays["df"]):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        profiles = arrays["t_indices"][arrays["t_indptr"][tag_id]:arrays["t_indptr"][tag_id + 1]]
+        counts = np.bincount(_gather(arrays["p_indptr"], arrays["p_indices"], profiles), minlength=len(arrays["df"]))
+        counts[tag_id] = 0
+        co_tags = np.flatnonzero(counts)
+        return co_tags, counts[co_tags]
+
+    # Function to get the k tags most related to `tag` across the catalogue,
+    # as (tag, profiles with both, score) rows
+    def related_tags(self, tag, k=DEFAULT_K, metric="cosine"):
+        arrays = self._arrays_for_query()
+        key = (normalise_tag(tag), k, metric)
+        with self._lock:
+            if self._arrays is arrays and key in self._related:
+                self._related.move_to_end(key)
+                return self._related[key]
+        rows = self._related_tags(tag, k, metric)
+        with self._lock:
+            if self._arrays is arrays:
+                self._related[key] = rows
+                while len(self._related) > RELATED_CACHE_SIZE:
+                    self._related.popitem(last=False)
+        return rows
+
+    def _related_tags(self, tag, k, metric):
+        co_tags, counts = self.cooccurrence(tag)
+        if not len(co_tags):
+            return []
+        df = self._arrays_for_query()["df"]
+        own = df[self._tag_ids[normalise_tag(tag)]]
+        other = df[co_tags]
+        if metric == "jaccard":
+            scores = counts / (own + other - counts)
+        else:
+            scores = counts / np.sqrt(own * other)
+        top, scores, counts = _top_k(scores, counts, co_tags, k)
+        return [(self.tags[t], int(c), float(s)) for t, c, s in zip(top, counts, scores)]
+
+    # Function to find the k profiles whose tags overlap most with `tags`, as
+    # (profile_id, name, shared tags, score) rows
+    def similar_to_tags(self, tags, k=DEFAULT_K, metric="cosine", exclude=None):
+        tag_ids = sorted({self._tag_ids[t] for t in map(normalise_tag, tags) if t in self._tag_ids})
+        arrays = self._arrays_for_query()
+        tag_ids = np.array([t for t in tag_ids if t < len(arrays["df"])], dtype=np.int64)
+        if not len(tag_ids):
+            return []
+        profiles = _gather(arrays["t_indptr"], arrays["t_indices"], tag_ids)
+        overlap = np.bincount(profiles, minlength=len(arrays["sizes"]))
+        if exclude is not None and exclude in self._profile_rows:
+            overlap[self._profile_rows[exclude]] = 0
+        candidates = np.flatnonzero(overlap)
+        if not len(candidates):
+            return []
+        overlap = overlap[candidates]
+        sizes = arrays["sizes"][candidates]
+        # Query tags the index hasn't seen still count towards the query's size
+        query_size = len({normalise_tag(t) for t in tags if normalise_tag(t)})
+        if metric == "jaccard":
+            scores = overlap / (query_size + sizes - overlap)
+        else:
+            scores = overlap / np.sqrt(query_size * sizes)
+        top, scores, overlap = _top_k(scores, overlap, candidates, k)
+        return [
+            (self.profile_ids[row], self.names[row], int(shared), float(score))
+            for row, shared, score in zip(top, overlap, scores)
+        ]
+
+    def similar_profiles(self, profile_id, k=DEFAULT_K, metric="cosine"):
+        row = self._profile_rows.get(profile_id)
+        if row is None:
+            return []
+        tags = [self.tags[t] for t in self._profile_tags[row]]
+        return self.similar_to_tags(tags, k, metric, exclude=profile_id)
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dashboard.loader import DEFAULT_PROFILES_DIR
+    from dashboard.store import ProfileStore
+
+    parser = argparse.ArgumentParser(description="Build or update the catalogue tag index.")
+    parser.add_argument("profiles_dir", nargs="?", default=DEFAULT_PROFILES_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+    store = ProfileStore(args.profiles_dir, args.cache_dir)
+    store.ingest()
+    index_path = os.path.join(args.cache_dir, INDEX_FILE)
+    index = TagIndex.open(index_path)
+    count = index.sync(store)
+    index.save()
+    print(f"Updated {count} profile(s); {len(index)} profiles and {len(index.tags)} tags in {index_path}")
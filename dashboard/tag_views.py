@@ -0,0 +1,45 @@
+import html
+from functools import lru_cache
+
+from dashboard.instrumentation import REGISTRY
+from dashboard.trends import get_trends_link
+
+PROFILE_TAG_COLOR = "#6c5ce7"
+SUGGESTED_TAG_COLOR = "#00b894"
+CACHE_SIZE = 256
+
+SCORE_COLUMN = "Trend Score (0-100)"
+LINK_COLUMN = "Google Trends"
+
+
+# Function to render a tuple of tags as HTML chips; memoised on the tags
+# themselves, so a rerun of the same profile is a single lookup
+@lru_cache(maxsize=CACHE_SIZE)
+def tag_chips(tags, color):
+    style = f"background-color:{color}; color:white; padding:2px 8px; border-radius:10px; margin:2px; display:inline-block;"
+    return "".join([f'<span style="{style}">{html.escape(tag)}</span>' for tag in tags])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _rating_table(content_hash, tag_names, score_items):
+    import pandas as pd  # only needed once there are rating tags to show
+
+    scores = dict(score_items)
+    df = pd.DataFrame({
+        "Tag": tag_names,
+        SCORE_COLUMN: [s if isinstance(s, (int, float)) else None for s in map(scores.get, tag_names)],
+        LINK_COLUMN: [get_trends_link(tag) for tag in tag_names],
+    })
+    # Tags without a score ("N/A") sort to the bottom
+    return df.sort_values(SCORE_COLUMN, ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+
+
+# Function to get the rating-tag table sorted by trend score, memoised on
+# (profile hash, tag list, scores). The returned frame is shared; don't
+# modify it.
+def rating_table(content_hash, tag_names, scores):
+    return _rating_table(content_hash, tuple(tag_names), frozenset(scores.items()))
+
+
+REGISTRY.watch_lru("tag_chips", tag_chips)
+REGISTRY.watch_lru("rating_table", _rating_table)
@@ -0,0 +1,45 @@
+from functools import lru_cache
+
+from dashboard.instrumentation import REGISTRY
+
+# Messages shown at once; "Load earlier" reveals this many more
+TRANSCRIPT_WINDOW = 20
+RENDER_CACHE_SIZE = 4096
+
+_STYLES = {
+    "You": ("#F0F2F6", "You"),
+    "Agent": ("#E1F5FE", "AI Assistant"),
+}
+
+
+# Function to render one transcript message (and its metrics caption) to
+# HTML. Messages never change once added, so each is rendered once and reused
+# on every rerun.
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_message(speaker, message, caption=""):
+    background, label = _STYLES.get(speaker, _STYLES["Agent"])
+    html = (
+        f"<div style='background-color:{background}; padding:10px; border-radius:5px; margin-bottom:10px;'>"
+        f"<b>{label}:</b> {message}</div>"
+    )
+    if caption:
+        html += f"<div style='color:#808495; font-size:0.8em; margin:-6px 0 10px 0;'>{caption}</div>"
+    return html
+
+
+REGISTRY.watch_lru("transcript", render_message)
+
+
+# Function to get the index of the first message to show when the latest
+# `shown` messages are visible
+def window_start(total, shown=TRANSCRIPT_WINDOW):
+    return max(total - shown, 0)
+
+
+# Function to render messages [start, len(history)) as one HTML block.
+# `captions` maps a message index to its caption text.
+def render_window(history, start, captions):
+    return "".join(
+        render_message(speaker, message, captions.get(i, ""))
+        for i, (speaker, message) in enumerate(history[start:], start)
+    )
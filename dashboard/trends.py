@@ -0,0 +1,245 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dashboard.instrumentation import cache_result, span, timed
+
+DEFAULT_TIMEFRAME = "today 12-m"
+DEFAULT_GEO = ""
+
+# A broadly popular term every payload is measured against, so scores from
+# different payloads, profiles and cache entries are on one scale
+DEFAULT_ANCHOR = "instagram"
+
+# pytrends accepts at most five keywords per payload; one slot holds the anchor
+MAX_KEYWORDS_PER_PAYLOAD = 5
+BATCH_SIZE = MAX_KEYWORDS_PER_PAYLOAD - 1
+
+# Interest is averaged over the last four weekly points, i.e. the last month
+RECENT_POINTS = 4
+
+
+# Function to get Google Trends link for a keyword
+def get_trends_link(keyword):
+    encoded_keyword = keyword.replace(" ", "+")
+    return f"https://trends.google.com/trends/explore?q={encoded_keyword}"
+
+
+# Thread-safe token bucket: refills `rate` tokens per second up to `capacity`
+class TokenBucket:
+    def __init__(self, rate=1.0, capacity=2):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# In-process score cache with a TTL, keyed by (keyword, anchor, timeframe, geo).
+# get() returns (score, fetched_at, is_stale) or None; entries here never go
+# stale, they simply expire.
+class MemoryScoreCache:
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._entries = {}
+        self._counters = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and time.time() - entry[1] <= self.ttl
+            self._counters["hits" if hit else "misses"] += 1
+        return (entry[0], entry[1], False) if hit else None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "stale": 0, "size": len(self._entries)}
+
+
+def _is_rate_limited(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429 or type(error).__name__ == "TooManyRequestsError"
+
+
+# Fetches Google Trends interest for many keywords at once.
+#
+# Keywords are packed four to a payload together with a fixed anchor term,
+# and each keyword's score is stored relative to the anchor's mean interest so
+# scores from different payloads (and from the cache) are comparable. If the
+# anchor has no interest in a payload, that payload's keywords are scored
+# against the payload's own peak instead and aren't cached. Payloads run on a
+# bounded thread pool behind a token bucket, with exponential backoff when
+# Google answers 429.
+class TrendsEngine:
+    def __init__(self, client_factory, cache=None, limiter=None, max_workers=2,
+                 max_retries=4, backoff=2.0, timeframe=DEFAULT_TIMEFRAME, geo=DEFAULT_GEO,
+                 anchor=DEFAULT_ANCHOR):
+        self.client_factory = client_factory
+        self.anchor = anchor
+        self.cache = cache if cache is not None else MemoryScoreCache()
+        self.limiter = limiter if limiter is not None else TokenBucket()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeframe = timeframe
+        self.geo = geo
+        # TrendReq keeps per-request state, so every worker thread gets its own
+        self._local = threading.local()
+        # Stale cache entries are refreshed off the render path, one payload at a time
+        self._refresher = ThreadPoolExecutor(max_workers=1)
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def cache_key(self, keyword, anchor):
+        return (keyword, anchor, self.timeframe, self.geo)
+
+    # Returns ({keyword: score}, anchored): scores are relative to the anchor,
+    # or to the payload's peak interest when the anchor had none
+    def _fetch_batch(self, batch, anchor):
+        kw_list = list(dict.fromkeys([anchor] + batch))
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                client = self._client()
+                with span("trends.interest_over_time", external=True):
+                    client.build_payload(kw_list, timeframe=self.timeframe, geo=self.geo)
+                    df = client.interest_over_time()
+                break
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt + random.uniform(0, self.backoff))
+
+        if df.empty:
+            return dict.fromkeys(batch), True
+        recent = {keyword: float(df[keyword].iloc[-RECENT_POINTS:].mean()) for keyword in batch}
+        anchor_mean = df[anchor].mean()
+        if anchor_mean:
+            return {keyword: value / anchor_mean for keyword, value in recent.items()}, True
+        # Trends scales every payload to its own peak of 100
+        return {keyword: value / 100 for keyword, value in recent.items()}, False
+
+    def _fetch_and_store(self, batch, anchor):
+        scores, anchored = self._fetch_batch(batch, anchor)
+        if anchored:
+            for keyword, score in scores.items():
+                self.cache.set(self.cache_key(keyword, anchor), score)
+        return scores
+
+    def _refresh(self, batch, anchor):
+        try:
+            self._fetch_and_store(batch, anchor)
+        except Exception:
+            pass  # keep serving the stale entries; the next render retries
+        finally:
+            with self._refresh_lock:
+                self._refreshing.difference_update(self.cache_key(k, anchor) for k in batch)
+
+    # Schedules a background refetch of stale keywords not already in flight
+    def refresh_in_background(self, keywords, anchor):
+        with self._refresh_lock:
+            pending = [k for k in keywords if self.cache_key(k, anchor) not in self._refreshing]
+            self._refreshing.update(self.cache_key(k, anchor) for k in pending)
+        for i in range(0, len(pending), BATCH_SIZE):
+            self._refresher.submit(self._refresh, pending[i:i + BATCH_SIZE], anchor)
+
+    # Yields (keyword, relative_score, from_cache) as results arrive: cache hits
+    # (fresh or stale) first, then each payload as it completes. relative_score
+    # is None when Trends has no data for the keyword. Errors are yielded as
+    # (keyword, None, False) after being passed to on_error. Stale hits are
+    # refetched in the background once the fresh results are in.
+    def iter_scores(self, keywords, anchor=None, on_error=None):
+        keywords = list(dict.fromkeys(k for k in keywords if k))
+        if not keywords:
+            return
+        anchor = anchor or self.anchor
+
+        missing = []
+        stale = []
+        for keyword in keywords:
+            entry = self.cache.get(self.cache_key(keyword, anchor))
+            cache_result("trends", entry is not None)
+            if entry is None:
+                missing.append(keyword)
+                continue
+            score, _, is_stale = entry
+            if is_stale:
+                stale.append(keyword)
+            yield keyword, score, True
+
+        batches = [missing[i:i + BATCH_SIZE] for i in range(0, len(missing), BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._fetch_and_store, batch, anchor): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    scores = future.result()
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(e)
+                    for keyword in futures[future]:
+                        yield keyword, None, False
+                    continue
+                for keyword, score in scores.items():
+                    yield keyword, score, False
+
+        if stale:
+            self.refresh_in_background(stale, anchor)
+
+
+# Function to build an engine on pytrends and the on-disk score cache, with
+# the same rate limit and anchor (TRENDS_ANCHOR) as the Tags page, for the
+# command-line tools
+def make_trends_engine():
+    from pytrends.request import TrendReq
+
+    from dashboard.score_cache import SQLiteScoreCache
+
+    return TrendsEngine(
+        client_factory=lambda: TrendReq(hl="en-US", tz=360),
+        cache=SQLiteScoreCache(),
+        limiter=TokenBucket(rate=1.0, capacity=2),
+        max_workers=2,
+        anchor=os.environ.get("TRENDS_ANCHOR", DEFAULT_ANCHOR),
+    )
+
+
+# Rescales anchor-relative scores to 0-100, with the most popular keyword at 100
+def normalise_scores(relative_scores):
+    peak = max((s for s in relative_scores.values() if s is not None), default=0)
+    return {
+        keyword: round(score / peak * 100, 1) if score is not None and peak else "N/A"
+        for keyword, score in relative_scores.items()
+    }
+
+
+# Function to get 0-100 trend scores for many keywords in one call, for
+# callers that don't need results as they stream in
+@timed("get_interest_data")
+def get_interest_data(engine, keywords, anchor=None, on_error=None):
+    relative_scores = {keyword: score for keyword, score, _ in engine.iter_scores(keywords, anchor, on_error)}
+    return normalise_scores(relative_scores)
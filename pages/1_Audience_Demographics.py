@@ -1,6 +1,11 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
+
+from dashboard.charts import LOCATION_CHARTS, location_chart
+from dashboard.demographics import DEFAULT_TOP_N, aggregate_store, profile_demographics, top_n
+from dashboard.dev_panel import begin_rerun, dev_panel
+from dashboard.instrumentation import span
+from dashboard.service import get_data_service
+from dashboard.session import current_profile
 
 # Configure the page
 st.set_page_config(
@@ -9,70 +14,67 @@ st.set_page_config(
     layout="wide"
 )
 
-# Check if data is in session state
-if "instagram_data" not in st.session_state:
-    st.error("Please start from the Home page to load the data.")
-    st.stop()
+# Time this rerun for the developer panel
+begin_rerun()
 
-data = st.session_state.instagram_data
-profile = data.get("data", {})
+snapshot = current_profile()
 
-# Function to format numbers with K, M, B suffixes
-def format_number(num):
-    if not isinstance(num, (int, float)):
-        return num
-    
-    abs_num = abs(num)
-    sign = -1 if num < 0 else 1
-    
-    if abs_num >= 1_000_000_000:
-        return f"{sign * abs_num / 1_000_000_000:.1f}B"
-    elif abs_num >= 1_000_000:
-        return f"{sign * abs_num / 1_000_000:.1f}M"
-    elif abs_num >= 1_000:
-        return f"{sign * abs_num / 1_000:.1f}K"
-    else:
-        return str(num)
+# Aggregates across every cached profile, recomputed at most every 10 minutes
+@st.cache_data(ttl=600)
+def load_catalogue_demographics():
+    store = get_data_service().store
+    return {kind: aggregate_store(store, kind) for kind in ("countries", "cities")}
 
 st.title("Audience Demographics")
 st.write("Explore the geographic distribution of your Instagram audience.")
 
+# Ranked countries/cities and their charts come with a prebuilt snapshot;
+# otherwise they are computed once per profile and shared with the Chat page
+artifacts = snapshot.artifacts or {}
+demographics = artifacts.get("demographics") or profile_demographics(snapshot.model, snapshot.content_hash)
+chart_specs = artifacts.get("charts", {})
+if get_data_service().has_catalogue() and st.toggle("Aggregate across all profiles", value=False):
+    catalogue = load_catalogue_demographics()
+    if catalogue["countries"] is not None:
+        demographics = catalogue
+        chart_specs = {}
+        st.caption("Estimated audience per location, summed over every profile in the catalogue.")
+    else:
+        st.info("No cached profiles to aggregate yet.")
+
+# Function to show how much of the audience the charted rows cover
+def coverage_caption(df, n):
+    shown = top_n(df, n)
+    if not shown.empty:
+        st.caption(f"Top {len(shown)} cover {shown['cumulative_pct'].iloc[-1]:.1f}% of the audience.")
+
+# Function to draw a location chart from its prebuilt spec, or build it
+# live; Altair is only imported in the second case
+def location_section(kind, df):
+    with span(f"chart.{kind}"):
+        spec = chart_specs.get(kind)
+        if spec is not None:
+            st.vega_lite_chart(spec, use_container_width=True)
+        else:
+            title, scheme = LOCATION_CHARTS[kind]
+            st.altair_chart(location_chart(df, title, scheme), use_container_width=True)
+    coverage_caption(demographics[kind], DEFAULT_TOP_N)
+
 # --- Audience by Country ---
 st.header("Top Countries")
-countries = profile.get("membersCountries", [])
-if countries:
-    df_countries = pd.DataFrame(countries)
-    # Sort descending by 'value' and pick the top 10
-    df_countries = df_countries.sort_values(by="value", ascending=False).head(10)
-    df_countries["formatted_value"] = df_countries["value"].apply(format_number)
-    
-    # Create a more vibrant chart
-    chart = alt.Chart(df_countries).mark_bar().encode(
-        x=alt.X('value:Q', title='Followers'),
-        y=alt.Y('name:N', sort='-x', title='Country'),
-        color=alt.Color('value:Q', scale=alt.Scale(scheme='viridis'), legend=None),
-        tooltip=['name', 'formatted_value']
-    ).properties(height=400)
-    
-    st.altair_chart(chart, use_container_width=True)
+df_countries = top_n(demographics["countries"], DEFAULT_TOP_N)
+if not df_countries.empty:
+    location_section("countries", df_countries)
 else:
     st.info("No country data available.")
 
 # --- Audience by City ---
 st.header("Top Cities")
-cities = profile.get("membersCities", [])
-if cities:
-    df_cities = pd.DataFrame(cities)
-    df_cities = df_cities.sort_values(by="value", ascending=False).head(10)
-    df_cities["formatted_value"] = df_cities["value"].apply(format_number)
-    
-    chart = alt.Chart(df_cities).mark_bar().encode(
-        x=alt.X('value:Q', title='Followers'),
-        y=alt.Y('name:N', sort='-x', title='City'),
-        color=alt.Color('value:Q', scale=alt.Scale(scheme='turbo'), legend=None),
-        tooltip=['name', 'formatted_value']
-    ).properties(height=400)
-    
-    st.altair_chart(chart, use_container_width=True)
+df_cities = top_n(demographics["cities"], DEFAULT_TOP_N)
+if not df_cities.empty:
+    location_section("cities", df_cities)
 else:
-    st.info("No city data available.")
\ No newline at end of file
+    st.info("No city data available.")
+
+# Developer panel with this rerun's timings, when enabled
+dev_panel("Audience Demographics")
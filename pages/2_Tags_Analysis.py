@@ -1,8 +1,18 @@
-import streamlit as st
-import streamlit.components.v1 as components  # Import the components module
-import pandas as pd
+import os
 import time
-from pytrends.request import TrendReq
+
+import streamlit as st
+
+from dashboard.dev_panel import begin_rerun, dev_panel
+from dashboard.instrumentation import span
+from dashboard.service import get_data_service
+from dashboard.session import current_profile
+from dashboard.score_cache import DEFAULT_CACHE_PATH, DEFAULT_STALE_TTL, DEFAULT_TTL, SQLiteScoreCache
+from dashboard.snapshots import fresh_trends
+from dashboard.tag_views import (
+    LINK_COLUMN, PROFILE_TAG_COLOR, SCORE_COLUMN, SUGGESTED_TAG_COLOR, rating_table, tag_chips,
+)
+from dashboard.trends import DEFAULT_ANCHOR, TokenBucket, TrendsEngine, normalise_scores
 
 # Configure the page
 st.set_page_config(
@@ -11,39 +21,38 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize pytrends
-@st.cache_resource
-def get_pytrends():
+# Time this rerun for the developer panel
+begin_rerun()
+
+# pytrends is only imported when the first Trends client is built, in the
+# worker thread that needs it
+def make_trends_client():
+    from pytrends.request import TrendReq
+
     return TrendReq(hl='en-US', tz=360)
 
-pytrends = get_pytrends()
-
-# Function to get Google Trends link for a keyword
-def get_trends_link(keyword):
-    encoded_keyword = keyword.replace(" ", "+")
-    return f"https://trends.google.com/trends/explore?q={encoded_keyword}"
-
-# Function to get interest over time data for a keyword
-@st.cache_data(ttl=3600)
-def get_interest_data(keyword):
-    try:
-        pytrends.build_payload([keyword], timeframe='today 12-m')
-        interest_over_time_df = pytrends.interest_over_time()
-        if not interest_over_time_df.empty:
-            last_month = interest_over_time_df[-4:][keyword].mean()
-            return round(last_month, 1)
-        return "N/A"
-    except Exception as e:
-        st.error(f"Error fetching trends data: {str(e)}")
-        return "N/A"
-
-# Check if data is in session state
-if "instagram_data" not in st.session_state:
-    st.error("Please start from the Home page to load the data.")
-    st.stop()
-
-data = st.session_state.instagram_data
-profile = data.get("data", {})
+# Initialize the Trends fetch engine once per process so its rate limiter is
+# shared by every session. Scores live in an on-disk cache shared by every
+# process/replica pointing at the same file. Only built when there are
+# rating tags to score.
+@st.cache_resource
+def get_trends_engine():
+    cache = SQLiteScoreCache(
+        path=os.environ.get("TRENDS_CACHE_PATH", DEFAULT_CACHE_PATH),
+        ttl=float(os.environ.get("TRENDS_CACHE_TTL", DEFAULT_TTL)),
+        stale_ttl=float(os.environ.get("TRENDS_CACHE_STALE_TTL", DEFAULT_STALE_TTL)),
+        max_entries=int(os.environ.get("TRENDS_CACHE_MAX_ENTRIES", 50_000)),
+    )
+    return TrendsEngine(
+        client_factory=make_trends_client,
+        cache=cache,
+        limiter=TokenBucket(rate=1.0, capacity=2),
+        max_workers=2,
+        anchor=os.environ.get("TRENDS_ANCHOR", DEFAULT_ANCHOR),
+    )
+
+snapshot = current_profile()
+model = snapshot.model
 
 st.title("Tags Analysis")
 st.write("Explore the tags associated with this Instagram profile.")
@@ -52,96 +61,122 @@ st.write("Explore the tags associated with this Instagram profile.")
 col1, col2 = st.columns(2)
 with col1:
     st.subheader("Profile Tags")
-    tags = profile.get("tags", [])
+    tags = model.info.tags
     if tags:
-        tag_html = "".join([f'<span style="background-color:#6c5ce7; color:white; padding:2px 8px; border-radius:10px; margin:2px; display:inline-block;">{tag}</span>' for tag in tags])
-        st.markdown(tag_html, unsafe_allow_html=True)
+        st.markdown(tag_chips(tags, PROFILE_TAG_COLOR), unsafe_allow_html=True)
     else:
         st.info("No profile tags available.")
 with col2:
     st.subheader("Suggested Tags")
-    suggested = profile.get("suggestedTags", [])
+    suggested = model.info.suggested_tags
     if suggested:
-        tag_html = "".join([f'<span style="background-color:#00b894; color:white; padding:2px 8px; border-radius:10px; margin:2px; display:inline-block;">{tag}</span>' for tag in suggested])
-        st.markdown(tag_html, unsafe_allow_html=True)
+        st.markdown(tag_chips(suggested, SUGGESTED_TAG_COLOR), unsafe_allow_html=True)
     else:
         st.info("No suggested tags available.")
 
 # Rating tags section with Google Trends data
 st.subheader("Rating Tags with Trend Analysis")
-rating_tags = profile.get("ratingTags", [])
-if rating_tags:
-    rating_data = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for i, tag in enumerate(rating_tags):
-        tag_name = tag.get("name", "")
-        status_text.text(f"Fetching trends data for '{tag_name}'...")
-        trends_link = get_trends_link(tag_name)
-        interest = get_interest_data(tag_name)
-        rating_data.append({
-            "Tag": tag_name,
-            "Trend Score (0-100)": interest,
-            "Link": trends_link
-        })
-        progress_bar.progress((i + 1) / len(rating_tags))
-        time.sleep(0.5)  # Delay to avoid rate limiting
-
-    progress_bar.empty()
-    status_text.empty()
-
-    # Sort rating_data by "Trend Score (0-100)" in descending order.
-    # For "N/A" entries, we treat them as -1 so they appear at the bottom.
-    rating_data.sort(key=lambda x: x["Trend Score (0-100)"] if isinstance(x["Trend Score (0-100)"], (int, float)) else -1, reverse=True)
-    
-    # Create custom HTML table with sorted data
-    html_table = """
-    <table style="width:100%; border-collapse: collapse;">
-      <thead>
-        <tr style="background-color: #f0f2f6;">
-          <th style="padding: 8px; text-align: left; border-bottom: 1px solid #ddd;">Tag</th>
-          <th style="padding: 8px; text-align: left; border-bottom: 1px solid #ddd;">Trend Score (0-100)</th>
-        </tr>
-      </thead>
-      <tbody>
-    """
-    
-    for item in rating_data:
-        tag = item["Tag"]
-        trend_score = item["Trend Score (0-100)"]
-        link = item["Link"]
-        if trend_score != "N/A":
-            trend_display = f'<a href="{link}" target="_blank">{trend_score}</a>'
-        else:
-            trend_display = f'<a href="{link}" target="_blank">N/A</a>'
-        html_table += f"""
-        <tr>
-          <td style="padding: 8px; border-bottom: 1px solid #ddd;">{tag}</td>
-          <td style="padding: 8px; border-bottom: 1px solid #ddd;">{trend_display}</td>
-        </tr>
-        """
-    
-    html_table += """
-      </tbody>
-    </table>
-    """
-    
-    components.html(html_table, height=300)
-    st.info("Click on the trend score to see detailed Google Trends data for each tag.")
+rating_tags = model.rating_tags
+# Scores fetched when the snapshot was prebuilt are served as they are, with
+# no call to Google Trends, until they are older than the cache TTL
+prebuilt_trends = fresh_trends(snapshot.artifacts, float(os.environ.get("TRENDS_CACHE_TTL", DEFAULT_TTL)))
+if len(rating_tags):
+    tag_names = list(rating_tags.names)
+    if prebuilt_trends is not None:
+        scores = prebuilt_trends["scores"]
+    else:
+        trends_engine = get_trends_engine()
+        total = max(len(set(filter(None, tag_names))), 1)
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        relative_scores = {}
+        with span("trends.scores"):
+            for i, (tag_name, score, _) in enumerate(trends_engine.iter_scores(
+                    tag_names, on_error=lambda e: st.error(f"Error fetching trends data: {str(e)}"))):
+                relative_scores[tag_name] = score
+                status_text.text(f"Fetched trends data for '{tag_name}'...")
+                progress_bar.progress((i + 1) / total)
+
+        progress_bar.empty()
+        status_text.empty()
+        scores = normalise_scores(relative_scores)
+
+    # The sorted table is memoised per profile and set of scores, so reruns
+    # only pay for the cache lookups above
+    table = rating_table(snapshot.content_hash, tag_names, scores)
+    st.dataframe(
+        table,
+        column_config={
+            SCORE_COLUMN: st.column_config.NumberColumn(format="%.1f"),
+            LINK_COLUMN: st.column_config.LinkColumn(display_text="Open in Google Trends"),
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.info("Open the Google Trends link to see detailed search interest for each tag.")
+    if prebuilt_trends is not None:
+        fetched_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(prebuilt_trends["fetched_at"]))
+        st.caption(f"Trends scores prebuilt on {fetched_at}.")
+    else:
+        cache_stats = trends_engine.cache.stats()
+        st.caption(
+            f"Trends cache: {cache_stats['hits']} hits, {cache_stats['stale']} stale, "
+            f"{cache_stats['misses']} misses, {cache_stats['size']} entries"
+        )
 else:
     st.info("No rating tags available.")
 
+# Related tags and similar creators across the whole catalogue
+service = get_data_service()
+if service.has_catalogue():
+    tag_index = service.tag_index()
+    if len(tag_index):
+        profile_tags = list(dict.fromkeys(list(model.info.tags) + list(rating_tags.names)))
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Related Tags")
+            if profile_tags:
+                selected_tag = st.selectbox("Tags that appear most often alongside", profile_tags)
+                related = tag_index.related_tags(selected_tag)
+                if related:
+                    st.dataframe(
+                        [{"Tag": tag, "Profiles": count, "Similarity": round(score, 3)} for tag, count, score in related],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+                else:
+                    st.info("This tag doesn't appear in any other profile.")
+            else:
+                st.info("No tags to compare.")
+        with col2:
+            st.subheader("Similar Creators")
+            similar = tag_index.similar_to_tags(profile_tags, exclude=snapshot.profile_id)
+            if similar:
+                st.dataframe(
+                    [{"Creator": name, "Shared Tags": shared, "Similarity": round(score, 3)}
+                     for _, name, shared, score in similar],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            else:
+                st.info("No creators in the catalogue share this profile's tags.")
+        st.caption(f"Based on the tags of {len(tag_index):,} profiles in the catalogue (cosine similarity).")
+
 st.markdown("""
 ---
 ### About Google Trends Data
 
-The Trend Score represents the average search interest for each tag over the past month on a scale of 0-100:
-* **100**: Peak popularity for the term.
-* **50**: Half as popular as the peak.
+The Trend Score represents the average search interest for each tag over the past month on a scale of 0-100.
+Tags are compared against a shared anchor term, so scores are relative to the most-searched rating tag:
+* **100**: The most popular rating tag over the past month.
+* **50**: Half as popular as the top tag.
 * **0**: Insufficient data for the term.
 """)
 
 st.caption("""
 Note: Google Trends data may be limited due to API restrictions. If you see "N/A", the tag may be too specific or the API request might have been rate-limited.
 """)
+
+# Developer panel with this rerun's timings, when enabled
+dev_panel("Tags Analysis")
@@ -19,10 +19,11 @@ This dashboard provides insights into an Instagram profile's audience and engage
 - **Profile Overview**: Basic profile information and key statistics
 - **Audience Demographics**: Geographic distribution of followers by country and city
 - **Tags Analysis**: Explore profile tags, suggested tags, and rating tags
+- **Engagement**: Post-level engagement trends, posting cadence and outlier posts
 
 ### How to Use
 
-1. Start from the Home page to load the profile data
+1. Start from the Home page and pick a profile if several are available
 2. Navigate through the different sections using the sidebar
 3. Explore the visualizations and insights
 
@@ -1,8 +1,18 @@
 import streamlit as st
 import os
-import json
-import re
-from openai import OpenAI
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dashboard.answer_cache import DEFAULT_SIMILARITY, DEFAULT_TTL, AnswerCache
+from dashboard.chat import DEFAULT_MODEL, DEFAULT_TIMEOUT, build_messages, format_metrics, stream_completion
+from dashboard.clients import DEFAULT_CONNECT_TIMEOUT, ClientManager, key_hash, resolve_base_url
+from dashboard.context import DEFAULT_CONTEXT_TOKENS, get_context
+from dashboard.dev_panel import begin_rerun, dev_panel
+from dashboard.instrumentation import cache_result
+from dashboard.memory import DEFAULT_MAX_TURNS, DEFAULT_MEMORY_TOKENS, ConversationMemory, make_summariser
+from dashboard.retrieval import DEFAULT_TOP_K, retrieve_posts_context
+from dashboard.session import current_profile
+from dashboard.transcript import TRANSCRIPT_WINDOW, render_window, window_start
 
 # Configure the chat page
 st.set_page_config(
@@ -12,82 +22,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Time this rerun for the developer panel
+begin_rerun()
+
 st.title("AI Chat Assistant")
 st.markdown(
     "Ask your questions about the influencer. For example, try: *what should this influencer do to improve retention?* "
     "or *is he a good fit to sell my product?*"
 )
 
-# Function to create a more detailed context from the Instagram data
-def create_detailed_context(profile_data):
-    # Extract essential profile info
-    profile = profile_data.get("data", {})
-    
-    # Format follower count
-    followers = profile.get("usersCount", 0)
-    if followers >= 1_000_000:
-        followers_formatted = f"{followers/1_000_000:.1f}M"
-    elif followers >= 1_000:
-        followers_formatted = f"{followers/1_000:.1f}K"
-    else:
-        followers_formatted = str(followers)
-    
-    # Get engagement metrics
-    avg_likes = profile.get("avgLikes", 0)
-    avg_comments = profile.get("avgComments", 0)
-    avg_er = profile.get("avgER", 0)
-    
-    # Calculate engagement rate if not available
-    if avg_er == 0 and followers > 0:
-        avg_er = (avg_likes + avg_comments) / followers
-    
-    # Extract top countries and cities
-    countries = profile.get("membersCountries", [])
-    top_countries = [f"{country.get('name', 'Unknown')}: {country.get('value', 0)*100:.1f}%" 
-                    for country in countries[:5] if "name" in country]
-    
-    cities = profile.get("membersCities", [])
-    top_cities = [f"{city.get('name', 'Unknown')}: {city.get('value', 0)*100:.1f}%" 
-                 for city in cities[:5] if "name" in city]
-    
-    # Extract recent posts for content analysis
-    recent_posts = [post.get("text", "") for post in profile.get("lastPosts", [])[:3]]
-    recent_posts_formatted = "\n\n".join([f"- \"{post}\"" for post in recent_posts if post])
-    
-    # Build detailed context
-    context = f"""
-INSTAGRAM PROFILE ANALYSIS:
-
-Basic Information:
-- Name: {profile.get('name', 'N/A')}
-- Username: @{profile.get('screenName', 'N/A')}
-- Followers: {followers_formatted} ({followers} total)
-- Description: "{profile.get('description', 'N/A')}"
-- Verified: {"Yes" if profile.get('verified', False) else "No"}
-
-Content Categories:
-- {', '.join(profile.get('categories', ['N/A']))}
-
-Profile Tags:
-- {', '.join(profile.get('tags', ['N/A']))}
-
-Audience Demographics:
-- Top Countries: {', '.join(top_countries) if top_countries else 'N/A'}
-- Top Cities: {', '.join(top_cities) if top_cities else 'N/A'}
-- Gender Split: {"Male-dominated" if profile.get('gender') == 'm' else "Female-dominated" if profile.get('gender') == 'f' else "Mixed"}
-- Age Group: {profile.get('age', 'N/A').replace('_', '-')}
-
-Engagement Metrics:
-- Average Likes: {avg_likes:,}
-- Average Comments: {avg_comments:,}
-- Engagement Rate: {avg_er*100:.2f}%
-- Fake Followers Percentage: {profile.get('pctFakeFollowers', 0)*100:.1f}%
-
-Recent Content Examples:
-{recent_posts_formatted}
-"""
-    return context
-
 # API Key handling - keeping original implementation
 api_key = st.sidebar.text_input("Enter your OpenAI API key", type="password")
 if not api_key:
@@ -105,85 +48,148 @@ if not api_key:
 # Initialize chat history if it doesn't exist
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+# Latency metrics per agent message, keyed by its index in chat_history
+if "chat_metrics" not in st.session_state:
+    st.session_state.chat_metrics = {}
+# Prior turns sent with each question, bounded by a token budget
+max_turns = int(os.environ.get("CHAT_MAX_TURNS", DEFAULT_MAX_TURNS))
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = ConversationMemory(
+        max_tokens=int(os.environ.get("CHAT_MEMORY_TOKENS", DEFAULT_MEMORY_TOKENS)),
+        max_turns=max_turns,
+    )
+
+# Rolling summaries are computed off the script thread, shared by every session
+@st.cache_resource
+def get_summary_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+# Answers to questions that open a conversation are shared across sessions.
+# Near-duplicate matching only runs when CHAT_CACHE_SIMILARITY is set.
+@st.cache_resource
+def get_answer_cache():
+    similarity = os.environ.get("CHAT_CACHE_SIMILARITY")
+    return AnswerCache(
+        ttl=float(os.environ.get("CHAT_CACHE_TTL", DEFAULT_TTL)),
+        similarity=float(similarity) if similarity else DEFAULT_SIMILARITY,
+    )
+
+answer_cache = get_answer_cache()
+
+# Function to keep the displayed history within max_turns, shifting the
+# per-message metrics along with it
+def trim_history():
+    excess = len(st.session_state.chat_history) - 2 * max_turns
+    if excess > 0:
+        del st.session_state.chat_history[:excess]
+        st.session_state.chat_metrics = {
+            i - excess: m for i, m in st.session_state.chat_metrics.items() if i >= excess
+        }
 
-# Initialize the OpenAI client with the provided API key
-client = OpenAI(api_key=api_key)
+# OpenAI clients are shared across reruns and sessions, one per API key and
+# endpoint, so their HTTP connections stay open between questions. The openai
+# package is only imported once a key has been entered.
+@st.cache_resource
+def get_client_manager():
+    return ClientManager(
+        connect_timeout=float(os.environ.get("CHAT_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        read_timeout=float(os.environ.get("CHAT_REQUEST_TIMEOUT", DEFAULT_TIMEOUT)),
+    )
 
-# Load Instagram data from file if not in session state
+client_manager = get_client_manager()
+client = client_manager.get(api_key)
+
+# Get the shared profile snapshot for this session
+snapshot = current_profile()
+
+# Build the context within the token budget; it is shared by every session on
+# the same profile, and comes with a prebuilt snapshot built for this budget
 if "detailed_profile_context" not in st.session_state:
+    context_tokens = int(os.environ.get("CHAT_CONTEXT_TOKENS", DEFAULT_CONTEXT_TOKENS))
+    prebuilt_context = (snapshot.artifacts or {}).get("context")
     try:
-        with open("data/instagram_data.txt", "r") as f:
-            content = f.read()
-            
-            # Extract JSON data
-            match = re.search(r"Raw JSON Data:\n(.*?)(\n\n|$)", content, re.DOTALL)
-            if match:
-                json_str = match.group(1).strip()
-                data = json.loads(json_str)
-                
-                # Create detailed context
-                st.session_state.detailed_profile_context = create_detailed_context(data)
-                st.session_state.instagram_data = data
-            else:
-                st.error("JSON data not found in file.")
-                st.session_state.detailed_profile_context = "Error loading Instagram data."
+        if prebuilt_context is not None and prebuilt_context["budget"] == context_tokens:
+            context, context_report = prebuilt_context["text"], prebuilt_context["report"]
+        else:
+            context, context_report = get_context(snapshot.model, snapshot.content_hash, max_tokens=context_tokens)
+        st.session_state.detailed_profile_context = context
+        st.session_state.context_report = context_report
     except Exception as e:
         st.error(f"Error loading Instagram data: {str(e)}")
         st.session_state.detailed_profile_context = "Error loading Instagram data."
 
-# Get profile data - either from session state or from directly loaded file
 profile_context = st.session_state.get("detailed_profile_context", "No profile data available.")
 
+# Connection reuse for this session's client
+for pool in client_manager.stats()["clients"]:
+    if pool["key"] == key_hash(api_key) and pool["base_url"] == resolve_base_url():
+        open_connections = "?" if pool["open"] is None else f"{pool['open']} open, {pool['idle']} idle"
+        st.sidebar.caption(f"API connections: {open_connections} · {pool['requests']} requests · {pool['base_url']}")
+
 # Display profile summary
-if "instagram_data" in st.session_state:
-    with st.expander("👤 Profile Summary", expanded=False):
-        profile = st.session_state.instagram_data.get("data", {})
-        
-        col1, col2 = st.columns([1, 3])
-        
-        with col1:
-            if profile.get("image"):
-                st.image(profile.get("image"), width=150)
-        
-        with col2:
-            st.subheader(f"{profile.get('name', 'N/A')} (@{profile.get('screenName', 'N/A')})")
-            st.write(profile.get("description", ""))
-            
-            metrics_cols = st.columns(3)
-            metrics_cols[0].metric("Followers", f"{profile.get('usersCount', 0):,}")
-            metrics_cols[1].metric("Avg. Likes", f"{profile.get('avgLikes', 0):,}")
-            metrics_cols[2].metric("Avg. Comments", f"{profile.get('avgComments', 0):,}")
-
-# Function to generate a response using OpenAI's Chat API
-def generate_response(question):
-    # System prompt to guide the model's behavior
-    system_prompt = """
-    You are an expert marketing and influencer consultant with deep knowledge of social media analytics.
-    Provide thoughtful advice and actionable insights based on the Instagram profile data provided.
-    Include specific recommendations tied to the profile's audience demographics, content style, and engagement metrics.
-    Support your analysis with data from the profile when relevant.
-    Be concise but comprehensive in your answers.
-    """
+with st.expander("👤 Profile Summary", expanded=False):
+    profile = snapshot.model.info
     
-    # Prepare the conversation messages with context
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "system", "content": profile_context},
-        {"role": "user", "content": question},
-    ]
+    col1, col2 = st.columns([1, 3])
     
-    try:
-        # Call the OpenAI ChatCompletion API using the client
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.7,
-        )
+    with col1:
+        if profile.image:
+            st.image(profile.image, width=150)
+    
+    with col2:
+        st.subheader(f"{profile.name} (@{profile.screen_name})")
+        st.write(profile.description)
         
-        answer = response.choices[0].message.content.strip()
-        return answer
+        metrics_cols = st.columns(3)
+        metrics_cols[0].metric("Followers", f"{profile.users_count:,}")
+        metrics_cols[1].metric("Avg. Likes", f"{profile.avg_likes:,}")
+        metrics_cols[2].metric("Avg. Comments", f"{profile.avg_comments:,}")
+
+    context_report = st.session_state.get("context_report")
+    if context_report:
+        counts = context_report["counts"]
+        available = context_report["available"]
+        st.caption(
+            f"Chat context: {context_report['total']:,} / {context_report['budget']:,} tokens · "
+            + " · ".join(f"{counts[name]}/{available[name]} {name}" for name in counts)
+        )
+
+# Function to stream a response using OpenAI's Chat API; the deltas are
+# also collected in `streamed`, so an interrupted answer can still be kept
+def generate_response(question, metrics, streamed):
+    # Pull only the posts relevant to this question
+    posts_context = None
+    posts = snapshot.model.posts
+    if len(posts):
+        started = time.perf_counter()
+        posts_context = retrieve_posts_context(
+            snapshot.content_hash, posts, question,
+            k=int(os.environ.get("CHAT_RETRIEVAL_TOP_K", DEFAULT_TOP_K)),
+        )
+        metrics["retrieval_ms"] = (time.perf_counter() - started) * 1000
+
+    # Prepare the conversation messages with context. The system prompt and
+    # profile context come first and never change within a profile, so the
+    # provider can reuse its cached prefix across requests; the retrieved
+    # posts go right before the question.
+    messages = build_messages(
+        profile_context, question, st.session_state.chat_memory.messages(), posts_context
+    )
+    
+    try:
+        # Stream the answer from the OpenAI ChatCompletion API using the client
+        for delta in stream_completion(
+            client,
+            messages,
+            metrics,
+            model=DEFAULT_MODEL,
+            timeout=float(os.environ.get("CHAT_REQUEST_TIMEOUT", DEFAULT_TIMEOUT)),
+        ):
+            streamed.append(delta)
+            yield delta
     except Exception as e:
-        return f"Error: {str(e)}"
+        metrics["error"] = True
+        yield f"Error: {str(e)}"
 
 # Chat interface with a clear visual distinction
 st.markdown("### Chat")
@@ -200,21 +206,69 @@ with st.form("chat_form", clear_on_submit=True):
         # Add user message to chat history
         st.session_state.chat_history.append(("You", user_input))
         
-        # Show a spinner while generating the response
-        with st.spinner("Thinking..."):
-            # Generate and store the agent's response
-            answer = generate_response(user_input)
+        # Questions that open a conversation don't depend on earlier turns, so
+        # their answers can be shared through the answer cache
+        memory = st.session_state.chat_memory
+        opening_question = memory.is_empty()
+        cached = None
+        if opening_question:
+            cached = answer_cache.get(snapshot.content_hash, DEFAULT_MODEL, user_input)
+            cache_result("answer_cache", cached is not None)
+
+        metrics = {}
+        answer = None
+        streamed = []
+        try:
+            if cached is not None:
+                answer, metrics["cached"] = cached
+            else:
+                # Render the answer as it streams in, then hand it over to the history below
+                placeholder = st.empty()
+                with placeholder.container():
+                    answer = st.write_stream(generate_response(user_input, metrics, streamed))
+                placeholder.empty()
+        finally:
+            # A rerun (e.g. the next question) interrupts write_stream; the
+            # partial reply is still recorded so every question keeps its
+            # answer and trim_history() drops whole turns
+            if answer is None:
+                metrics["cancelled"] = True
+                answer = "".join(streamed) or "(no answer)"
+            answer = answer.strip() if isinstance(answer, str) else str(answer)
             st.session_state.chat_history.append(("Agent", answer))
+            st.session_state.chat_metrics[len(st.session_state.chat_history) - 1] = metrics
+            trim_history()
 
-# Display the conversation history with better styling
-for i, (speaker, message) in enumerate(st.session_state.chat_history):
-    if speaker == "You":
-        st.markdown(f"<div style='background-color:#F0F2F6; padding:10px; border-radius:5px; margin-bottom:10px;'><b>You:</b> {message}</div>", unsafe_allow_html=True)
-    else:
-        st.markdown(f"<div style='background-color:#E1F5FE; padding:10px; border-radius:5px; margin-bottom:10px;'><b>AI Assistant:</b> {message}</div>", unsafe_allow_html=True)
+        # Remember the turn and fold older turns into the summary in the background
+        if not metrics.get("error") and not metrics.get("cancelled"):
+            if opening_question and cached is None:
+                answer_cache.put(snapshot.content_hash, DEFAULT_MODEL, user_input, answer)
+            memory.add_turn(user_input, answer)
+            memory.summarise_async(make_summariser(client), get_summary_executor())
+
+# Display the latest window of the conversation as a single block; each
+# message's HTML is rendered once and cached, so reruns cost the same however
+# long the conversation gets
+history = st.session_state.chat_history
+shown = st.session_state.setdefault("transcript_window", TRANSCRIPT_WINDOW)
+start = window_start(len(history), shown)
+if start > 0 and st.button(f"Load earlier messages ({start} hidden)"):
+    shown = st.session_state.transcript_window = shown + TRANSCRIPT_WINDOW
+    start = window_start(len(history), shown)
+if history:
+    captions = {
+        i: format_metrics(metrics) for i, metrics in st.session_state.chat_metrics.items() if i >= start
+    }
+    st.markdown(render_window(history, start, captions), unsafe_allow_html=True)
 
 # Add a clear button to reset the conversation
 if st.session_state.chat_history:
     if st.button("Clear Conversation"):
         st.session_state.chat_history = []
-        st.experimental_rerun()
\ No newline at end of file
+        st.session_state.chat_metrics = {}
+        st.session_state.chat_memory.clear()
+        st.session_state.transcript_window = TRANSCRIPT_WINDOW
+        st.experimental_rerun()
+
+# Developer panel with this rerun's timings, when enabled
+dev_panel("Chat")
@@ -0,0 +1,100 @@
+import streamlit as st
+
+from dashboard.charts import distribution_chart, heatmap_chart, rolling_er_chart
+from dashboard.dev_panel import begin_rerun, dev_panel
+from dashboard.engagement import ROLLING_WINDOW, profile_engagement
+from dashboard.instrumentation import span
+from dashboard.session import current_profile
+
+# Configure the page
+st.set_page_config(
+    page_title="Engagement - Instagram Analytics",
+    page_icon="📈",
+    layout="wide"
+)
+
+# Time this rerun for the developer panel
+begin_rerun()
+
+snapshot = current_profile()
+info = snapshot.model.info
+
+st.title("Engagement Analytics")
+st.write("Explore how the profile's recent posts perform over time.")
+
+if not len(snapshot.model.posts):
+    st.info("No post data available.")
+    st.stop()
+
+window = st.sidebar.slider("Rolling window (posts)", min_value=2, max_value=30, value=ROLLING_WINDOW)
+# A prebuilt snapshot holds the metrics and charts for the default window;
+# otherwise metrics are computed once per profile and window, and shared by
+# every session
+prebuilt = (snapshot.artifacts or {}).get("engagement")
+if prebuilt is not None and prebuilt["window"] == window:
+    metrics = prebuilt["metrics"]
+    chart_specs = snapshot.artifacts["charts"]
+else:
+    metrics = profile_engagement(snapshot.model, snapshot.content_hash, window)
+    chart_specs = {}
+cadence = metrics["cadence"]
+
+# Function to draw a chart from its prebuilt spec, or build it live; Altair
+# is only imported in the second case
+def draw_chart(name, build):
+    with span(f"chart.{name}"):
+        spec = chart_specs.get(name)
+        if spec is not None:
+            st.vega_lite_chart(spec, use_container_width=True)
+        else:
+            st.altair_chart(build(), use_container_width=True)
+
+# --- Summary ---
+stats_cols = st.columns(4)
+stats_cols[0].metric("Avg. ER (profile)", f"{info.avg_er * 100:.2f}%" if info.avg_er else "N/A")
+stats_cols[1].metric("Avg. ER (recent posts)", f"{metrics['post_er'] * 100:.2f}%" if metrics["post_er"] is not None else "N/A")
+stats_cols[2].metric("Posts per week", f"{cadence['posts_per_week']:.1f}" if cadence["posts_per_week"] else "N/A")
+stats_cols[3].metric("Median gap", f"{cadence['median_gap_days']:.1f} days" if cadence["median_gap_days"] is not None else "N/A")
+
+# --- Rolling ER ---
+st.header("Engagement Rate Over Time")
+rolling = metrics["rolling"]
+if not rolling.empty and rolling["er"].notna().any():
+    draw_chart("rolling_er", lambda: rolling_er_chart(rolling))
+    st.caption(f"Line: rolling mean over the last {window} posts.")
+else:
+    st.info("Not enough dated posts to chart engagement over time.")
+
+# --- Distributions ---
+st.header("Likes and Comments Distribution")
+posts = metrics["posts"]
+col1, col2 = st.columns(2)
+for col, field in ((col1, "likes"), (col2, "comments")):
+    with col:
+        draw_chart(field, lambda: distribution_chart(posts, field))
+        stats = metrics["distributions"][field]
+        if stats:
+            st.caption(f"Median {stats['median']:,.0f} · p90 {stats['p90']:,.0f} · mean {stats['mean']:,.0f}")
+
+# --- Heatmap ---
+st.header("When Posts Perform Best")
+heatmap = metrics["heatmap"]
+if not heatmap.empty:
+    draw_chart("heatmap", lambda: heatmap_chart(heatmap))
+else:
+    st.info("No dated posts available.")
+
+# --- Outliers ---
+st.header("Outlier Posts")
+outliers = metrics["outliers"]
+if not outliers.empty:
+    st.dataframe(
+        outliers[["date", "likes", "comments", "er", "direction", "text"]],
+        use_container_width=True,
+        hide_index=True,
+    )
+else:
+    st.info("No posts stand out from the profile's usual engagement.")
+
+# Developer panel with this rerun's timings, when enabled
+dev_panel("Engagement")
@@ -0,0 +1,54 @@
+"""Compare the memory held by a raw parsed export and by its ProfileModel.
+
+Usage::
+
+    python scripts/bench_profile_memory.py --scales 1 10 100 1000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard.model import ProfileModel  # noqa: E402
+from dashboard.synthetic import make_export  # noqa: E402
+
+
+def measure(scale):
+    text = json.dumps(make_export(scale))
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+
+    raw = json.loads(text)
+    raw_bytes = tracemalloc.get_traced_memory()[0] - base
+
+    started = time.perf_counter()
+    model = ProfileModel.from_export(raw)
+    build_ms = (time.perf_counter() - started) * 1000
+    del raw
+    gc.collect()
+    model_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del model
+    return len(text), raw_bytes, model_bytes, build_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'scale':>7} {'json':>10} {'raw dict':>10} {'model':>10} {'ratio':>6} {'build':>9}")
+    for scale in args.scales:
+        json_bytes, raw_bytes, model_bytes, build_ms = measure(scale)
+        print(f"{scale:>7g} {json_bytes / 1024:>8.0f}KB {raw_bytes / 1024:>8.0f}KB {model_bytes / 1024:>8.0f}KB "
+              f"{raw_bytes / max(model_bytes, 1):>5.1f}x {build_ms:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Report what each dashboard page imports at load time, and how long it takes.
+
+For every page, the imports executed at module level (not those deferred
+inside functions) are timed in a fresh interpreter with ``python -X
+importtime``, so numbers reflect a cold start. With ``--first-paint``, Home.py
+is also run headlessly through Streamlit's AppTest and the time to its first
+complete render is checked against a budget.
+
+Usage::
+
+    python scripts/import_profile.py                    # report only
+    python scripts/import_profile.py --budget-ms 1500   # fail if any page's imports exceed 1.5s
+    python scripts/import_profile.py --first-paint --home-budget-ms 2000
+"""
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target for Home.py's first complete render, cold, in milliseconds
+HOME_FIRST_PAINT_BUDGET_MS = 2000
+
+
+def page_files():
+    return [os.path.join(ROOT, "Home.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+
+# Returns the import statements a page runs at module level, in order
+def eager_imports(path):
+    with open(path, "r") as f:
+        tree = ast.parse(f.read(), path)
+    statements = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and getattr(node, "level", 0) == 0:
+            statements.append(ast.unparse(node))
+    return statements
+
+
+def _run_importtime(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        # Only top-level entries; nested imports are indented under their parent
+        if not line.split("|")[2].startswith("  "):
+            timings[name] = timings.get(name, 0) + int(cumulative)
+    return timings
+
+
+# Runs the imports in a fresh interpreter and returns {module: cumulative_us}
+# for every module imported directly at the top level, leaving out what the
+# interpreter imports at startup anyway
+def time_imports(statements):
+    startup = _run_importtime("pass")
+    timings = _run_importtime("\n".join(statements) or "pass")
+    return {name: us for name, us in timings.items() if name not in startup}
+
+
+def first_paint_ms():
+    code = (
+        "import time; t = time.perf_counter()\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        "AppTest.from_file('Home.py', default_timeout=60).run()\n"
+        "print((time.perf_counter() - t) * 1000)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "AppTest failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, help="fail if a page's eager imports take longer than this")
+    parser.add_argument("--top", type=int, default=8, help="modules to list per page")
+    parser.add_argument("--first-paint", action="store_true", help="also time Home.py's first render with AppTest")
+    parser.add_argument("--home-budget-ms", type=float, default=HOME_FIRST_PAINT_BUDGET_MS)
+    args = parser.parse_args()
+
+    failures = []
+    for path in page_files():
+        page = os.path.relpath(path, ROOT)
+        try:
+            timings = time_imports(eager_imports(path))
+        except RuntimeError as e:
+            print(f"{page}: could not import ({e})")
+            failures.append(f"{page} could not be imported")
+            continue
+        total_ms = sum(timings.values()) / 1000
+        print(f"{page}: {total_ms:.0f}ms")
+        for name, us in sorted(timings.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {us / 1000:8.1f}ms  {name}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            failures.append(f"{page} imports took {total_ms:.0f}ms (budget {args.budget_ms:.0f}ms)")
+
+    if args.first_paint:
+        started = time.perf_counter()
+        try:
+            paint_ms = first_paint_ms()
+        except RuntimeError as e:
+            failures.append(f"Home.py first paint failed: {e}")
+        else:
+            print(f"Home.py first paint: {paint_ms:.0f}ms (budget {args.home_budget_ms:.0f}ms, "
+                  f"wall {1000 * (time.perf_counter() - started):.0f}ms incl. interpreter start)")
+            if paint_ms > args.home_budget_ms:
+                failures.append(f"Home.py first paint took {paint_ms:.0f}ms (budget {args.home_budget_ms:.0f}ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Load-test the dashboard with many concurrent sessions on one real server.
+
+Starts a single ``streamlit run Home.py`` server (one replica) and drives
+--sessions sessions against it over Streamlit's websocket protocol, at most
+--concurrency at a time. Each session is one connection, as one browser tab
+is: Home, then every other page, then a question on the Chat page, with its
+session_state carried from page to page. Concurrent sessions run in the same
+server process, so they contend for its script threads, locks and
+process-wide caches exactly as real users would. Google Trends is replaced
+by a pytrends stub (scripts/stubs) and OpenAI by the local stub server
+(scripts/mock_openai_server.py), each with a configurable latency, so
+nothing leaves the machine.
+
+Reports p50/p95/p99 rerun latency per step, the replica's throughput, and
+the server's RSS growth per session once it is warm. Sessions stay connected
+until the last one has run, so RSS is sampled with every session's state
+still held by the server. Runs in a scratch
+directory with a synthetic export unless --data is given. Needs the
+``websockets`` package.
+
+Usage::
+
+    python scripts/load_test.py --sessions 50 --concurrency 10
+    python scripts/load_test.py --sessions 20 --pages home tags chat --trends-delay 0.5 --json report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS_DIR = os.path.join(REPO_ROOT, "scripts", "stubs")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+
+from mock_openai_server import make_handler  # noqa: E402
+
+# Page name -> URL path the browser would open it at
+PAGES = {
+    "home": "",
+    "demographics": "Audience_Demographics",
+    "tags": "Tags_Analysis",
+    "about": "About",
+    "chat": "Chat",
+    "engagement": "Engagement",
+}
+QUESTION = "Is this influencer a good fit to sell my product?"
+ANSWER = "This creator's audience is a good fit for lifestyle brands."
+SERVER_START_TIMEOUT = 60.0
+
+
+def start_openai_stub(first_token_delay, token_delay):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(ANSWER, first_token_delay, token_delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Function to start the dashboard server in `workdir` and wait until it is
+# healthy. Returns (process, base URL); its output goes to server.log.
+def start_server(workdir, env):
+    port = _free_port()
+    log = open(os.path.join(workdir, "server.log"), "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(REPO_ROOT, "Home.py"),
+         "--global.developmentMode", "false", "--server.headless", "true",
+         "--server.address", "127.0.0.1", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false", "--logger.level", "error"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    log.close()
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"{base_url}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    with open(os.path.join(workdir, "server.log")) as f:
+        raise RuntimeError(f"the dashboard server didn't start:\n{f.read()[-2000:]}")
+
+
+def rss_bytes(pid):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+# One browser tab: a websocket to the server, the page it is on, and the
+# widget values the frontend sends back with every rerun
+class BrowserSession:
+    def __init__(self, base_url, timeout):
+        self.url = base_url.replace("http://", "ws://", 1) + "/_stcore/stream"
+        self.timeout = timeout
+        self.page = ""
+        self.widgets = {}  # widget id -> WidgetState
+        self.elements = []
+        self._ws = None
+
+    async def __aenter__(self):
+        from websockets.asyncio.client import connect
+
+        self._ws = await connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._ws.close()
+
+    # Function to run the current page again, or open `page`, and collect the
+    # elements it draws until the script finishes. One-shot widget values
+    # such as button clicks go in `triggers`.
+    async def rerun(self, page=None, triggers=()):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        if page is not None and page != self.page:
+            self.page = page
+            self.widgets = {}  # the frontend drops the widgets of the page it leaves
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_name = self.page
+        msg.rerun_script.widget_states.widgets.extend([*self.widgets.values(), *triggers])
+        await self._ws.send(msg.SerializeToString())
+        self.elements = []
+        await asyncio.wait_for(self._receive(), self.timeout)
+        return self.elements
+
+    async def _receive(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self._ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                self.elements.append(msg.delta.new_element)
+            elif kind == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    def find(self, kind, label):
+        for element in self.elements:
+            if element.WhichOneof("type") == kind and getattr(element, kind).label == label:
+                return getattr(element, kind)
+        raise LookupError(f"no {kind} labelled {label!r} on the page")
+
+    def set_text(self, kind, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self.find(kind, label).id
+        self.widgets[widget_id] = WidgetState(id=widget_id, string_value=value)
+
+    def click(self, label):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return WidgetState(id=self.find("button", label).id, trigger_value=True)
+
+
+def _answered(elements):
+    return any(e.WhichOneof("type") == "markdown" and ANSWER in e.markdown.body for e in elements)
+
+
+async def _step(results, step, session, check=None, **rerun_args):
+    started = time.perf_counter()
+    message = None
+    try:
+        elements = await session.rerun(**rerun_args)
+    except Exception as e:
+        message = f"{type(e).__name__}: {e}"
+    else:
+        exceptions = [e.exception.message for e in elements if e.WhichOneof("type") == "exception"]
+        if exceptions:
+            message = exceptions[0]
+        elif check is not None and not check(elements):
+            message = "check failed: no answer on the page"
+    results.append((step, time.perf_counter() - started, message))
+    return message is None
+
+
+# One simulated user: every page once, plus a question on the Chat page.
+# `hold`, if given, is awaited exactly once after the steps, before the
+# connection is closed. Returns [(step, seconds, error message or None), ...]
+async def run_session(base_url, args, hold=None):
+    results = []
+    try:
+        async with BrowserSession(base_url, args.timeout) as session:
+            for page in args.pages:
+                if not await _step(results, page, session, page=PAGES[page]):
+                    continue
+                if page == "chat":
+                    session.set_text("text_input", "Enter your OpenAI API key", "load-test-key")
+                    if await _step(results, "chat.key", session):
+                        session.set_text("text_area", "Your question", QUESTION)
+                        await _step(results, "chat.question", session, check=_answered,
+                                    triggers=[session.click("Send")])
+                elif page == "home":
+                    await _step(results, "home.rerun", session)
+            if hold is not None:
+                held, hold = hold, None
+                await held()
+    except Exception as e:  # the connection failed, or a widget was missing
+        results.append(("session", 0.0, f"{type(e).__name__}: {e}"))
+    if hold is not None:  # the session failed before it got there
+        await hold()
+    return results
+
+
+class LoadTest:
+    def __init__(self, args, base_url, server_pid):
+        self.args = args
+        self.base_url = base_url
+        self.server_pid = server_pid
+        self.latencies = {}  # step -> [seconds]
+        self.errors = {}  # step -> count
+        self.rss_growth = 0
+
+    def _record(self, results):
+        for step, seconds, message in results:
+            self.latencies.setdefault(step, []).append(seconds)
+            if message is not None:
+                self.errors[step] = self.errors.get(step, 0) + 1
+                if self.args.verbose:
+                    print(f"{step}: {message}", file=sys.stderr)
+
+    async def run(self):
+        args = self.args
+        # Unmeasured sessions first, so modules and process-wide caches are loaded
+        for _ in range(args.warmup):
+            await run_session(self.base_url, args)
+        baseline = rss_bytes(self.server_pid)
+
+        slots = asyncio.Semaphore(args.concurrency)
+        remaining = args.sessions
+        all_ran = asyncio.Event()
+        elapsed = None
+
+        # Each session frees its slot once its steps are done, but keeps its
+        # connection open until every session has run, so the RSS sample
+        # counts the state of all of them
+        async def hold():
+            nonlocal remaining, elapsed
+            slots.release()
+            remaining -= 1
+            if remaining == 0:
+                elapsed = time.perf_counter() - started
+                self.rss_growth = rss_bytes(self.server_pid) - baseline
+                all_ran.set()
+            await all_ran.wait()
+
+        async def session():
+            await slots.acquire()
+            self._record(await run_session(self.base_url, args, hold))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(session() for _ in range(args.sessions)))
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        steps = {}
+        for step, values in self.latencies.items():
+            cuts = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+            steps[step] = {
+                "reruns": len(values),
+                "errors": self.errors.get(step, 0),
+                "p50_ms": cuts[49] * 1000,
+                "p95_ms": cuts[94] * 1000,
+                "p99_ms": cuts[98] * 1000,
+            }
+        reruns = sum(len(v) for k, v in self.latencies.items() if k != "session")
+        return {
+            "sessions": self.args.sessions,
+            "concurrency": self.args.concurrency,
+            "replicas": 1,
+            "elapsed_s": elapsed,
+            "reruns_per_s": reruns / elapsed,
+            "sessions_per_s": self.args.sessions / elapsed,
+            "rss_growth_mb": self.rss_growth / 2**20,
+            "rss_per_session_kb": self.rss_growth / self.args.sessions / 1024,
+            "steps": steps,
+        }
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions, {report['concurrency']} concurrent on one server, "
+          f"{report['elapsed_s']:.1f}s")
+    print(f"Throughput of the replica: {report['reruns_per_s']:.1f} reruns/s, "
+          f"{report['sessions_per_s']:.2f} sessions/s")
+    print(f"Server RSS growth: {report['rss_growth_mb']:.1f} MB ({report['rss_per_session_kb']:.0f} KB per session)")
+    print(f"{'step':<16}{'reruns':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step, s in report["steps"].items():
+        print(f"{step:<16}{s['reruns']:>8}{s['errors']:>8}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--data", help="export to serve (default: a synthetic one)")
+    parser.add_argument("--scale", type=float, default=1, help="size of the synthetic export, x the sample")
+    parser.add_argument("--trends-delay", type=float, default=0.2, help="seconds per stubbed Trends payload")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="stub OpenAI time to first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="stub OpenAI delay between tokens")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="let sessions share cached answers; by default every question reaches the stub")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured sessions run before the clock starts")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per rerun")
+    parser.add_argument("--json", help="also write the report here")
+    parser.add_argument("--verbose", action="store_true", help="print each failed step")
+    args = parser.parse_args()
+
+    from dashboard.synthetic import make_export_text
+
+    workdir = tempfile.mkdtemp(prefix="dashboard-load-")
+    os.makedirs(os.path.join(workdir, "data"))
+    data_path = os.path.join(workdir, "data", "instagram_data.txt")
+    if args.data:
+        shutil.copyfile(args.data, data_path)
+    else:
+        with open(data_path, "w") as f:
+            f.write(make_export_text(args.scale))
+
+    # The server finds the stubs and its settings through the environment
+    openai_stub, openai_url = start_openai_stub(args.first_token_delay, args.token_delay)
+    env = dict(os.environ, OPENAI_BASE_URL=openai_url, LOAD_TEST_TRENDS_DELAY=str(args.trends_delay))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [STUBS_DIR, REPO_ROOT, os.environ.get("PYTHONPATH")]))
+    if not args.answer_cache:
+        env["CHAT_CACHE_TTL"] = "0"
+    server = None
+    try:
+        server, base_url = start_server(workdir, env)
+        report = asyncio.run(LoadTest(args, base_url, server.pid).run())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        openai_stub.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
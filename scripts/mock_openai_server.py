@@ -0,0 +1,125 @@
+"""Minimal OpenAI-compatible server for exercising the Chat page locally.
+
+Serves ``POST /v1/chat/completions`` (streaming and non-streaming) with a
+canned answer, emitted word by word after a configurable delay. With
+``--fail-rate`` a share of requests fails with a 429 or 500, to exercise
+retries. Point the app at it with::
+
+    python scripts/mock_openai_server.py --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 streamlit run Home.py
+
+and enter any API key on the Chat page.
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "This creator's audience is concentrated in a few markets, and engagement is steady. "
+    "Brands that match the profile's main categories are likely to be a good fit."
+)
+
+
+def make_handler(answer, first_token_delay, token_delay, fail_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if random.random() < fail_rate:
+                status = random.choice((429, 500))
+                self._send_json(status, {"error": {"message": f"Simulated {status} error"}})
+                return
+            model = request.get("model", "mock")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            words = answer.split(" ")
+            prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                     "total_tokens": prompt_tokens + len(words)}
+
+            time.sleep(first_token_delay)
+            if not request.get("stream"):
+                time.sleep(token_delay * len(words))
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": answer}}],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            # Chunked, so the connection stays open for the client's next request
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_chunk(data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def send(delta, finish_reason=None):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+            try:
+                send({"role": "assistant", "content": ""})
+                for i, word in enumerate(words):
+                    send({"content": word if i == 0 else f" {word}"})
+                    time.sleep(token_delay)
+                send({}, finish_reason="stop")
+                write_chunk(b"data: [DONE]\n\n")
+                write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # the client cancelled the stream
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--answer", default=DEFAULT_ANSWER)
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="seconds between streamed tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with a 429/500")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.answer, args.first_token_delay, args.token_delay, args.fail_rate))
+    print(f"Mock OpenAI server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Offline stand-in for pytrends, used by scripts/load_test.py."""
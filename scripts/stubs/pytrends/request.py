@@ -0,0 +1,23 @@
+"""pytrends.request stand-in: every payload is answered after
+LOAD_TEST_TRENDS_DELAY seconds with random weekly interest per keyword."""
+import os
+import random
+import time
+
+import pandas as pd
+
+DELAY = float(os.environ.get("LOAD_TEST_TRENDS_DELAY", "0"))
+
+
+class TrendReq:
+    def __init__(self, *args, **kwargs):
+        self._keywords = []
+
+    def build_payload(self, kw_list, timeframe=None, geo=None):
+        self._keywords = list(kw_list)
+
+    def interest_over_time(self):
+        time.sleep(DELAY)
+        rng = random.Random(hash(tuple(self._keywords)))
+        index = pd.date_range(end="2024-12-29", periods=52, freq="W")
+        return pd.DataFrame({k: [rng.randint(1, 100) for _ in index] for k in self._keywords}, index=index)
@@ -0,0 +1,51 @@
+import pytest
+
+from dashboard.answer_cache import AnswerCache
+
+PROFILE = "profile-hash"
+MODEL = "model"
+
+
+def _cache(similarity=0.9):
+    return AnswerCache(similarity=similarity)
+
+
+def test_near_duplicates_off_by_default():
+    cache = AnswerCache()
+    cache.put(PROFILE, MODEL, "Is this creator a good fit for a skincare brand?", "yes")
+    assert cache.get(PROFILE, MODEL, "is this creator a good fit for a skincare brand") == ("yes", "exact")
+    assert cache.get(PROFILE, MODEL, "Is this creator a good fit for a skincare brand please?") is None
+
+
+def test_reordered_words_hit():
+    cache = _cache(similarity=0.8)
+    cache.put(PROFILE, MODEL, "What brands would be a good fit for this creator?", "answer")
+    assert cache.get(PROFILE, MODEL, "What brands would be a good fit for this creator please?") == ("answer", "similar")
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Would this creator suit a campaign aimed at women?", "Would this creator suit a campaign aimed at men?"),
+    ("Is a budget of $500 enough for a sponsored post?", "Is a budget of $5000 enough for a sponsored post?"),
+    ("How did engagement change in 2024 for this creator?", "How did engagement change in 2025 for this creator?"),
+    ("Is this creator a good fit to sell my product?", "Is this creator not a good fit to sell my product?"),
+    ("Should I work with this creator on a long campaign?", "Shouldn't I work with this creator on a long campaign?"),
+])
+def test_materially_different_questions_miss(cached, asked):
+    cache = _cache()
+    cache.put(PROFILE, MODEL, cached, "answer")
+    assert cache.get(PROFILE, MODEL, asked) is None
+
+
+def test_numbers_and_negations_miss_even_at_a_loose_threshold():
+    cache = _cache(similarity=0.5)
+    cache.put(PROFILE, MODEL, "Is a budget of $500 enough for a sponsored post on this profile?", "answer")
+    cache.put(PROFILE, MODEL, "Is this creator a good fit to sell my product to teenagers?", "answer")
+    assert cache.get(PROFILE, MODEL, "Is a budget of $5000 enough for a sponsored post on this profile?") is None
+    assert cache.get(PROFILE, MODEL, "Is this creator never a good fit to sell my product to teenagers?") is None
+
+
+def test_scoped_to_profile_and_model():
+    cache = _cache()
+    cache.put(PROFILE, MODEL, "Is this creator a good fit?", "answer")
+    assert cache.get("other-profile", MODEL, "Is this creator a good fit?") is None
+    assert cache.get(PROFILE, "other-model", "Is this creator a good fit?") is None
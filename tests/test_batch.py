@@ -0,0 +1,38 @@
+import json
+from types import SimpleNamespace
+
+import pyarrow.parquet as pq
+
+from dashboard.batch import BatchRunner, analyse_export, result_schema
+from dashboard.synthetic import make_export_text
+
+
+def _row(tmp_path, profile_id):
+    path = tmp_path / f"{profile_id}.txt"
+    path.write_text(make_export_text())
+    row = analyse_export(str(path))
+    row.pop("_context")
+    row.pop("_posts_context")
+    return row
+
+
+def test_parquet_keeps_every_column_when_error_rows_come_first(tmp_path):
+    good = _row(tmp_path, "good")
+    scored = dict(_row(tmp_path, "scored"), trend_scores={"a": 50.0, "b": "N/A"},
+                  usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15, "prompt_tokens_details": None})
+    unscored = dict(_row(tmp_path, "unscored"), trend_scores={"a": "N/A", "b": 20.0})
+    staging = tmp_path / "results.parquet.partial.jsonl"
+    with open(staging, "w") as f:
+        for row in ({"profile_id": "broken", "error": "boom"}, good, scored, unscored):
+            f.write(json.dumps(row) + "\n")
+
+    out = tmp_path / "results.parquet"
+    BatchRunner(SimpleNamespace(out=str(out), format="parquet"))._to_parquet()
+    table = pq.read_table(out)
+    assert table.schema.equals(result_schema())
+    rows = {row["profile_id"]: row for row in table.to_pylist()}
+    assert rows["broken"]["error"] == "boom" and rows["broken"]["name"] is None
+    assert rows["good"]["name"] == good["name"] and rows["good"]["trend_scores"] is None
+    assert rows["scored"]["trend_scores"] == [{"tag": "a", "score": 50.0}, {"tag": "b", "score": None}]
+    assert rows["scored"]["usage"]["total_tokens"] == 15
+    assert rows["unscored"]["trend_scores"] == [{"tag": "a", "score": None}, {"tag": "b", "score": 20.0}]
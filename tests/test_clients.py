@@ -0,0 +1,70 @@
+import importlib.util
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from dashboard.chat import build_messages, stream_completion
+from dashboard.clients import ClientManager, key_hash
+
+pytest.importorskip("httpx")
+pytest.importorskip("openai")
+
+ANSWER = "one two three"
+
+
+def _load_mock_server():
+    path = os.path.join(os.path.dirname(__file__), os.pardir, "scripts", "mock_openai_server.py")
+    spec = importlib.util.spec_from_file_location("mock_openai_server", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def server():
+    handler = _load_mock_server().make_handler(ANSWER, 0.0, 0.0)
+    connections = []
+
+    class CountingHandler(handler):
+        def setup(self):
+            connections.append(self.client_address)
+            super().setup()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.connections = connections
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _ask(client):
+    return "".join(stream_completion(client, build_messages("context", "question"), {}))
+
+
+def test_streamed_answers_reuse_one_connection(server):
+    manager = ClientManager()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    client = manager.get("key", base_url)
+    assert _ask(client) == ANSWER
+    assert _ask(manager.get("key", base_url)) == ANSWER
+    assert len(server.connections) == 1
+    pool = manager.stats()["clients"][0]
+    assert (pool["requests"], pool["open"]) == (2, 1)
+    manager.close()
+
+
+def test_evicting_a_client_does_not_close_it(server):
+    manager = ClientManager(max_clients=1)
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    client = manager.get("first", base_url)
+    stream = stream_completion(client, build_messages("context", "question"), {})
+    first_delta = next(stream)
+    manager.get("second", base_url)
+    assert [pool["key"] for pool in manager.stats()["clients"]] == [key_hash("second")]
+    assert first_delta + "".join(stream) == ANSWER
+    assert _ask(client) == ANSWER
+    manager.close()
@@ -0,0 +1,14 @@
+import pandas as pd
+
+from dashboard.demographics import format_numbers
+from dashboard.formatting import format_number
+
+# As read from an export, before the model stores them as floats
+VALUES = [0, 7, 500, 999, 0.25, 12.5, 1000, 1500, 999_999, 2_500_000, 3_000_000_000, -42, -1500]
+
+
+def test_format_numbers_matches_format_number():
+    expected = [format_number(value) for value in VALUES]
+    assert format_numbers(VALUES).tolist() == expected
+    assert format_numbers(pd.Series(VALUES, dtype=float)).tolist() == expected
+    assert expected[2:4] == ["500", "999"]
@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from dashboard.loader import INDEX_SUFFIX, DataLoadError, load_export, payload_offsets
+from dashboard.synthetic import make_export, make_export_text
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    path = tmp_path / "export.txt"
+    path.write_text(make_export_text())
+    return str(path)
+
+
+def _index(path):
+    with open(path + INDEX_SUFFIX) as f:
+        return json.load(f)
+
+
+def test_missing_sidecar_is_written(export_path):
+    assert load_export(export_path) == make_export()
+    stat = os.stat(export_path)
+    index = _index(export_path)
+    assert (index["size"], index["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+    assert (index["start"], index["end"]) == payload_offsets(export_path)
+
+
+def test_stale_sidecar_is_ignored_and_rewritten(export_path):
+    load_export(export_path)
+    # Same file, but the payload now starts further in
+    with open(export_path, "w") as f:
+        f.write("A longer report header than before\n\n" + make_export_text(seed=1))
+    assert load_export(export_path) == make_export(seed=1)
+    assert _index(export_path)["size"] == os.stat(export_path).st_size
+
+
+def test_corrupt_sidecar_is_ignored(export_path):
+    with open(export_path + INDEX_SUFFIX, "w") as f:
+        f.write("{not json")
+    assert load_export(export_path) == make_export()
+
+
+def test_file_without_payload(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("no data here\n")
+    with pytest.raises(DataLoadError):
+        load_export(str(path))
@@ -0,0 +1,38 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dashboard.memory import ConversationMemory
+
+
+def test_clear_drops_a_summary_still_being_built():
+    memory = ConversationMemory(max_tokens=40)
+    for i in range(6):
+        memory.add_turn(f"question {i} " * 5, f"answer {i} " * 5)
+
+    started, release = threading.Event(), threading.Event()
+
+    def summarise(previous, turns):
+        started.set()
+        release.wait(5)
+        return "summary of the old conversation"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = memory.summarise_async(summarise, executor)
+        assert future is not None
+        started.wait(5)
+        memory.clear()
+        release.set()
+        future.result()
+
+    assert memory.is_empty()
+    assert memory.messages() == []
+
+
+def test_summary_replaces_folded_turns():
+    memory = ConversationMemory(max_tokens=40)
+    for i in range(6):
+        memory.add_turn(f"question {i} " * 5, f"answer {i} " * 5)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        memory.summarise_async(lambda previous, turns: "the summary", executor).result()
+    assert memory.summary == "the summary"
+    assert memory.messages()[0]["content"].endswith("the summary")
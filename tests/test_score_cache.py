@@ -0,0 +1,24 @@
+from dashboard.score_cache import EVICT_EVERY, SQLiteScoreCache
+
+
+def _key(i):
+    return (f"tag{i}", "instagram", "today 12-m", "")
+
+
+def test_size_limit_is_enforced_every_few_inserts(tmp_path):
+    cache = SQLiteScoreCache(str(tmp_path / "trends.sqlite"), max_entries=10)
+    for i in range(EVICT_EVERY - 1):
+        cache.set(_key(i), 1.0)
+    assert cache.stats()["size"] == EVICT_EVERY - 1
+    cache.set(_key(EVICT_EVERY), 1.0)
+    assert cache.stats()["size"] == 10
+
+
+def test_recent_hits_survive_eviction(tmp_path):
+    cache = SQLiteScoreCache(str(tmp_path / "trends.sqlite"), max_entries=10)
+    for i in range(EVICT_EVERY - 1):
+        cache.set(_key(i), float(i))
+    assert cache.get(_key(0))[0] == 0.0  # the oldest insert, but just read
+    cache.set(_key(EVICT_EVERY), 1.0)
+    assert cache.get(_key(0)) is not None
+    assert cache.get(_key(1)) is None
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import dashboard.service
+from dashboard.loader import DataLoadError
+from dashboard.service import DataService
+from dashboard.synthetic import make_export_text
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    profiles_dir = tmp_path / "profiles"
+    profiles_dir.mkdir()
+    for seed, profile_id in enumerate(["p1", "p2"]):
+        (profiles_dir / f"{profile_id}.txt").write_text(make_export_text(seed=seed))
+    return DataService(str(tmp_path / "missing.txt"), str(profiles_dir), str(tmp_path / "cache"), snapshot_dir=None)
+
+
+# Rescans on the next call, then waits for the background ingest it starts
+def _rescan(service, monkeypatch):
+    monkeypatch.setattr(dashboard.service, "RESCAN_INTERVAL", 0.0)
+    service.list_profiles()
+    with service._ingest_lock:
+        pass
+
+
+def test_deleted_export_is_no_longer_served(service, monkeypatch):
+    assert [row["profile_id"] for row in service.list_profiles()] == ["p1", "p2"]
+    assert service.profile("p2").profile_id == "p2"
+    assert "p2" in service.tag_index().profile_ids
+
+    os.remove(os.path.join(service.profiles_dir, "p2.txt"))
+    _rescan(service, monkeypatch)
+
+    assert [row["profile_id"] for row in service.list_profiles()] == ["p1"]
+    with pytest.raises(DataLoadError):
+        service.profile("p2")
+    tag_index = service.tag_index()
+    assert len(tag_index) == 1
+    assert all(pid != "p2" for pid, *_ in tag_index.similar_profiles("p1"))
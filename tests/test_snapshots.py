@@ -0,0 +1,76 @@
+import json
+import os
+import pickle
+import time
+
+import pytest
+
+from dashboard.service import ProfileSnapshot
+from dashboard.snapshots import build_artifacts, fresh_trends, load_snapshot, save_snapshot
+from dashboard.synthetic import make_export
+
+SOURCE = (1, 1)
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    snapshot = ProfileSnapshot("", make_export())
+    artifacts, _ = build_artifacts(snapshot)
+    save_snapshot(str(tmp_path), snapshot, artifacts, SOURCE)
+    return str(tmp_path)
+
+
+def test_loaded_model_is_read_only(snapshot_dir):
+    model = load_snapshot(snapshot_dir, "", SOURCE)["model"]
+    for array in (model.countries.values, model.rating_tags.values, model.posts.likes, model.posts.dates):
+        assert not array.flags.writeable
+
+
+def test_changed_source_is_not_served(snapshot_dir):
+    assert load_snapshot(snapshot_dir, "", (2, 1)) is None
+
+
+def test_trends_expire_with_the_cache_ttl():
+    artifacts = {"trends": {"scores": {"a": 100.0}, "fetched_at": time.time() - 7200}}
+    assert fresh_trends(artifacts, ttl=3600) is None
+    assert fresh_trends(artifacts, ttl=86400)["scores"] == {"a": 100.0}
+    assert fresh_trends({}, ttl=3600) is None
+
+
+def test_round_trip_keeps_frames_and_model(snapshot_dir):
+    import pandas as pd
+
+    snapshot = ProfileSnapshot("", make_export())
+    artifacts, _ = build_artifacts(snapshot)
+    payload = load_snapshot(snapshot_dir, "", SOURCE)
+    for kind in ("countries", "cities"):
+        pd.testing.assert_frame_equal(payload["artifacts"]["demographics"][kind], artifacts["demographics"][kind])
+    pd.testing.assert_frame_equal(
+        payload["artifacts"]["engagement"]["metrics"]["posts"], artifacts["engagement"]["metrics"]["posts"]
+    )
+    assert payload["artifacts"]["context"] == artifacts["context"]
+    assert payload["model"].info == snapshot.model.info
+    assert payload["model"].posts.hashtags == snapshot.model.posts.hashtags
+
+
+class Exploit:
+    def __reduce__(self):
+        return (os.system, ("touch exploited",))
+
+
+def test_pickled_payloads_are_never_loaded(snapshot_dir, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    directory = os.path.join(snapshot_dir, "default")
+    with open(os.path.join(directory, "CURRENT")) as f:
+        path = os.path.join(directory, json.load(f)["content_hash"] + ".snapshot")
+    with open(path, "wb") as f:
+        pickle.dump(Exploit(), f)
+    assert load_snapshot(snapshot_dir, "", SOURCE) is None
+    # An array of Python objects, which numpy would unpickle
+    layout = json.dumps({"x": ["|O", [1], 0]}).encode()
+    document = json.dumps({"__array__": "x"}).encode()
+    with open(path, "wb") as f:
+        f.write(len(layout).to_bytes(8, "little") + len(document).to_bytes(8, "little") + layout + document)
+        f.write(pickle.dumps(Exploit()))
+    assert load_snapshot(snapshot_dir, "", SOURCE) is None
+    assert not os.path.exists(tmp_path / "exploited")
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from dashboard.store import PROFILES_TABLE, ProfileStore
+from dashboard.synthetic import make_export_text
+
+
+@pytest.fixture
+def store(tmp_path):
+    profiles_dir = tmp_path / "profiles"
+    profiles_dir.mkdir()
+    for seed, profile_id in enumerate(["p1", "p2"]):
+        (profiles_dir / f"{profile_id}.txt").write_text(make_export_text(seed=seed))
+    return ProfileStore(str(profiles_dir), str(tmp_path / "cache"))
+
+
+def _mtimes(store):
+    cache_dir = store.cache_dir
+    return {name: os.stat(os.path.join(cache_dir, name)).st_mtime_ns for name in os.listdir(cache_dir)}
+
+
+def test_corrupt_export_is_skipped_until_it_changes(store):
+    corrupt = os.path.join(store.profiles_dir, "broken.txt")
+    with open(corrupt, "w") as f:
+        f.write("not an export")
+    assert store.ingest() == 3
+    assert [row["profile_id"] for row in store.list_profiles()] == ["p1", "p2"]
+
+    written = _mtimes(store)
+    assert store.ingest() == 0
+    assert _mtimes(store) == written
+
+    with open(corrupt, "w") as f:
+        f.write(make_export_text(seed=5))
+    assert store.ingest() == 1
+    assert [row["profile_id"] for row in store.list_profiles()] == ["broken", "p1", "p2"]
+
+
+def test_removing_an_export_counts_as_a_change(store):
+    store.ingest()
+    os.remove(os.path.join(store.profiles_dir, "p2.txt"))
+    assert store.ingest() == 1
+    assert store.read_columns(PROFILES_TABLE, ["profile_id"])["profile_id"].to_pylist() == ["p1"]
+    assert store.load_profile("p2") is None
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from dashboard.store import ProfileStore
+from dashboard.synthetic import make_export_text
+from dashboard.tag_index import TagIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TagIndex(str(tmp_path / "tag_index.npz"))
+    index.set_profile("a", ["Travel", "food", "Photography"], "A")
+    index.set_profile("b", ["travel", "food"], "B")
+    index.set_profile("c", ["travel", "fitness"], "C")
+    index.set_profile("d", ["gaming"], "D")
+    return index
+
+
+def test_related_tags(index):
+    assert index.related_tags("TRAVEL", metric="jaccard") == [
+        ("food", 2, 2 / 3), ("photography", 1, 1 / 3), ("fitness", 1, 1 / 3),
+    ]
+    assert index.related_tags("unknown") == []
+
+
+def test_similar_profiles(index):
+    assert [row[:3] for row in index.similar_profiles("a")] == [("b", "B", 2), ("c", "C", 1)]
+    assert index.similar_to_tags(["gaming", "new tag"], metric="jaccard") == [("d", "D", 1, 0.5)]
+
+
+def test_removed_profile_is_not_returned(index):
+    index.remove_profile("b")
+    assert [row[0] for row in index.similar_profiles("a")] == ["c"]
+    assert ("food", 1, 0.5) in index.related_tags("travel", metric="jaccard")
+
+
+def test_save_and_open_round_trip(index):
+    index.save()
+    reopened = TagIndex.open(index.path)
+    assert reopened.similar_profiles("a") == index.similar_profiles("a")
+    assert reopened.related_tags("travel") == index.related_tags("travel")
+
+
+def test_sync_drops_deleted_exports(tmp_path):
+    profiles_dir = tmp_path / "profiles"
+    profiles_dir.mkdir()
+    for seed, profile_id in enumerate(["p1", "p2"]):
+        (profiles_dir / f"{profile_id}.txt").write_text(make_export_text(seed=seed))
+    store = ProfileStore(str(profiles_dir), str(tmp_path / "cache"))
+    store.ingest()
+    index = TagIndex(str(tmp_path / "tag_index.npz"))
+    assert index.sync(store) == 2
+    assert [row[0] for row in index.similar_profiles("p1")] == ["p2"]
+
+    os.remove(profiles_dir / "p2.txt")
+    store.ingest()
+    assert index.sync(store) == 1
+    assert len(index) == 1
+    assert index.similar_profiles("p1") == []
+    assert index.sync(store) == 0
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from dashboard.trends import DEFAULT_ANCHOR, MemoryScoreCache, TokenBucket, TrendsEngine, get_interest_data
+
+
+# Answers every payload with a flat weekly series per keyword
+class FakeTrends:
+    def __init__(self, interest):
+        self.interest = interest
+        self.payloads = []
+
+    def build_payload(self, kw_list, timeframe=None, geo=None):
+        self.kw_list = kw_list
+        self.payloads.append(list(kw_list))
+
+    def interest_over_time(self):
+        index = pd.date_range(end="2024-12-29", periods=8, freq="W")
+        return pd.DataFrame({k: [self.interest.get(k, 0)] * len(index) for k in self.kw_list}, index=index)
+
+
+def _engine(client, cache=None):
+    return TrendsEngine(lambda: client, cache=cache or MemoryScoreCache(), limiter=TokenBucket(rate=1000, capacity=1000))
+
+
+def test_fixed_anchor_is_in_every_payload():
+    client = FakeTrends({DEFAULT_ANCHOR: 50, "a": 0, "b": 25, "c": 50, "d": 10, "e": 5})
+    scores = get_interest_data(_engine(client), ["a", "b", "c", "d", "e"])
+    assert all(payload[0] == DEFAULT_ANCHOR for payload in client.payloads)
+    assert scores == {"a": 0.0, "b": 50.0, "c": 100.0, "d": 20.0, "e": 10.0}
+
+
+def test_niche_first_tag_does_not_blank_the_table():
+    client = FakeTrends({DEFAULT_ANCHOR: 80, "niche": 0, "popular": 40})
+    scores = get_interest_data(_engine(client), ["niche", "popular"])
+    assert scores == {"niche": 0.0, "popular": 100.0}
+
+
+def test_anchor_without_interest_falls_back_to_the_payload_and_is_not_cached():
+    cache = MemoryScoreCache()
+    client = FakeTrends({"a": 20, "b": 40})
+    scores = get_interest_data(_engine(client, cache), ["a", "b"])
+    assert scores == {"a": 50.0, "b": 100.0}
+    assert cache.stats()["size"] == 0
+
+
+def test_scores_are_shared_across_profiles_through_the_cache():
+    cache = MemoryScoreCache()
+    client = FakeTrends({DEFAULT_ANCHOR: 50, "a": 25, "b": 50, "c": 10})
+    get_interest_data(_engine(client, cache), ["a", "b"])
+    get_interest_data(_engine(client, cache), ["c", "b"])
+    # Only "c" needed a new payload
+    assert client.payloads[-1] == [DEFAULT_ANCHOR, "c"]
+
+
+def test_memory_cache_counts_hits_and_misses():
+    cache = MemoryScoreCache()
+    client = FakeTrends({DEFAULT_ANCHOR: 50, "a": 25, "b": 50})
+    get_interest_data(_engine(client, cache), ["a", "b"])
+    get_interest_data(_engine(client, cache), ["a", "b"])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["size"] == 2